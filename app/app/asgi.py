@@ -9,8 +9,26 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from asgiref.sync import ThreadSensitiveContext
+
+import django
+
+from core.asgi import StreamingASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+os.environ.setdefault('ASYNC_API_VIEWS', '1')
+
+# As django.core.asgi.get_asgi_application(), with streamed responses such
+# as exports read off the event loop
+django.setup(set_prefix=False)
+django_application = StreamingASGIHandler()
+
+
+async def application(scope, receive, send):
+    """Give each request its own thread for sync code, as Django 4.0 does.
 
-application = get_asgi_application()
+    Django 3.2 otherwise runs the sync middleware and views of every
+    request on one shared thread.
+    """
+    async with ThreadSensitiveContext():
+        return await django_application(scope, receive, send)
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'rest_framework.authtoken',
@@ -46,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,21 +78,84 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'app.wsgi.application'
 
+# Serve the read-heavy API views listed in app.urls with async views, which
+# answer profile reads from the token cache on the event loop; everything
+# else, including cached pattern responses, which look up the data version
+# first, runs the sync view. app.asgi turns this on.
+ASYNC_API_VIEWS = bool(int(os.environ.get('ASYNC_API_VIEWS', 0)))
+
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# DB_CONN_MAX_AGE keeps connections open between requests (seconds,
+# 'none' for unlimited). A DB_POOL_MAX_SIZE above 0 switches to the pooled
+# backend in core.db.postgresql, which returns connections to an
+# in-process pool at the end of each request instead of closing them.
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '0')
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+
 DATABASES = {
     'default': {
-      'ENGINE': 'django.db.backends.postgresql',
+      'ENGINE': (
+          'core.db.postgresql' if DB_POOL_MAX_SIZE
+          else 'django.db.backends.postgresql'
+      ),
       'HOST': os.environ.get('DB_HOST'),
       'NAME': os.environ.get('DB_NAME'),
       'USER': os.environ.get('DB_USER'),
       'PASSWORD': os.environ.get('DB_PASS'),
+      'CONN_MAX_AGE': (
+          None if DB_CONN_MAX_AGE.lower() == 'none'
+          else int(DB_CONN_MAX_AGE)
+      ),
+      'POOL': {
+          'MAX_SIZE': DB_POOL_MAX_SIZE,
+          'OVERFLOW': os.environ.get('DB_POOL_OVERFLOW', 'block'),
+          'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+          'PING_AFTER': float(os.environ.get('DB_POOL_PING_AFTER', 30)),
+      },
     }
 }
 
 
+# Query count, DB time, response rendering time and total time of every
+# request, recorded by core.middleware.RequestMetricsMiddleware into the
+# per-process histograms served at /api/metrics/. SERVER_TIMING also sends
+# them to every client in a Server-Timing header, so it is off unless set.
+REQUEST_METRICS = {
+    'ENABLED': bool(int(os.environ.get('REQUEST_METRICS', 1))),
+    'SERVER_TIMING': bool(
+        int(os.environ.get('REQUEST_METRICS_SERVER_TIMING', 0))),
+}
+
+
+# Responses of TYPES reaching MIN_SIZE bytes, and streamed ones such as
+# exports, are compressed with the first of ENCODINGS the client prefers.
+# 'br' needs the brotli package from requirements.txt and is skipped without
+# it. LEVELS are gzip levels 1-9 and brotli qualities 0-11; higher is smaller
+# but slower.
+RESPONSE_COMPRESSION = {
+    'ENCODINGS': [
+        encoding for encoding in os.environ.get(
+            'COMPRESSION_ENCODINGS', 'br,gzip').split(',')
+        if encoding
+    ],
+    'MIN_SIZE': int(os.environ.get('COMPRESSION_MIN_SIZE', 1024)),
+    'LEVELS': {
+        'gzip': int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+        'br': int(os.environ.get('COMPRESSION_BROTLI_LEVEL', 4)),
+    },
+    'TYPES': [
+        'application/json',
+        'application/x-ndjson',
+        'application/vnd.oai.openapi',
+        'text/',
+        'image/svg+xml',
+    ],
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -132,6 +198,22 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media/'
 STATIC_ROOT = '/vol/web/static/'
 
+# Media is written to a temp file and linked into place, never in-place
+DEFAULT_FILE_STORAGE = 'core.storage.AtomicFileSystemStorage'
+
+# Media is served by core.media.MediaView. SENDFILE hands files to the
+# front-end server instead of sending them from Python: 'x-sendfile'
+# (Apache mod_xsendfile, lighttpd) passes the file's path, and
+# 'x-accel-redirect' (nginx) redirects to INTERNAL_URL + its name, which
+# must be an internal location aliased to MEDIA_ROOT. Content-addressed
+# files are cached for IMMUTABLE_MAX_AGE seconds, others for MAX_AGE.
+MEDIA_SERVING = {
+    'SENDFILE': os.environ.get('MEDIA_SENDFILE', ''),
+    'INTERNAL_URL': os.environ.get('MEDIA_INTERNAL_URL', '/protected-media/'),
+    'MAX_AGE': int(os.environ.get('MEDIA_MAX_AGE', 3600)),
+    'IMMUTABLE_MAX_AGE': 365 * 24 * 60 * 60,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -141,4 +223,106 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
   'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+  'DEFAULT_RENDERER_CLASSES': [
+      'core.renderers.JSONRenderer',
+      'rest_framework.renderers.BrowsableAPIRenderer',
+  ],
+  'DEFAULT_PARSER_CLASSES': [
+      'core.renderers.JSONParser',
+      'rest_framework.parsers.FormParser',
+      'rest_framework.parsers.MultiPartParser',
+  ],
+}
+
+# JSON library of the API's renderer and parser in core.renderers:
+# 'orjson', 'stdlib' or 'auto' for orjson when it is installed
+API_JSON_BACKEND = os.environ.get('API_JSON_BACKEND', 'auto')
+
+# The Django cache. CACHE_BACKEND names a cache shared by every worker
+# process, e.g. django.core.cache.backends.memcached.PyMemcacheCache with
+# CACHE_LOCATION=memcached:11211; without one each process has its own.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', '')
+CACHES = {
+    'default': {
+        'BACKEND': (
+            CACHE_BACKEND or 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+}
+
+# Token -> User lookups cached by user.authentication.
+# BACKEND is 'django' (the default cache above), 'local' or empty to
+# disable caching. A 'local' cache is per process, so a revoked token keeps
+# working on other workers until TIMEOUT; only use it with one process.
+# Caching is off unless a shared CACHE_BACKEND is configured.
+TOKEN_AUTH_CACHE = {
+    'BACKEND': os.environ.get(
+        'TOKEN_AUTH_CACHE_BACKEND', 'django' if CACHE_BACKEND else ''),
+    'TIMEOUT': int(os.environ.get('TOKEN_AUTH_CACHE_TIMEOUT', 60)),
+    'MAX_ENTRIES': int(os.environ.get('TOKEN_AUTH_CACHE_MAX_ENTRIES', 10000)),
+    'ALIAS': 'default',
+}
+
+# Per-user cache of pattern, tag and datastructure list/detail responses.
+# Same BACKEND choices as TOKEN_AUTH_CACHE, and likewise off unless a
+# shared CACHE_BACKEND is configured: with 'local', each worker process
+# fills and holds its own copy of every response.
+PATTERN_RESPONSE_CACHE = {
+    'BACKEND': os.environ.get(
+        'PATTERN_RESPONSE_CACHE_BACKEND', 'django' if CACHE_BACKEND else ''),
+    'TIMEOUT': int(os.environ.get('PATTERN_RESPONSE_CACHE_TIMEOUT', 300)),
+    'MAX_ENTRIES': int(
+        os.environ.get('PATTERN_RESPONSE_CACHE_MAX_ENTRIES', 1000)),
+    'ALIAS': 'default',
+}
+
+# Cursor pagination for the pattern, tag and datastructure lists.
+# Clients may request up to PATTERN_MAX_PAGE_SIZE items via ?page_size=
+PATTERN_PAGE_SIZE = int(os.environ.get('PATTERN_PAGE_SIZE', 100))
+PATTERN_MAX_PAGE_SIZE = int(os.environ.get('PATTERN_MAX_PAGE_SIZE', 1000))
+
+# Rows written per transaction by the pattern bulk-import endpoint
+PATTERN_IMPORT_CHUNK_SIZE = int(
+    os.environ.get('PATTERN_IMPORT_CHUNK_SIZE', 500))
+
+# Invalid rows the bulk-import endpoint reports in detail; the rest are
+# only counted, in 'failed'
+PATTERN_IMPORT_MAX_ERRORS = int(
+    os.environ.get('PATTERN_IMPORT_MAX_ERRORS', 100))
+
+# Patterns fetched per server-side cursor batch by the export endpoint
+PATTERN_EXPORT_CHUNK_SIZE = int(
+    os.environ.get('PATTERN_EXPORT_CHUNK_SIZE', 500))
+
+# Pattern image uploads are streamed to disk and refused with a 413 past
+# PATTERN_IMAGE_MAX_UPLOAD_SIZE bytes. Images are checked against the
+# remaining limits from their header alone, before any pixel is decoded.
+PATTERN_IMAGE_MAX_UPLOAD_SIZE = int(
+    os.environ.get('PATTERN_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024))
+PATTERN_IMAGE_MAX_DIMENSION = int(
+    os.environ.get('PATTERN_IMAGE_MAX_DIMENSION', 10000))
+PATTERN_IMAGE_MAX_PIXELS = int(
+    os.environ.get('PATTERN_IMAGE_MAX_PIXELS', 40 * 1000 * 1000))
+PATTERN_IMAGE_FORMATS = ['JPEG', 'PNG', 'WEBP', 'GIF']
+
+# Pattern images are stored once per distinct content and shared. A file
+# no Pattern refers to any more is deleted, along with its thumbnails,
+# once it has gone unused for PATTERN_IMAGE_GC_GRACE seconds: when it is
+# released, or later by the collect_pattern_images command.
+PATTERN_IMAGE_GC_GRACE = int(os.environ.get('PATTERN_IMAGE_GC_GRACE', 3600))
+
+# Resized copies of pattern images, generated by pattern.thumbnails on a
+# background thread pool once an upload commits. SIZES maps a name to the
+# longest edge in pixels. An empty FORMATS turns the pipeline off; SYNC
+# generates them inline instead, which the tests rely on.
+PATTERN_THUMBNAILS = {
+    'SIZES': {'small': 160, 'medium': 640},
+    'FORMATS': [
+        fmt for fmt in os.environ.get(
+            'PATTERN_THUMBNAIL_FORMATS', 'webp,jpeg').split(',')
+        if fmt
+    ],
+    'QUALITY': int(os.environ.get('PATTERN_THUMBNAIL_QUALITY', 80)),
+    'WORKERS': int(os.environ.get('PATTERN_THUMBNAIL_WORKERS', 2)),
+    'SYNC': bool(int(os.environ.get('PATTERN_THUMBNAIL_SYNC', 0))),
 }
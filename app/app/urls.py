@@ -13,15 +13,32 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from drf_spectacular.views import (
   SpectacularAPIView,
   SpectacularSwaggerView,
 )
 from django.contrib import admin
-from django.urls import path, include
-from django.conf.urls.static import static
+from django.urls import path, re_path, include
 from django.conf import settings
 
+from core.async_views import async_urls
+from core.media import MediaView
+from core.views import DatabaseStatsView, MetricsView
+
+
+# Read-heavy views served by async views when ASYNC_API_VIEWS is on
+ASYNC_VIEWS = {
+    'user:me',
+    'pattern:pattern-list',
+    'pattern:pattern-detail',
+    'pattern:tag-list',
+    'pattern:tag-autocomplete',
+    'pattern:datastructure-list',
+    'pattern:datastructure-autocomplete',
+}
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
@@ -30,11 +47,16 @@ urlpatterns = [
       SpectacularSwaggerView.as_view(url_name='api-schema'),
       name='api-docs',
     ),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
+    path('api/metrics/db/', DatabaseStatsView.as_view(), name='db-stats'),
     path('api/user/', include('user.urls')),
     path('api/pattern/', include('pattern.urls')),
+    re_path(
+      rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.+)$',
+      MediaView.as_view(),
+      name='media',
+    ),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT)
+if settings.ASYNC_API_VIEWS:
+    urlpatterns = async_urls(urlpatterns, ASYNC_VIEWS)
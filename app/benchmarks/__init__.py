@@ -0,0 +1,6 @@
+"""
+Performance benchmark scenarios for the Algo Pattern API.
+
+Each module exposes a ``run(**options)`` function returning a flat dict of
+measurements; run them with ``python manage.py benchmark <scenario>``.
+"""
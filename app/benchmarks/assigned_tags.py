@@ -0,0 +1,66 @@
+"""
+Latency of assigned_only and usage counts on heavily used Tags
+"""
+from django.conf import settings
+
+from benchmarks.utils import (
+    seed_library,
+    stopwatch,
+    summarize,
+    view_queryset,
+)
+from core.models import Pattern, Tag
+from pattern.views import TagViewSet
+
+
+def legacy_queryset(user):
+    """The join and DISTINCT assigned_only used before EXISTS"""
+    return Tag.objects.filter(
+        pattern__isnull=False, user=user).order_by('-name', '-id').distinct()
+
+
+def per_tag_counts(user, tags):
+    """Count Patterns the way the UI did, one filtered query per Tag"""
+    return [
+        Pattern.objects.filter(user=user, tags=tag).count() for tag in tags
+    ]
+
+
+def time_call(func, repeat):
+    """Return (last result, latency samples) of repeat calls to func"""
+    samples = []
+    for _ in range(repeat):
+        with stopwatch() as timing:
+            result = func()
+        samples.append(timing['seconds'])
+    return result, samples
+
+
+def run(size=20000, repeat=30, **options):
+    """Seed one User whose 50 Tags each sit on thousands of Patterns"""
+    user = seed_library(users=1, patterns=size, tags=50, links=5)[0]
+    limit = settings.PATTERN_PAGE_SIZE + 1
+    cases = {
+        'distinct_assigned': legacy_queryset(user)[:limit],
+        'exists_assigned': view_queryset(
+            TagViewSet, user, {'assigned_only': 1})[:limit],
+        'with_counts': view_queryset(
+            TagViewSet, user, {'assigned_only': 1, 'with_counts': 1})[:limit],
+    }
+
+    results = {'patterns': size}
+    pages = {}
+    for label, queryset in cases.items():
+        pages[label], samples = time_call(
+            lambda: list(queryset.all()), repeat)
+        results[f'{label}_rows'] = len(pages[label])
+        results.update(summarize(samples, prefix=f'{label}_'))
+
+    counts, samples = time_call(
+        lambda: per_tag_counts(user, pages['exists_assigned']), repeat)
+    results.update(summarize(samples, prefix='per_tag_counts_'))
+    results['counts_match'] = counts == [
+        tag.pattern_count for tag in pages['with_counts']]
+    results['assigned_pages_match'] = (
+        pages['distinct_assigned'] == pages['exists_assigned'])
+    return results
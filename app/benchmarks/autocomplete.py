@@ -0,0 +1,69 @@
+"""
+Tag autocomplete latency for a User with tens of thousands of Tags
+"""
+import random
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from benchmarks.utils import (
+    VOCABULARY,
+    authenticated_client,
+    create_user,
+    stopwatch,
+    summarize,
+)
+from core.models import Tag
+
+
+def typed_prefixes(words):
+    """Return every prefix a user types on the way to each word"""
+    return [word[:end] for word in words for end in range(1, len(word) + 1)]
+
+
+def measure(client, url, prefixes):
+    """Return (queries per request, latency samples) for the prefixes"""
+    samples = []
+    with CaptureQueriesContext(connection) as queries:
+        for prefix in prefixes:
+            with stopwatch() as timing:
+                client.get(url, {'q': prefix})
+            samples.append(timing['seconds'])
+    return len(queries) / len(prefixes), samples
+
+
+def run(size=20000, repeat=20, **options):
+    """Type repeat words against size Tags, uncached and then cached"""
+    rng = random.Random(0)
+    user = create_user()
+    Tag.objects.bulk_create(
+        (
+            Tag(user=user, name=f'{rng.choice(VOCABULARY)} {i}')
+            for i in range(size)
+        ),
+        batch_size=5000,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE core_tag')
+
+    url = reverse('pattern:tag-autocomplete')
+    client = authenticated_client(user)
+    prefixes = typed_prefixes(
+        f'{rng.choice(VOCABULARY)} {rng.randrange(size)}'
+        for _ in range(repeat))
+
+    results = {'tags': size, 'requests': len(prefixes)}
+    with override_settings(PATTERN_RESPONSE_CACHE={'BACKEND': None}):
+        per_request, samples = measure(client, url, prefixes)
+    results['uncached_queries_per_request'] = per_request
+    results.update(summarize(samples, prefix='uncached_'))
+
+    with override_settings(PATTERN_RESPONSE_CACHE=dict(
+            settings.PATTERN_RESPONSE_CACHE, BACKEND='local')):
+        measure(client, url, prefixes)
+        per_request, samples = measure(client, url, prefixes)
+    results['cached_queries_per_request'] = per_request
+    results.update(summarize(samples, prefix='cached_'))
+    return results
@@ -0,0 +1,47 @@
+"""
+Bulk import throughput compared with one POST per Pattern
+"""
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from benchmarks.utils import (
+    authenticated_client,
+    create_user,
+    make_pattern_rows,
+    stopwatch,
+)
+
+
+def run(size=500, **options):
+    """Time size single creates against one bulk import of size rows"""
+    rows = make_pattern_rows(size)
+
+    client = authenticated_client(create_user())
+    url = reverse('pattern:pattern-list')
+    with CaptureQueriesContext(connection) as single_queries:
+        with stopwatch() as single:
+            for row in rows:
+                client.post(url, row, format='json')
+
+    client = authenticated_client(create_user())
+    url = reverse('pattern:pattern-bulk-import')
+    body = '\n'.join(json.dumps(row) for row in rows)
+    with CaptureQueriesContext(connection) as bulk_queries:
+        with stopwatch() as bulk:
+            res = client.post(
+                url, data=body, content_type='application/x-ndjson')
+
+    return {
+        'rows': size,
+        'imported': res.data['created'],
+        'single_post_seconds': round(single['seconds'], 4),
+        'single_post_rows_per_second': round(size / single['seconds'], 1),
+        'single_post_queries': len(single_queries),
+        'bulk_import_seconds': round(bulk['seconds'], 4),
+        'bulk_import_rows_per_second': round(size / bulk['seconds'], 1),
+        'bulk_import_queries': len(bulk_queries),
+        'speedup': round(single['seconds'] / bulk['seconds'], 2),
+    }
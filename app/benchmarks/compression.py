@@ -0,0 +1,70 @@
+"""
+Bytes on the wire and CPU time of the API's large responses with each
+content coding and level
+"""
+import time
+
+from django.conf import settings
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from benchmarks.utils import authenticated_client, seed_library
+from core import compression
+
+
+def codings():
+    """Return (label, encoding, level) for every coding available here"""
+    options = [('identity', 'identity', None)]
+    options += [(f'gzip{level}', 'gzip', level) for level in (1, 6, 9)]
+    if compression.brotli is not None:
+        options += [(f'br{level}', 'br', level) for level in (4, 11)]
+    return options
+
+
+def fetch(client, url, encoding):
+    """Return the chunks of the body sent for Accept-Encoding encoding"""
+    response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+    if response.streaming:
+        return list(response.streaming_content)
+    return [response.content]
+
+
+def compression_cpu(encoding, level, chunks, repeat):
+    """Return the CPU ms to compress chunks, as the middleware would"""
+    started = time.process_time()
+    for _ in range(repeat):
+        encoder = compression.ENCODERS[encoding](level)
+        for _ in compression.compress_stream(encoder, chunks):
+            pass
+    return round((time.process_time() - started) / repeat * 1000, 3)
+
+
+def run(size=1000, repeat=20, **options):
+    """Fetch a list page, a Tag list and both exports in every coding"""
+    user = seed_library(users=1, patterns=size)[0]
+    client = authenticated_client(user)
+    urls = {
+        'list': f'{reverse("pattern:pattern-list")}?page_size={size}',
+        'tags': reverse('pattern:tag-list'),
+        'export_jsonl': reverse('pattern:pattern-export'),
+        'export_csv': f'{reverse("pattern:pattern-export")}?format=csv',
+    }
+    plain = {
+        name: fetch(client, url, 'identity') for name, url in urls.items()}
+
+    results = {}
+    for label, encoding, level in codings():
+        levels = dict(settings.RESPONSE_COMPRESSION['LEVELS'])
+        if level is not None:
+            levels[encoding] = level
+        with override_settings(RESPONSE_COMPRESSION=dict(
+                settings.RESPONSE_COMPRESSION,
+                ENCODINGS=['br', 'gzip'], LEVELS=levels)):
+            for name, url in urls.items():
+                sent = sum(map(len, fetch(client, url, encoding)))
+                results[f'{name}_{label}_kib'] = round(sent / 1024, 1)
+                if level is not None:
+                    results[f'{name}_{label}_cpu_ms'] = compression_cpu(
+                        encoding, level, plain[name], repeat)
+
+    return results
@@ -0,0 +1,159 @@
+"""
+Throughput and latency of the read-heavy API views under concurrent load,
+served by the WSGI handler on a thread pool, as a threaded WSGI server
+would, and by the ASGI application with sync and with async views
+"""
+import asyncio
+import itertools
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import clear_url_caches, reverse
+
+from rest_framework.authtoken.models import Token
+
+from app import asgi, urls
+from benchmarks.utils import seed_library, stopwatch, summarize
+from core.async_views import async_urls
+
+
+def async_urlconf():
+    """Return a URLconf module with the ASYNC_VIEWS made async"""
+    module = types.ModuleType('async_urls')
+    module.urlpatterns = async_urls(urls.urlpatterns, urls.ASYNC_VIEWS)
+    return module
+
+
+def make_requests(tokens, size):
+    """Return size (path, token) pairs cycling through the read views"""
+    paths = [
+        reverse('pattern:pattern-list'),
+        reverse('pattern:tag-list'),
+        reverse('pattern:datastructure-list'),
+        reverse('user:me'),
+    ]
+    pairs = itertools.cycle(itertools.product(paths, tokens))
+    return list(itertools.islice(pairs, size))
+
+
+def serve_wsgi(requests, concurrency):
+    """Serve requests on concurrency threads; return (seconds, status)"""
+    handler = WSGIHandler()
+    factory = RequestFactory()
+
+    def call(request):
+        path, token = request
+        environ = factory._base_environ(
+            PATH_INFO=path, HTTP_AUTHORIZATION=f'Token {token}')
+        started = {}
+
+        def start_response(status, headers):
+            started['status'] = int(status.split()[0])
+
+        with stopwatch() as timing:
+            response = handler(environ, start_response)
+            b''.join(response)
+            response.close()
+        return timing['seconds'], started['status']
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(call, requests))
+
+
+def serve_asgi(application, requests, concurrency):
+    """Serve requests concurrency at a time; return (seconds, status)"""
+
+    async def call(request, limit):
+        path, token = request
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'query_string': b'',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Token {token}'.encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        started = {}
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                started['status'] = message['status']
+
+        async with limit:
+            with stopwatch() as timing:
+                await application(scope, receive, send)
+        return timing['seconds'], started['status']
+
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(
+            *(call(request, limit) for request in requests))
+
+    return asyncio.run(main())
+
+
+def measure(label, serve, results):
+    """Run serve() and record its throughput and latency under label"""
+    with stopwatch() as total:
+        samples, statuses = zip(*serve())
+    results[f'{label}_requests_per_second'] = round(
+        len(samples) / total['seconds'])
+    results[f'{label}_errors'] = sum(status != 200 for status in statuses)
+    results.update(summarize(samples, prefix=f'{label}_'))
+
+
+def run(size=2000, repeat=None, concurrency=32, users=8, patterns=100,
+        **options):
+    """Serve size requests, concurrency at a time, in each deployment"""
+    tokens = [
+        Token.objects.create(user=user).key
+        for user in seed_library(users=users, patterns=patterns)
+    ]
+    requests = make_requests(tokens, size)
+    # One process, so the per-process caches see every write
+    cached = dict(settings.PATTERN_RESPONSE_CACHE, BACKEND='local')
+    uncached = dict(settings.PATTERN_RESPONSE_CACHE, BACKEND='')
+    token_cache = dict(settings.TOKEN_AUTH_CACHE, BACKEND='local')
+    deployments = {
+        'wsgi': lambda: serve_wsgi(requests, concurrency),
+        'asgi_shared_thread': lambda: serve_asgi(
+            ASGIHandler(), requests, concurrency),
+        'asgi_sync': lambda: serve_asgi(
+            asgi.application, requests, concurrency),
+        'asgi_async': lambda: serve_asgi(
+            asgi.application, requests, concurrency),
+    }
+
+    results = {'requests': size, 'concurrency': concurrency}
+    for cache, cache_settings in (
+        ('cached', cached),
+        ('uncached', uncached),
+    ):
+        for deployment, serve in deployments.items():
+            urlconf = async_urlconf() if deployment == 'asgi_async' \
+                else settings.ROOT_URLCONF
+            with override_settings(
+                    ROOT_URLCONF=urlconf,
+                    PATTERN_RESPONSE_CACHE=cache_settings,
+                    TOKEN_AUTH_CACHE=token_cache):
+                clear_url_caches()
+                serve()
+                measure(f'{cache}_{deployment}', serve, results)
+        clear_url_caches()
+
+    return results
@@ -0,0 +1,53 @@
+"""
+Peak memory of streaming exports as the library grows
+"""
+import tracemalloc
+
+from django.urls import reverse
+
+from benchmarks.utils import (
+    authenticated_client,
+    create_user,
+    seed_patterns,
+    stopwatch,
+)
+
+
+def consume(client, url, fmt):
+    """Read one export to the end and return its size in bytes"""
+    res = client.get(url, {'format': fmt})
+    return sum(len(chunk) for chunk in res.streaming_content)
+
+
+def measure(client, url, fmt):
+    """Return (seconds, peak traced bytes, body bytes) for one export.
+
+    Timing and memory come from separate passes since tracing
+    allocations slows the export down several times over.
+    """
+    with stopwatch() as timing:
+        size = consume(client, url, fmt)
+    tracemalloc.start()
+    consume(client, url, fmt)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return timing['seconds'], peak, size
+
+
+def run(size=2000, **options):
+    """Export libraries of size and 4 * size Patterns in both formats"""
+    url = reverse('pattern:pattern-export')
+    results = {}
+    for label, count in (('small', size), ('large', size * 4)):
+        user = create_user()
+        seed_patterns(user, count)
+        client = authenticated_client(user)
+        for fmt in ('jsonl', 'csv'):
+            seconds, peak, body = measure(client, url, fmt)
+            prefix = f'{fmt}_{label}'
+            results[f'{prefix}_patterns'] = count
+            results[f'{prefix}_seconds'] = round(seconds, 4)
+            results[f'{prefix}_peak_kib'] = round(peak / 1024, 1)
+            results[f'{prefix}_body_kib'] = round(body / 1024, 1)
+
+    return results
@@ -0,0 +1,61 @@
+"""
+Payload size, serialization time and latency of a Pattern page for each
+sparse fieldset
+"""
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks.utils import (
+    authenticated_client,
+    make_view,
+    seed_library,
+    stopwatch,
+    summarize,
+)
+from pattern.views import PatternViewSet
+
+
+FIELDSETS = {
+    'full': {},
+    'compact': {'compact': 1},
+    'title': {'fields': 'title'},
+}
+
+
+def serialize(user, params, size, repeat):
+    """Return serialization time samples for a page of size Patterns"""
+    view = make_view(PatternViewSet, user, params)
+    patterns = list(view.get_queryset()[:size])
+    samples = []
+    for _ in range(repeat):
+        with stopwatch() as timing:
+            JSONRenderer().render(
+                view.get_serializer(patterns, many=True).data)
+        samples.append(timing['seconds'])
+    return samples
+
+
+def run(size=100, repeat=50, links=5, **options):
+    """Fetch and serialize a page of size Patterns in every fieldset"""
+    user = seed_library(users=1, patterns=size, links=links)[0]
+    client = authenticated_client(user)
+    url = reverse('pattern:pattern-list')
+
+    results = {}
+    with override_settings(PATTERN_RESPONSE_CACHE={'BACKEND': ''}):
+        for label, params in FIELDSETS.items():
+            params = dict(params, page_size=size)
+            samples = []
+            for _ in range(repeat):
+                with stopwatch() as timing:
+                    response = client.get(url, params)
+                samples.append(timing['seconds'])
+            results[f'{label}_payload_bytes'] = len(response.content)
+            results.update(summarize(samples, prefix=f'{label}_request_'))
+            results.update(summarize(
+                serialize(user, params, size, repeat),
+                prefix=f'{label}_serialize_'))
+
+    return results
@@ -0,0 +1,74 @@
+"""
+Deduplicated Pattern image storage and the speed and memory use of
+garbage collecting orphaned image files
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test.utils import override_settings
+
+from benchmarks.utils import create_user, stopwatch
+from core.models import PATTERN_IMAGE_DIR, Pattern
+from pattern.images import collect_garbage
+
+
+def write_images(count):
+    """Write count distinct, old image files; return their storage names"""
+    past = time.time() - 86400
+    names = []
+    for i in range(count):
+        digest = hashlib.sha256(str(i).encode()).hexdigest()
+        name = f'{PATTERN_IMAGE_DIR}/{digest[:2]}/{digest}.png'
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'\x89PNG')
+        os.utime(path, (past, past))
+        names.append(name)
+    return names
+
+
+def run(size=20000, repeat=None, shared=50, batch_size=500, **options):
+    """Collect size image files of which half are still referenced"""
+    user = create_user()
+    media_root = tempfile.mkdtemp()
+    results = {}
+    try:
+        with override_settings(MEDIA_ROOT=media_root):
+            for i in range(shared):
+                pattern = Pattern.objects.create(user=user, title=f'p{i}')
+                pattern.image.save('same.png', ContentFile(b'same image'))
+            _, files = default_storage.listdir(
+                os.path.dirname(pattern.image.name))
+            results['identical_uploads'] = shared
+            results['identical_files_stored'] = len(files)
+
+            names = write_images(size)
+            Pattern.objects.bulk_create(
+                Pattern(user=user, title=name, image=name)
+                for name in names[::2]
+            )
+
+            tracemalloc.start()
+            with stopwatch() as timing:
+                stats = collect_garbage(batch_size=batch_size, grace=3600)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        shutil.rmtree(media_root)
+
+    results.update({
+        'files_scanned': stats['scanned'],
+        'files_deleted': stats['deleted'],
+        'files_kept': stats['kept'],
+        'collect_seconds': round(timing['seconds'], 3),
+        'files_per_second': round(stats['scanned'] / timing['seconds']),
+        'peak_memory_kib': round(peak / 1024),
+    })
+    return results
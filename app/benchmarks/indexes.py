@@ -0,0 +1,93 @@
+"""
+Query plans and latency of the per-user list queries with and without the
+composite indexes from core.0009
+"""
+from django.conf import settings
+from django.db import connection, transaction
+
+from benchmarks.utils import (
+    seed_library,
+    stopwatch,
+    summarize,
+    view_queryset,
+)
+from core.models import Pattern
+from pattern.views import PatternViewSet, TagViewSet
+
+
+# The indexes core.0009 adds and later migrations keep
+INDEXES = (
+    'pattern_user_id_desc_idx',
+    'core_pattern_tags_tag_id_pattern_id_idx',
+    'core_pattern_datastructures_datastructure_id_pattern_id_idx',
+)
+
+
+def page_querysets(user):
+    """Return the first-page queries the list endpoints run for user"""
+    tag_ids = ','.join(
+        str(pk) for pk in user.tag_set.order_by('id').values_list(
+            'id', flat=True)[:3])
+    datastructure_ids = ','.join(
+        str(pk) for pk in user.datastructure_set.order_by('id').values_list(
+            'id', flat=True)[:2])
+    patterns = Pattern.objects.filter(user=user).order_by('-id')
+    deep_id = patterns.values_list('id', flat=True)[patterns.count() * 9 // 10]
+    limit = settings.PATTERN_PAGE_SIZE + 1
+
+    querysets = {
+        'patterns_first_page': view_queryset(PatternViewSet, user),
+        'patterns_deep_page': view_queryset(
+            PatternViewSet, user).filter(id__lt=deep_id),
+        'patterns_by_tags': view_queryset(
+            PatternViewSet, user, {'tags': tag_ids}),
+        'patterns_by_datastructures': view_queryset(
+            PatternViewSet, user, {'datastructures': datastructure_ids}),
+        'tags_first_page': view_queryset(TagViewSet, user),
+        'tags_assigned_only': view_queryset(
+            TagViewSet, user, {'assigned_only': 1}),
+    }
+    return {
+        label: queryset.prefetch_related(None)[:limit]
+        for label, queryset in querysets.items()
+    }
+
+
+def measure(querysets, repeat, prefix):
+    """Return the plan and latency of every queryset"""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    results = {}
+    for label, queryset in querysets.items():
+        samples = []
+        for _ in range(repeat):
+            with stopwatch() as timing:
+                list(queryset.all())
+            samples.append(timing['seconds'])
+        results.update(summarize(samples, prefix=f'{prefix}{label}_'))
+        results[f'{prefix}{label}_plan'] = queryset.explain(analyze=True)
+
+    return results
+
+
+def run(size=5000, repeat=50, users=20, compare=True, **options):
+    """Seed users libraries of size Patterns and time one User's pages.
+
+    With compare the INDEXES are first dropped in a transaction, measured
+    and rolled back, so nothing else about the schema changes.
+    """
+    seeded = seed_library(users=users, patterns=size, tags=50)
+    querysets = page_querysets(seeded[0])
+    results = {'patterns_total': Pattern.objects.count()}
+
+    if compare:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in INDEXES:
+                    cursor.execute(f'DROP INDEX "{name}"')
+            results.update(measure(querysets, repeat, 'before_'))
+            transaction.set_rollback(True)
+
+    results.update(measure(querysets, repeat, 'after_'))
+    return results
@@ -0,0 +1,64 @@
+"""
+Latency added by the request instrumentation middleware
+"""
+from django.conf import settings
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from benchmarks.utils import (
+    authenticated_client,
+    seed_library,
+    stopwatch,
+    summarize,
+)
+from core.metrics import REGISTRY
+
+
+INSTRUMENTATION = 'core.middleware.RequestMetricsMiddleware'
+
+
+def warm_client(user, urls, middleware):
+    """Return a client whose handler has loaded middleware"""
+    client = authenticated_client(user)
+    with override_settings(MIDDLEWARE=middleware):
+        for url in urls:
+            client.get(url)
+    return client
+
+
+def run(size=100, repeat=300, **options):
+    """Time a cached and an uncached view with and without the middleware"""
+    user = seed_library(users=1, patterns=size)[0]
+    urls = {
+        'cached_me': reverse('user:me'),
+        'uncached_patterns': reverse('pattern:pattern-list'),
+    }
+    without = [name for name in settings.MIDDLEWARE if name != INSTRUMENTATION]
+
+    with override_settings(PATTERN_RESPONSE_CACHE={'BACKEND': ''}):
+        clients = {
+            'off': warm_client(user, urls.values(), without),
+            'on': warm_client(
+                user, urls.values(), [INSTRUMENTATION, *without]),
+        }
+        # Interleaved, so both see the same drift in the database's state
+        samples = {
+            (label, name): [] for label in clients for name in urls
+        }
+        for _ in range(repeat):
+            for name, url in urls.items():
+                for label, client in clients.items():
+                    with stopwatch() as timing:
+                        client.get(url)
+                    samples[label, name].append(timing['seconds'])
+
+    results = {}
+    for (label, name), values in samples.items():
+        results.update(summarize(values, prefix=f'{label}_{name}_'))
+
+    for name in urls:
+        results[f'overhead_{name}_p50_ms'] = round(
+            results[f'on_{name}_p50_ms'] - results[f'off_{name}_p50_ms'], 3)
+    results['metrics_exposition_kib'] = round(
+        len(REGISTRY.render()) / 1024, 1)
+    return results
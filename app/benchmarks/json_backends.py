@@ -0,0 +1,73 @@
+"""
+JSON rendering and parsing of large Pattern lists with each backend
+"""
+import io
+
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from benchmarks.utils import (
+    authenticated_client,
+    make_pattern_rows,
+    make_view,
+    seed_library,
+    stopwatch,
+    summarize,
+)
+from core import renderers
+from pattern import rows
+from pattern.serializers import PatternSerializer
+from pattern.views import PatternViewSet
+
+
+def backends():
+    """Return the JSON backends available here"""
+    return ['stdlib', *(['orjson'] if renderers.orjson else [])]
+
+
+def time_calls(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        with stopwatch() as timing:
+            call()
+        samples.append(timing['seconds'])
+    return samples
+
+
+def run(size=1000, repeat=20, links=5, **options):
+    """Render, parse and serve a list of size Patterns with each backend"""
+    user = seed_library(users=1, patterns=size, links=links)[0]
+    fields = PatternSerializer.Meta.fields
+    page = rows.pattern_rows(
+        rows.values(make_view(PatternViewSet, user).get_queryset(), fields),
+        fields)
+    payload = renderers.JSONRenderer().render(make_pattern_rows(size))
+    client = authenticated_client(user)
+    url = f'{reverse("pattern:pattern-list")}?page_size={size}'
+
+    results = {
+        'list_kib': round(len(renderers.JSONRenderer().render(page)) / 1024),
+        'payload_kib': round(len(payload) / 1024),
+    }
+    for backend in backends():
+        with override_settings(
+                API_JSON_BACKEND=backend,
+                PATTERN_RESPONSE_CACHE={'BACKEND': ''}):
+            results.update(summarize(
+                time_calls(lambda: renderers.JSONRenderer().render(page),
+                           repeat),
+                prefix=f'{backend}_render_'))
+            results.update(summarize(
+                time_calls(lambda: renderers.JSONParser().parse(
+                    io.BytesIO(payload)), repeat),
+                prefix=f'{backend}_parse_'))
+            results.update(summarize(
+                time_calls(lambda: client.get(url), repeat),
+                prefix=f'{backend}_request_'))
+
+    if 'orjson' in backends():
+        for stage in ('render', 'parse', 'request'):
+            results[f'{stage}_speedup'] = round(
+                results[f'stdlib_{stage}_p50_ms']
+                / results[f'orjson_{stage}_p50_ms'], 2)
+    return results
@@ -0,0 +1,81 @@
+"""
+Pattern list page built through PatternSerializer versus from .values()
+rows, in process and over the API
+"""
+from unittest.mock import patch
+
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks.utils import (
+    authenticated_client,
+    make_view,
+    seed_library,
+    stopwatch,
+    summarize,
+)
+from pattern import rows
+from pattern.serializers import PatternSerializer
+from pattern.views import PatternViewSet
+
+
+def build_serialized(view, size):
+    """Render a page through the serializer, as the list view did"""
+    patterns = view.get_queryset()[:size]
+    return JSONRenderer().render(view.get_serializer(patterns, many=True).data)
+
+
+def build_rows(view, size):
+    """Render a page from .values() rows"""
+    fields = PatternSerializer.Meta.fields
+    page = rows.values(view.get_queryset(), fields)[:size]
+    return JSONRenderer().render(rows.pattern_rows(page, fields))
+
+
+def time_builds(build, view, size, repeat):
+    samples = []
+    for _ in range(repeat):
+        with stopwatch() as timing:
+            body = build(view, size)
+        samples.append(timing['seconds'])
+    return samples, body
+
+
+def time_requests(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        with stopwatch() as timing:
+            client.get(url)
+        samples.append(timing['seconds'])
+    return samples
+
+
+def run(size=100, repeat=50, links=5, **options):
+    """Build and request a page of size Patterns both ways"""
+    user = seed_library(users=1, patterns=size, links=links)[0]
+    view = make_view(PatternViewSet, user)
+    client = authenticated_client(user)
+    url = f'{reverse("pattern:pattern-list")}?page_size={size}'
+
+    results = {}
+    bodies = {}
+    with override_settings(PATTERN_RESPONSE_CACHE={'BACKEND': ''}):
+        for label, build, from_rows in (
+            ('serializer', build_serialized, False),
+            ('rows', build_rows, True),
+        ):
+            samples, bodies[label] = time_builds(build, view, size, repeat)
+            results.update(summarize(samples, prefix=f'{label}_build_'))
+            with patch.object(PatternViewSet, 'list_from_rows', from_rows):
+                results.update(summarize(
+                    time_requests(client, url, repeat),
+                    prefix=f'{label}_request_'))
+
+    results['identical'] = bodies['rows'] == bodies['serializer']
+    for stage in ('build', 'request'):
+        results[f'{stage}_speedup'] = round(
+            results[f'serializer_{stage}_p50_ms']
+            / results[f'rows_{stage}_p50_ms'], 2)
+    return results
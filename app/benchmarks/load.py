@@ -0,0 +1,201 @@
+"""
+Latency, throughput and queries per request of the whole API under a
+concurrent mix of reads, writes, image uploads and token requests, served
+by the WSGI handler on a thread pool as a threaded WSGI server would
+"""
+import io
+import random
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from django.core.files.base import ContentFile
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from benchmarks.utils import seed_library, stopwatch, summarize
+from core.middleware import QueryTimer
+from core.models import Datastructure, Pattern, Tag
+from pattern.thumbnails import shutdown_executor
+
+
+# Share of requests per operation, roughly that of a browsing client
+MIX = {
+    'list': 30,
+    'filter': 20,
+    'retrieve': 20,
+    'create': 10,
+    'update': 10,
+    'upload_image': 5,
+    'token': 5,
+}
+STATUS = {'create': 201}
+PASSWORD = 'benchpass123'
+
+
+def jpeg(width=64, height=64):
+    """Return a small JPEG to upload"""
+    output = io.BytesIO()
+    Image.effect_noise((width, height), 64).convert('RGB').save(
+        output, 'JPEG')
+    return output.getvalue()
+
+
+class Library:
+    """Ids of the seeded rows of one User, to address requests to"""
+
+    def __init__(self, user):
+        self.email = user.email
+        self.token = Token.objects.create(user=user).key
+        self.patterns = list(
+            Pattern.objects.filter(user=user).values_list('id', flat=True))
+        self.tags = list(
+            Tag.objects.filter(user=user).values_list('id', flat=True))
+        self.datastructures = list(
+            Datastructure.objects.filter(user=user)
+            .values_list('id', flat=True))
+
+
+def make_request(operation, library, rng, image):
+    """Return (operation, method, path, data, headers) for one request"""
+    headers = {'HTTP_AUTHORIZATION': f'Token {library.token}'}
+    json_body = {'content_type': 'application/json'}
+    list_url = reverse('pattern:pattern-list')
+    pattern_id = rng.choice(library.patterns)
+    detail_url = reverse('pattern:pattern-detail', args=[pattern_id])
+
+    if operation == 'list':
+        return operation, 'get', list_url, {}, headers
+    if operation == 'filter':
+        params = {
+            'tags': ','.join(map(str, rng.sample(
+                library.tags, min(2, len(library.tags))))),
+        }
+        if library.datastructures:
+            params['datastructures'] = rng.choice(library.datastructures)
+        return operation, 'get', list_url, params, headers
+    if operation == 'retrieve':
+        return operation, 'get', detail_url, {}, headers
+    if operation == 'create':
+        number = rng.randrange(10 ** 6)
+        data = {
+            'title': f'Load pattern {number}',
+            'description': f'Created under load {number}',
+            'link': f'https://example.com/load/{number}',
+            'tags': [{'name': f'Tag {number % 20}'}],
+            'datastructures': [{'name': f'DS {number % 5}'}],
+        }
+        return operation, 'post', list_url, data, dict(headers, **json_body)
+    if operation == 'update':
+        data = {'title': f'Updated pattern {rng.randrange(10 ** 6)}'}
+        return operation, 'patch', detail_url, data, dict(headers, **json_body)
+    if operation == 'upload_image':
+        url = reverse('pattern:pattern-upload-image', args=[pattern_id])
+        data = {'image': ContentFile(image, name='load.jpg')}
+        return operation, 'post', url, data, headers
+    if operation == 'token':
+        data = {'email': library.email, 'password': PASSWORD}
+        return operation, 'post', reverse('user:token'), data, json_body
+    raise ValueError(f'Unknown operation {operation!r}')
+
+
+def make_requests(libraries, size, seed=0):
+    """Return size requests drawn from MIX for random Users"""
+    rng = random.Random(seed)
+    image = jpeg()
+    operations = rng.choices(list(MIX), weights=list(MIX.values()), k=size)
+    return [
+        make_request(operation, rng.choice(libraries), rng, image)
+        for operation in operations
+    ]
+
+
+def serve(requests, concurrency):
+    """Serve requests on concurrency threads.
+
+    Returns (operation, seconds, status, queries) for each request.
+    """
+    handler = WSGIHandler()
+    factory = RequestFactory()
+
+    def call(request):
+        operation, method, path, data, headers = request
+        environ = getattr(factory, method)(path, data, **headers).environ
+        started = {}
+
+        def start_response(status, headers):
+            started['status'] = int(status.split()[0])
+
+        timer = QueryTimer()
+        with stopwatch() as timing:
+            with connections['default'].execute_wrapper(timer):
+                response = handler(environ, start_response)
+                b''.join(response)
+                response.close()
+        return operation, timing['seconds'], started['status'], timer.count
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(call, requests))
+
+
+def report(served, seconds, results, prefix=''):
+    """Record the throughput, errors, latency and queries of served"""
+    _, samples, statuses, queries = zip(*served)
+    operations = [operation for operation, *_ in served]
+    results[f'{prefix}requests'] = len(served)
+    if seconds is not None:
+        results[f'{prefix}requests_per_second'] = round(
+            len(served) / seconds, 1)
+    results[f'{prefix}errors'] = sum(
+        status != STATUS.get(operation, 200)
+        for operation, status in zip(operations, statuses))
+    results[f'{prefix}queries_per_request'] = round(
+        sum(queries) / len(served), 2)
+    results.update(summarize(samples, prefix=prefix))
+
+
+def run(size=2000, repeat=None, concurrency=8, users=4, patterns=500,
+        tags=20, datastructures=5, seed=0, **options):
+    """Serve size requests of the MIX, concurrency at a time, against
+    users Users with patterns Patterns, tags Tags and datastructures
+    Datastructures each
+    """
+    libraries = [
+        Library(user) for user in seed_library(
+            users=users, patterns=patterns, tags=tags,
+            datastructures=datastructures, seed=seed)
+    ]
+    warmup = make_requests(libraries, len(MIX) * 5, seed=seed + 1)
+    requests = make_requests(libraries, size, seed=seed)
+
+    results = {
+        'concurrency': concurrency,
+        'users': users,
+        'patterns': patterns,
+        'tags': tags,
+        'datastructures': datastructures,
+    }
+    media_root = tempfile.mkdtemp()
+    try:
+        with override_settings(MEDIA_ROOT=media_root):
+            serve(warmup, concurrency)
+            with stopwatch() as total:
+                served = serve(requests, concurrency)
+            shutdown_executor()
+    finally:
+        shutil.rmtree(media_root)
+
+    report(served, total['seconds'], results)
+    for operation in MIX:
+        subset = [request for request in served if request[0] == operation]
+        if subset:
+            report(subset, None, results, prefix=f'{operation}_')
+
+    return results
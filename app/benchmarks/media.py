@@ -0,0 +1,66 @@
+"""
+Media serving latency for whole files, byte ranges, revalidation and
+sendfile offload
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from benchmarks.utils import stopwatch, summarize
+
+
+def fetch(client, url, repeat, **headers):
+    """GET url repeat times, draining the body; return latency samples"""
+    samples = []
+    for _ in range(repeat):
+        with stopwatch() as timing:
+            response = client.get(url, **headers)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+        samples.append(timing['seconds'])
+    return samples, response
+
+
+def run(size=4096, repeat=50, **options):
+    """Serve a size KiB content-addressed file every way MediaView can"""
+    media_root = tempfile.mkdtemp()
+    name = f'uploads/pattern/ab/{"ab" * 32}.jpg'
+    path = os.path.join(media_root, name)
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size * 1024))
+
+    client = Client()
+    url = reverse('media', args=[name])
+    results = {'file_kib': size}
+    try:
+        with override_settings(MEDIA_ROOT=media_root):
+            samples, response = fetch(client, url, repeat)
+            results.update(summarize(samples, prefix='full_'))
+            etag = response['ETag']
+
+            samples, response = fetch(
+                client, url, repeat, HTTP_RANGE='bytes=0-65535')
+            results.update(summarize(samples, prefix='range_64k_'))
+            results['range_status'] = response.status_code
+
+            samples, response = fetch(
+                client, url, repeat, HTTP_IF_NONE_MATCH=etag)
+            results.update(summarize(samples, prefix='revalidate_'))
+            results['revalidate_status'] = response.status_code
+
+            with override_settings(MEDIA_SERVING=dict(
+                    settings.MEDIA_SERVING, SENDFILE='x-accel-redirect')):
+                samples, response = fetch(client, url, repeat)
+            results.update(summarize(samples, prefix='offload_'))
+            results['cache_control'] = response['Cache-Control']
+    finally:
+        shutil.rmtree(media_root)
+
+    return results
@@ -0,0 +1,57 @@
+"""
+Full-text search latency as a User's library grows
+"""
+from django.conf import settings
+from django.db import connection
+
+from benchmarks.utils import (
+    VOCABULARY,
+    seed_library,
+    stopwatch,
+    summarize,
+    view_queryset,
+)
+from pattern.views import PatternViewSet
+
+
+QUERIES = {
+    'word': VOCABULARY[0],
+    'phrase': f'"{VOCABULARY[1]} {VOCABULARY[2]}"',
+    'either': f'{VOCABULARY[3]} or {VOCABULARY[4]}',
+    'common': 'pattern',
+}
+
+
+def flush_pending_index():
+    """Merge freshly seeded rows into the GIN index as autovacuum would.
+
+    Until then they sit in the index's unsorted pending list, which every
+    search scans in full.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT gin_clean_pending_list('pattern_search_vector_idx')")
+        cursor.execute('ANALYZE core_pattern')
+
+
+def run(size=10000, repeat=30, **options):
+    """Search libraries of size and 4 * size Patterns for each query"""
+    limit = settings.PATTERN_PAGE_SIZE + 1
+    results = {}
+    for label, count in (('small', size), ('large', size * 4)):
+        user = seed_library(users=1, patterns=count, tags=10, links=1)[0]
+        flush_pending_index()
+        results[f'{label}_patterns'] = count
+        for name, terms in QUERIES.items():
+            page = view_queryset(
+                PatternViewSet, user, {'search': terms}
+            ).prefetch_related(None)[:limit]
+            samples = []
+            for _ in range(repeat):
+                with stopwatch() as timing:
+                    rows = len(list(page.all()))
+                samples.append(timing['seconds'])
+            results[f'{label}_{name}_rows'] = rows
+            results.update(summarize(samples, prefix=f'{label}_{name}_'))
+
+    return results
@@ -0,0 +1,60 @@
+"""
+Latency of tag filtered Pattern pages with DISTINCT joins and with EXISTS
+"""
+from django.conf import settings
+
+from benchmarks.utils import (
+    seed_library,
+    stopwatch,
+    summarize,
+    view_queryset,
+)
+from core.models import Pattern
+from pattern.views import PatternViewSet
+
+
+def legacy_queryset(user, tag_ids):
+    """The join and DISTINCT the list view used before EXISTS filters"""
+    return Pattern.objects.filter(
+        tags__id__in=tag_ids, user=user).order_by('-id').distinct()
+
+
+def measure(queryset, repeat):
+    """Return (first page ids, latency samples) for repeat page loads"""
+    page = queryset.prefetch_related(None)[:settings.PATTERN_PAGE_SIZE + 1]
+    samples = []
+    for _ in range(repeat):
+        with stopwatch() as timing:
+            ids = [pattern.id for pattern in page.all()]
+        samples.append(timing['seconds'])
+    return ids, samples
+
+
+def run(size=20000, repeat=50, users=5, wide=10, **options):
+    """Filter one of users libraries of size Patterns by wide Tags.
+
+    'any' is compared with the DISTINCT join it replaced, and checked to
+    return the same page; 'all' narrows the same filter to two Tags.
+    """
+    user = seed_library(users=users, patterns=size, tags=50, links=5)[0]
+    tag_ids = list(
+        user.tag_set.order_by('id').values_list('id', flat=True)[:wide])
+    params = ','.join(str(pk) for pk in tag_ids)
+
+    querysets = {
+        'distinct_any': legacy_queryset(user, tag_ids),
+        'exists_any': view_queryset(
+            PatternViewSet, user, {'tags': params, 'match': 'any'}),
+        'exists_all': view_queryset(
+            PatternViewSet, user,
+            {'tags': f'{tag_ids[0]},{tag_ids[1]}', 'match': 'all'}),
+    }
+    results = {'patterns_per_user': size, 'tags_filtered': len(tag_ids)}
+    pages = {}
+    for label, queryset in querysets.items():
+        pages[label], samples = measure(queryset, repeat)
+        results[f'{label}_rows'] = len(pages[label])
+        results.update(summarize(samples, prefix=f'{label}_'))
+
+    results['any_pages_match'] = pages['distinct_any'] == pages['exists_any']
+    return results
@@ -0,0 +1,216 @@
+"""
+Smoke tests for the benchmark scenarios
+"""
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.migrations.recorder import MigrationRecorder
+from django.test import TestCase, SimpleTestCase, TransactionTestCase
+
+from benchmarks import (
+    assigned_tags,
+    autocomplete,
+    bulk_import,
+    compression,
+    concurrency,
+    export,
+    fieldsets,
+    image_gc,
+    indexes,
+    instrumentation,
+    json_backends,
+    list_rows,
+    load,
+    media,
+    search,
+    tag_filters,
+    thumbnails,
+    token_auth,
+)
+from core.management.commands.benchmark import change, parse_option
+
+
+class BenchmarkCommandTests(SimpleTestCase):
+
+    def test_unknown_scenario(self):
+        """Test - Unknown scenarios are rejected before touching the db"""
+        with self.assertRaises(CommandError):
+            call_command('benchmark', 'no_such_scenario')
+
+    def test_malformed_option(self):
+        """Test - Scenario options must be given as name=value"""
+        with self.assertRaises(CommandError):
+            call_command('benchmark', 'load', option=['users'])
+
+    def test_parse_option(self):
+        """Test - Option values are read as JSON, else kept as text"""
+        self.assertEqual(parse_option('users=20'), ('users', 20))
+        self.assertEqual(parse_option('mode=fast'), ('mode', 'fast'))
+
+    def test_change(self):
+        """Test - Numeric results are compared with the baseline's"""
+        self.assertEqual(change(11, 10), ' (baseline 10, +10.0%)')
+        self.assertEqual(change(9.0, 10), ' (baseline 10, -10.0%)')
+        self.assertEqual(change(True, False), '')
+        self.assertEqual(change(1, None), '')
+
+
+class ScenarioTests(TestCase):
+
+    def test_assigned_tags(self):
+        """Test - EXISTS and counted Tag pages agree with the old queries"""
+        result = assigned_tags.run(size=20, repeat=1)
+
+        self.assertTrue(result['assigned_pages_match'])
+        self.assertTrue(result['counts_match'])
+
+    def test_autocomplete(self):
+        """Test - Cached autocomplete repeats skip the Tag query"""
+        result = autocomplete.run(size=50, repeat=2)
+
+        self.assertEqual(result['uncached_queries_per_request'], 2)
+        self.assertEqual(result['cached_queries_per_request'], 1)
+
+    def test_bulk_import(self):
+        """Test - Bulk import scenario imports every row"""
+        result = bulk_import.run(size=5)
+
+        self.assertEqual(result['imported'], 5)
+        self.assertLess(
+            result['bulk_import_queries'], result['single_post_queries'])
+
+    def test_compression(self):
+        """Test - Compression scenario shrinks the exports"""
+        result = compression.run(size=20, repeat=1)
+
+        self.assertLess(
+            result['export_jsonl_gzip6_kib'],
+            result['export_jsonl_identity_kib'])
+        self.assertIn('list_gzip6_cpu_ms', result)
+
+    def test_export(self):
+        """Test - Export scenario streams every seeded Pattern"""
+        result = export.run(size=3)
+
+        self.assertEqual(result['jsonl_large_patterns'], 12)
+        self.assertGreater(result['csv_large_body_kib'], 0)
+
+    def test_fieldsets(self):
+        """Test - Sparser fieldsets make smaller payloads"""
+        result = fieldsets.run(size=5, repeat=1)
+
+        self.assertLess(
+            result['compact_payload_bytes'], result['full_payload_bytes'])
+        self.assertLess(
+            result['title_payload_bytes'], result['compact_payload_bytes'])
+
+    def test_image_gc(self):
+        """Test - GC deletes the unreferenced half and dedupes uploads"""
+        result = image_gc.run(size=10, shared=3, batch_size=4)
+
+        self.assertEqual(result['identical_files_stored'], 1)
+        self.assertEqual(result['files_deleted'], 5)
+        self.assertEqual(result['files_kept'], 6)
+
+    def test_indexes(self):
+        """Test - Index scenario times and explains every list query"""
+        result = indexes.run(size=20, repeat=1, users=2)
+
+        self.assertEqual(result['patterns_total'], 40)
+        self.assertIn('Limit', result['after_patterns_first_page_plan'])
+        self.assertIn('before_tags_assigned_only_p50_ms', result)
+        self.assertIn('after_tags_assigned_only_p50_ms', result)
+
+    def test_indexes_restored(self):
+        """Test - Comparing restores the indexes and leaves migrations be"""
+        recorder = MigrationRecorder(connection)
+        applied = set(recorder.applied_migrations())
+
+        indexes.run(size=5, repeat=1, users=1)
+
+        self.assertEqual(set(recorder.applied_migrations()), applied)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT indexname FROM pg_indexes WHERE indexname IN %s',
+                [indexes.INDEXES])
+            self.assertEqual(len(cursor.fetchall()), len(indexes.INDEXES))
+
+    def test_instrumentation(self):
+        """Test - Instrumentation scenario times views both ways"""
+        result = instrumentation.run(size=5, repeat=2)
+
+        self.assertIn('overhead_uncached_patterns_p50_ms', result)
+        self.assertGreater(result['metrics_exposition_kib'], 0)
+
+    def test_json_backends(self):
+        """Test - JSON scenario renders and parses with every backend"""
+        result = json_backends.run(size=5, repeat=1)
+
+        for backend in json_backends.backends():
+            self.assertIn(f'{backend}_render_p50_ms', result)
+            self.assertIn(f'{backend}_parse_p50_ms', result)
+
+    def test_list_rows(self):
+        """Test - Row listings match the serializer's byte for byte"""
+        result = list_rows.run(size=5, repeat=1)
+
+        self.assertTrue(result['identical'])
+        self.assertIn('request_speedup', result)
+
+    def test_media(self):
+        """Test - Media scenario serves ranges and revalidates"""
+        result = media.run(size=128, repeat=2)
+
+        self.assertEqual(result['range_status'], 206)
+        self.assertEqual(result['revalidate_status'], 304)
+        self.assertIn('immutable', result['cache_control'])
+
+    def test_search(self):
+        """Test - Search scenario finds Patterns in both libraries"""
+        result = search.run(size=5, repeat=1)
+
+        self.assertEqual(result['small_common_rows'], 5)
+        self.assertEqual(result['large_common_rows'], 20)
+
+    def test_tag_filters(self):
+        """Test - EXISTS tag filters return the same page as DISTINCT"""
+        result = tag_filters.run(size=30, repeat=1, users=1)
+
+        self.assertTrue(result['any_pages_match'])
+        self.assertGreater(result['exists_any_rows'], 0)
+
+    def test_thumbnails(self):
+        """Test - Thumbnail scenario uploads in every mode"""
+        result = thumbnails.run(size=1, width=40, height=30)
+
+        for mode in ('off', 'inline', 'background'):
+            self.assertIn(f'{mode}_upload_p50_ms', result)
+
+    def test_token_auth(self):
+        """Test - Cached token auth avoids the per-request lookup"""
+        result = token_auth.run(repeat=3)
+
+        self.assertEqual(result['uncached_queries_per_request'], 1)
+        self.assertEqual(result['cached_queries_per_request'], 0)
+
+
+class ConcurrencyScenarioTests(TransactionTestCase):
+    """Test - Concurrent requests see committed data from other threads"""
+
+    def test_concurrency(self):
+        """Test - Every deployment answers every request"""
+        result = concurrency.run(size=8, concurrency=4, users=2, patterns=2)
+
+        for cache in ('cached', 'uncached'):
+            for deployment in ('wsgi', 'asgi_shared_thread', 'asgi_sync',
+                               'asgi_async'):
+                self.assertEqual(
+                    result[f'{cache}_{deployment}_errors'], 0, deployment)
+
+    def test_load(self):
+        """Test - Load scenario serves every operation without errors"""
+        result = load.run(size=40, concurrency=4, users=2, patterns=3)
+
+        self.assertEqual(result['errors'], 0)
+        for operation in load.MIX:
+            self.assertIn(f'{operation}_p95_ms', result)
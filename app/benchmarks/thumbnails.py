@@ -0,0 +1,81 @@
+"""
+Image upload latency with thumbnails off, generated inline and generated
+on the background pool
+"""
+import io
+import shutil
+import tempfile
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from benchmarks.utils import (
+    authenticated_client,
+    create_user,
+    stopwatch,
+    summarize,
+)
+from core.models import Pattern
+from pattern.thumbnails import shutdown_executor
+
+
+def photo(width, height):
+    """Return a noisy JPEG, which costs about as much to decode as a photo"""
+    output = io.BytesIO()
+    Image.effect_noise((width, height), 64).convert('RGB').save(
+        output, 'JPEG', quality=90)
+    return output.getvalue()
+
+
+def upload_all(client, patterns, content):
+    """Upload content to every Pattern and return the latency samples"""
+    samples = []
+    for pattern in patterns:
+        url = reverse('pattern:pattern-upload-image', args=[pattern.id])
+        upload = ContentFile(content, name='photo.jpg')
+        with stopwatch() as timing:
+            client.post(url, {'image': upload}, format='multipart')
+        samples.append(timing['seconds'])
+    return samples
+
+
+def run(size=20, repeat=None, width=3000, height=2000, **options):
+    """Upload size width x height photos in each mode"""
+    content = photo(width, height)
+    user = create_user()
+    client = authenticated_client(user)
+    modes = {
+        'off': {'FORMATS': []},
+        'inline': {'SYNC': True},
+        'background': {'SYNC': False},
+    }
+
+    results = {'upload_kib': round(len(content) / 1024, 1)}
+    media_root = tempfile.mkdtemp()
+    try:
+        for mode, config in modes.items():
+            patterns = [
+                Pattern.objects.create(user=user, title=f'{mode} {i}')
+                for i in range(size)
+            ]
+            with override_settings(
+                    MEDIA_ROOT=media_root,
+                    PATTERN_THUMBNAILS=dict(
+                        settings.PATTERN_THUMBNAILS, **config)):
+                with stopwatch() as total:
+                    samples = upload_all(client, patterns, content)
+                    shutdown_executor()
+            results.update(summarize(samples, prefix=f'{mode}_upload_'))
+            results[f'{mode}_until_done_seconds'] = round(
+                total['seconds'], 3)
+            results[f'{mode}_with_thumbnails'] = Pattern.objects.filter(
+                pk__in=[pattern.pk for pattern in patterns],
+            ).exclude(thumbnails={}).count()
+    finally:
+        shutil.rmtree(media_root)
+
+    return results
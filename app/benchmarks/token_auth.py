@@ -0,0 +1,56 @@
+"""
+Auth queries and latency per request with and without the token cache
+"""
+from unittest.mock import patch
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from benchmarks.utils import (
+    create_user,
+    stopwatch,
+    summarize,
+)
+from user.authentication import CachedTokenAuthentication
+from user.views import ManageUserView
+
+
+def measure(client, url, repeat):
+    """Return (queries per request, latency samples) for repeat GETs"""
+    samples = []
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(repeat):
+            with stopwatch() as timing:
+                client.get(url)
+            samples.append(timing['seconds'])
+    return len(queries) / repeat, samples
+
+
+def run(repeat=500, **options):
+    """GET /api/user/me/ repeat times with each authentication class"""
+    url = reverse('user:me')
+    token = Token.objects.create(user=create_user())
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    results = {}
+    for label, auth_class in (
+        ('uncached', TokenAuthentication),
+        ('cached', CachedTokenAuthentication),
+    ):
+        with patch.object(
+                ManageUserView, 'authentication_classes', [auth_class]), \
+                override_settings(TOKEN_AUTH_CACHE=dict(
+                    settings.TOKEN_AUTH_CACHE, BACKEND='local')):
+            client.get(url)
+            per_request, samples = measure(client, url, repeat)
+        results[f'{label}_queries_per_request'] = per_request
+        results.update(summarize(samples, prefix=f'{label}_'))
+
+    return results
@@ -0,0 +1,179 @@
+"""
+Helpers shared by the benchmark scenarios
+"""
+import random
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Datastructure, Pattern, Tag
+from pattern.search import update_search_vectors
+from pattern.serializers import PatternSerializer
+
+
+VOCABULARY = [f'term{i}' for i in range(1000)]
+
+
+@contextmanager
+def disposable_database(keepdb=False, verbosity=0):
+    """Run the block against a throwaway copy of the configured database"""
+    setup_test_environment()
+    old_config = setup_databases(
+        verbosity, interactive=False, keepdb=keepdb, aliases={'default'})
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity, keepdb=keepdb)
+        teardown_test_environment()
+
+
+@contextmanager
+def stopwatch():
+    """Yield a dict whose 'seconds' is filled in when the block exits"""
+    timing = {}
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing['seconds'] = time.perf_counter() - start
+
+
+def summarize(samples, prefix=''):
+    """Return latency percentiles in milliseconds for timing samples"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    return {
+        f'{prefix}p50_ms': round(pick(0.50) * 1000, 3),
+        f'{prefix}p95_ms': round(pick(0.95) * 1000, 3),
+        f'{prefix}p99_ms': round(pick(0.99) * 1000, 3),
+        f'{prefix}mean_ms': round(statistics.mean(ordered) * 1000, 3),
+    }
+
+
+def create_user(**params):
+    """Create and return a User with a unique email"""
+    defaults = {
+        'email': f'bench-{uuid.uuid4().hex}@example.com',
+        'password': 'benchpass123',
+    }
+    defaults.update(params)
+    return get_user_model().objects.create_user(**defaults)
+
+
+def authenticated_client(user):
+    """Return an APIClient authenticated as user"""
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def make_pattern_rows(size):
+    """Return synthetic Pattern payloads sharing a small pool of names"""
+    return [
+        {
+            'title': f'Pattern {i}',
+            'description': f'Synthetic pattern number {i}',
+            'link': f'https://example.com/{i}',
+            'tags': [{'name': f'Tag {i % 20}'}, {'name': f'Tag {i % 7}'}],
+            'datastructures': [{'name': f'DS {i % 5}'}],
+        }
+        for i in range(size)
+    ]
+
+
+def seed_patterns(user, size):
+    """Bulk create size synthetic Patterns for user"""
+    rows = [dict(row, user=user) for row in make_pattern_rows(size)]
+    return PatternSerializer(many=True).create(rows)
+
+
+def seed_library(users=10, patterns=1000, tags=50, datastructures=10,
+                 links=3, batch_size=5000, seed=0):
+    """Bulk insert a synthetic library for each of users new Users.
+
+    Every User gets patterns Patterns, each linked to links of their tags
+    Tags and one of their datastructures Datastructures. Titles and
+    descriptions mix in words drawn from VOCABULARY, so each word is found
+    in a small, size-proportional share of Patterns by search. Rows go
+    straight through bulk_create, so this scales to millions of rows.
+    Returns the Users in creation order.
+    """
+    rng = random.Random(seed)
+    TagLink = Pattern.tags.through
+    DatastructureLink = Pattern.datastructures.through
+    created = []
+    for _ in range(users):
+        user = create_user()
+        user_tags = Tag.objects.bulk_create(
+            Tag(user=user, name=f'Tag {i}') for i in range(tags))
+        user_datastructures = Datastructure.objects.bulk_create(
+            Datastructure(user=user, name=f'DS {i}')
+            for i in range(datastructures))
+        user_patterns = Pattern.objects.bulk_create(
+            (
+                Pattern(
+                    user=user,
+                    title=f'Pattern {i} ' + ' '.join(
+                        rng.sample(VOCABULARY, 2)),
+                    description=f'Synthetic pattern number {i} ' + ' '.join(
+                        rng.sample(VOCABULARY, 8)),
+                    link=f'https://example.com/{i}',
+                )
+                for i in range(patterns)
+            ),
+            batch_size=batch_size,
+        )
+        update_search_vectors(Pattern.objects.filter(user=user))
+        TagLink.objects.bulk_create(
+            (
+                TagLink(pattern_id=pattern.id, tag_id=tag.id)
+                for pattern in user_patterns
+                for tag in rng.sample(user_tags, min(links, len(user_tags)))
+            ),
+            batch_size=batch_size,
+        )
+        if user_datastructures:
+            DatastructureLink.objects.bulk_create(
+                (
+                    DatastructureLink(
+                        pattern_id=pattern.id,
+                        datastructure_id=rng.choice(user_datastructures).id,
+                    )
+                    for pattern in user_patterns
+                ),
+                batch_size=batch_size,
+            )
+        created.append(user)
+
+    return created
+
+
+def make_view(viewset_class, user, params=None, action='list'):
+    """Return a viewset_class view handling user's GET with params"""
+    request = Request(APIRequestFactory().get('/', params or {}))
+    request.user = user
+    return viewset_class(
+        request=request, action=action, args=(), kwargs={},
+        format_kwarg=None)
+
+
+def view_queryset(viewset_class, user, params=None, action='list'):
+    """Return the queryset viewset_class builds for user's request"""
+    return make_view(viewset_class, user, params, action).get_queryset()
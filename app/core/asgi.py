@@ -0,0 +1,74 @@
+"""
+ASGI handler sending streaming responses from the request's sync thread
+"""
+from asgiref.sync import sync_to_async
+
+from django.core.handlers.asgi import ASGIHandler
+
+
+# Bytes of a streaming response read per hop to the request's sync thread
+STREAM_BATCH_SIZE = 64 * 1024
+
+
+def read_parts(iterator, size):
+    """Return the next parts of iterator, about size bytes of them.
+
+    An empty list means the iterator is exhausted.
+    """
+    parts = []
+    total = 0
+    for part in iterator:
+        parts.append(part)
+        total += len(part)
+        if total >= size:
+            break
+
+    return parts
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """ASGIHandler iterating streaming responses off the event loop.
+
+    Django 3.2 iterates them on the event loop itself, where the queries
+    of a streamed export raise SynchronousOnlyOperation once the headers
+    have gone out. Parts are read here in batches on the request's sync
+    thread, the one its view ran on, so a server-side cursor the view
+    opened keeps its connection.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        response_headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            response_headers.append((bytes(header), bytes(value)))
+        for c in response.cookies.values():
+            response_headers.append(
+                (b'Set-Cookie', c.output(header='').encode('ascii').strip())
+            )
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response_headers,
+        })
+
+        iterator = iter(response)
+        read = sync_to_async(read_parts, thread_sensitive=True)
+        while True:
+            parts = await read(iterator, STREAM_BATCH_SIZE)
+            if not parts:
+                break
+            for part in parts:
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
@@ -0,0 +1,157 @@
+"""
+Async adapters for read-heavy DRF views.
+
+Django 3.2 runs async views natively under ASGI but has no async ORM, and
+DRF views are synchronous. async_api_view() wraps a DRF view so that GETs
+the view can answer without I/O, such as cached responses and 304s, are
+answered on the event loop. Everything else runs the unchanged DRF view
+through sync_to_async, the ORM-safe path, and so returns the same response
+the view would under WSGI.
+
+A view opts in by defining get_fast_response(request, *args, **kwargs),
+which is called once the request has been authenticated from the token
+cache and has passed the permission checks. It returns a Response or None
+if it would need the database.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+
+from django.core.exceptions import SynchronousOnlyOperation
+from django.http import HttpResponse
+from django.urls import URLPattern, URLResolver
+
+from rest_framework.exceptions import APIException
+
+from core.middleware import serializing
+
+
+FAST_METHODS = ('GET', 'HEAD')
+
+
+def _detach(response):
+    """Copy a rendered response into a plain HttpResponse.
+
+    Django renders anything with a render() method on a worker thread, even
+    when it is already rendered, so only plain responses stay on the loop.
+    """
+    if response.streaming:
+        return response
+
+    plain = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        plain[header] = value
+    plain.cookies = response.cookies
+    return plain
+
+
+def _respond(view, request, args, kwargs):
+    """Run the sync view and render its response"""
+    response = view(request, *args, **kwargs)
+    if callable(getattr(response, 'render', None)):
+        with serializing():
+            response.render()
+    return _detach(response)
+
+
+def _respond_inline(view, request, args, kwargs):
+    """Return view's response if it can be made without I/O, else None.
+
+    Mirrors the setup DRF's as_view() and dispatch() do, with the User
+    taken from the token cache and get_fast_response() as the handler.
+    """
+    cls = view.cls
+    if not hasattr(cls, 'get_fast_response'):
+        return None
+
+    self = cls(**view.initkwargs)
+    actions = getattr(view, 'actions', None)
+    if actions is None:
+        self.setup(request, *args, **kwargs)
+    else:
+        if 'get' in actions and 'head' not in actions:
+            actions['head'] = actions['get']
+        self.action_map = actions
+        for method, action in actions.items():
+            setattr(self, method, getattr(self, action))
+        self.request = request
+        self.args = args
+        self.kwargs = kwargs
+
+    try:
+        drf_request = self.initialize_request(request, *args, **kwargs)
+        self.request = drf_request
+        self.headers = self.default_response_headers
+
+        authenticators = drf_request.authenticators
+        if not authenticators or not hasattr(
+                authenticators[0], 'authenticate_from_cache'):
+            return None
+        user_auth = authenticators[0].authenticate_from_cache(drf_request)
+        if user_auth is None:
+            return None
+        drf_request._authenticator = authenticators[0]
+        drf_request.user, drf_request.auth = user_auth
+
+        self.initial(drf_request, *args, **kwargs)
+        if drf_request.accepted_renderer.format != 'json':
+            return None
+
+        response = self.get_fast_response(drf_request, *args, **kwargs)
+        if response is None:
+            return None
+
+        response = self.finalize_response(
+            drf_request, response, *args, **kwargs)
+        with serializing():
+            response.render()
+    except (APIException, SynchronousOnlyOperation):
+        # Let the sync view produce the error, or make the query
+        return None
+
+    return _detach(response)
+
+
+def async_api_view(view):
+    """Return an async view serving the DRF view view"""
+    respond = sync_to_async(_respond, thread_sensitive=True)
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method in FAST_METHODS:
+            response = _respond_inline(view, request, args, kwargs)
+            if response is not None:
+                return response
+        return await respond(view, request, args, kwargs)
+
+    return async_view
+
+
+def async_urls(patterns, names, namespace=''):
+    """Return patterns with the views of the given URL names made async.
+
+    names are qualified by namespace, e.g. 'pattern:pattern-list'.
+    """
+    result = []
+    for entry in patterns:
+        if isinstance(entry, URLResolver):
+            prefix = f'{namespace}{entry.namespace}:' if entry.namespace \
+                else namespace
+            entry = URLResolver(
+                entry.pattern,
+                async_urls(entry.url_patterns, names, prefix),
+                entry.default_kwargs,
+                entry.app_name,
+                entry.namespace,
+            )
+        elif isinstance(entry, URLPattern) and \
+                f'{namespace}{entry.name}' in names:
+            entry = URLPattern(
+                entry.pattern,
+                async_api_view(entry.callback),
+                entry.default_args,
+                entry.name,
+            )
+        result.append(entry)
+
+    return result
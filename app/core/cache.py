@@ -0,0 +1,111 @@
+"""
+Small key/value caches shared by the API's caching layers
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+
+class LocalCache:
+    """Bounded in-process cache with per-entry expiry and LRU eviction"""
+    in_process = True
+
+    def __init__(self, timeout=60, max_entries=1000, **kwargs):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DjangoCache:
+    """Adapter storing entries in a Django cache framework backend"""
+    in_process = False
+
+    def __init__(self, alias='default', timeout=60, key_prefix='', **kwargs):
+        self.cache = caches[alias]
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    def _key(self, key):
+        return f'{self.key_prefix}{key}'
+
+    def get(self, key, default=None):
+        return self.cache.get(self._key(key), default)
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        self.cache.set(self._key(key), value, timeout)
+
+    def delete(self, key):
+        self.cache.delete(self._key(key))
+
+    def delete_many(self, keys):
+        self.cache.delete_many([self._key(key) for key in keys])
+
+    def clear(self):
+        """Clear the whole Django cache, not just this prefix"""
+        self.cache.clear()
+
+
+BACKENDS = {
+    'local': LocalCache,
+    'django': DjangoCache,
+}
+
+
+def build_cache(config, key_prefix=''):
+    """Return a cache described by a settings dict, or None if disabled.
+
+    config holds 'BACKEND' ('local', 'django' or None), 'TIMEOUT',
+    'MAX_ENTRIES' for the local backend and 'ALIAS' for the Django one.
+    """
+    backend = config.get('BACKEND')
+    if not backend:
+        return None
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown cache backend {backend!r}')
+
+    return BACKENDS[backend](
+        timeout=config.get('TIMEOUT', 60),
+        max_entries=config.get('MAX_ENTRIES', 1000),
+        alias=config.get('ALIAS', 'default'),
+        key_prefix=key_prefix,
+    )
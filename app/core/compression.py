@@ -0,0 +1,97 @@
+"""
+Content-coding negotiation and gzip and brotli encoders for responses.
+
+Brotli is offered when the brotli package is installed.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class GzipEncoder:
+    """Incremental gzip encoder, with a zero mtime for stable output"""
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    """Incremental brotli encoder"""
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+ENCODERS = {'gzip': GzipEncoder}
+if brotli is not None:
+    ENCODERS['br'] = BrotliEncoder
+
+
+def parse_accept_encoding(header):
+    """Return {coding: q} for an Accept-Encoding header"""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(header, encodings):
+    """Return the coding of encodings to use for an Accept-Encoding header.
+
+    The client's preference wins, then the order of encodings; None means
+    the response is sent as is.
+    """
+    accepted = parse_accept_encoding(header)
+    if 'x-gzip' in accepted:
+        accepted.setdefault('gzip', accepted['x-gzip'])
+    chosen, best = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best:
+            chosen, best = encoding, q
+    return chosen
+
+
+def compress(encoder, content):
+    """Return content compressed in one go"""
+    return encoder.compress(content) + encoder.finish()
+
+
+def compress_stream(encoder, chunks):
+    """Yield chunks compressed as they arrive.
+
+    Nothing is flushed early, so output comes out whenever the encoder
+    has filled a block and memory stays bounded by its window.
+    """
+    for chunk in chunks:
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
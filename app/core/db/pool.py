@@ -0,0 +1,146 @@
+"""
+In-process pool of DB-API connections
+"""
+import collections
+import threading
+import time
+
+
+class PoolExhausted(Exception):
+    """No connection became available within the pool's limits"""
+
+
+class ConnectionPool:
+    """Thread-safe pool handing out connections made by connect().
+
+    At most max_size connections are kept open. When all of them are in
+    use, the overflow policy decides what acquire() does: 'block' waits up
+    to timeout seconds for a release, 'grow' opens an extra connection that
+    is closed again on release, and 'error' raises PoolExhausted at once.
+
+    Idle connections are checked before reuse: closed or mid-transaction
+    connections are discarded, and connections idle for longer than
+    ping_after seconds must also pass the ping() check.
+    """
+    OVERFLOW_POLICIES = ('block', 'grow', 'error')
+
+    def __init__(self, connect, max_size=10, overflow='block', timeout=30,
+                 ping_after=30, is_usable=None, ping=None):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy {overflow!r}')
+        self._connect = connect
+        self.max_size = max_size
+        self.overflow = overflow
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._is_usable = is_usable or (lambda conn: True)
+        self._ping = ping or (lambda conn: True)
+        self._idle = collections.deque()
+        self._open = 0
+        self._cond = threading.Condition()
+        self._counters = collections.Counter()
+
+    def _count(self, name):
+        with self._cond:
+            self._counters[name] += 1
+
+    def _create(self):
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        self._count('created')
+        return conn
+
+    def _healthy(self, conn, idle_since):
+        try:
+            if not self._is_usable(conn):
+                return False
+            if time.monotonic() - idle_since >= self.ping_after:
+                return self._ping(conn)
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._open -= 1
+            self._counters['closed'] += 1
+            self._cond.notify()
+
+    def acquire(self):
+        """Return an open connection, reusing an idle one if possible"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._open >= self.max_size:
+                    if self.overflow == 'grow':
+                        self._counters['overflow'] += 1
+                        break
+                    if self.overflow == 'error':
+                        self._counters['exhausted'] += 1
+                        raise PoolExhausted(
+                            f'All {self.max_size} connections are in use')
+                    remaining = deadline - time.monotonic()
+                    self._counters['waits'] += 1
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        if not self._idle and self._open >= self.max_size:
+                            self._counters['exhausted'] += 1
+                            raise PoolExhausted(
+                                f'Timed out after {self.timeout}s waiting '
+                                f'for one of {self.max_size} connections')
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                else:
+                    conn, idle_since = None, None
+                    self._open += 1
+
+            if conn is None:
+                conn = self._create()
+            elif self._healthy(conn, idle_since):
+                self._count('reused')
+            else:
+                self._count('health_check_failures')
+                self._discard(conn)
+                continue
+            self._count('checkouts')
+            return conn
+
+    def release(self, conn, reusable=True):
+        """Return a connection, closing it if unusable or overflowing"""
+        with self._cond:
+            keep = reusable and self._open <= self.max_size
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+                self._counters['releases'] += 1
+                self._cond.notify()
+        if not keep:
+            self._discard(conn)
+
+    def close(self):
+        """Close every idle connection"""
+        with self._cond:
+            idle, self._idle = list(self._idle), collections.deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """Return connection counters and current occupancy"""
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update(
+                max_size=self.max_size,
+                open=self._open,
+                idle=len(self._idle),
+                in_use=self._open - len(self._idle),
+            )
+        for key in ('created', 'reused', 'checkouts', 'closed'):
+            stats.setdefault(key, 0)
+        return stats
@@ -0,0 +1,100 @@
+"""
+PostgreSQL backend that borrows connections from an in-process pool.
+
+Enable it with ENGINE 'core.db.postgresql' and size the pool with the
+database's POOL settings: MAX_SIZE, OVERFLOW ('block', 'grow' or
+'error'), TIMEOUT and PING_AFTER (seconds idle before a liveness query).
+"""
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.pool import ConnectionPool
+from core.db.postgresql.creation import DatabaseCreation
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _is_usable(conn):
+    """A pooled connection must be open and outside any transaction"""
+    return (
+        not conn.closed
+        and conn.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+    )
+
+
+def _ping(conn):
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    return True
+
+
+def get_pool(alias, key, connect, options):
+    """Return the pool for alias and connection key, creating it once"""
+    with _pools_lock:
+        pool = _pools.get((alias, key))
+        if pool is None:
+            pool = _pools[(alias, key)] = ConnectionPool(
+                connect,
+                max_size=options.get('MAX_SIZE', 10),
+                overflow=options.get('OVERFLOW', 'block'),
+                timeout=options.get('TIMEOUT', 30),
+                ping_after=options.get('PING_AFTER', 30),
+                is_usable=_is_usable,
+                ping=_ping,
+            )
+        return pool
+
+
+def pool_stats():
+    """Return {alias: stats} summed over every pool in this process"""
+    stats = {}
+    with _pools_lock:
+        pools = list(_pools.items())
+    for (alias, _), pool in pools:
+        totals = stats.setdefault(alias, {})
+        for name, value in pool.stats().items():
+            totals[name] = totals.get(name, 0) + value
+    return stats
+
+
+def close_pools():
+    """Close the idle connections of every pool in this process"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def _get_pool(self, conn_params):
+        key = tuple(sorted(
+            (name, repr(value)) for name, value in conn_params.items()))
+        return get_pool(
+            self.alias,
+            key,
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params),
+            self.settings_dict.get('POOL', {}),
+        )
+
+    def get_new_connection(self, conn_params):
+        self._pool = self._get_pool(conn_params)
+        connection = self._pool.acquire()
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                if not self.connection.closed and not _is_usable(
+                        self.connection):
+                    self.connection.rollback()
+                self._pool.release(
+                    self.connection, reusable=_is_usable(self.connection))
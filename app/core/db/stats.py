@@ -0,0 +1,71 @@
+"""
+Connection reuse counters for every configured database
+"""
+import collections
+import threading
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from core.metrics import REGISTRY
+
+
+_created = collections.Counter()
+_lock = threading.Lock()
+
+
+@receiver(connection_created)
+def _connection_created(sender, connection, **kwargs):
+    with _lock:
+        _created[connection.alias] += 1
+
+
+def connection_stats():
+    """Return per-alias connection counters for this process.
+
+    connections_opened counts every time Django set up a connection;
+    with a pool, pool.created is how many of those were new sockets.
+    """
+    from core.db.postgresql.base import pool_stats
+
+    pools = pool_stats()
+    with _lock:
+        created = dict(_created)
+    return {
+        alias: {
+            'conn_max_age': connections[alias].settings_dict['CONN_MAX_AGE'],
+            'connections_opened': created.get(alias, 0),
+            'pool': pools.get(alias),
+        }
+        for alias in connections
+    }
+
+
+POOL_GAUGES = ('max_size', 'open', 'idle', 'in_use')
+
+
+def connection_metrics():
+    """Return connection_stats() as Prometheus metric families"""
+    families = {}
+
+    def add(kind, name, documentation, alias, value):
+        families.setdefault(
+            name, (kind, name, documentation, []))[3].append(
+                ({'alias': alias}, value))
+
+    for alias, stats in connection_stats().items():
+        add('counter', 'db_connections_opened_total',
+            'Connections Django set up', alias, stats['connections_opened'])
+        for key, value in sorted((stats['pool'] or {}).items()):
+            if key in POOL_GAUGES:
+                add('gauge', f'db_pool_{key}',
+                    f'Pool connections: {key.replace("_", " ")}',
+                    alias, value)
+            else:
+                add('counter', f'db_pool_{key}_total',
+                    f'Pool events: {key.replace("_", " ")}', alias, value)
+    return list(families.values())
+
+
+REGISTRY.register_collector(connection_metrics)
@@ -0,0 +1,119 @@
+"""
+Model fields storing each distinct file once, named after its content
+"""
+import hashlib
+import posixpath
+
+from PIL import Image
+
+from django.db import models
+from django.db.models.fields.files import ImageFieldFile
+
+
+# Extensions files are stored with, by the format Pillow detects in them
+EXTENSIONS = {
+    'GIF': '.gif',
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'WEBP': '.webp',
+}
+
+
+def image_extension(content):
+    """Return the extension of the image format content is in.
+
+    The format comes from the header, never from the uploaded name; files
+    that are not an image in one of the EXTENSIONS get none.
+    """
+    image = getattr(content, 'image', None)
+    if image is None:
+        try:
+            image = Image.open(content)
+        except Exception:
+            return ''
+        finally:
+            content.seek(0)
+
+    return EXTENSIONS.get(image.format, '')
+
+
+def file_digest(content):
+    """Return the hex SHA-256 of a File's content"""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+
+    return digest.hexdigest()
+
+
+class ContentAddressedFieldFile(ImageFieldFile):
+    """ImageFieldFile whose name is the digest of its content.
+
+    Saving content that is already stored reuses the existing file, so
+    any number of rows may share one. Reused files are touched so that
+    garbage collection leaves them alone until the new reference commits.
+    """
+
+    def save(self, name, content, save=True):
+        ext = image_extension(content)
+        digest = file_digest(content)
+        name = self.field.generate_filename(
+            self.instance, posixpath.join(digest[:2], f'{digest}{ext}'))
+
+        if not self.storage.touch(name):
+            saved = self.storage.save(
+                name, content, max_length=self.field.max_length)
+            if saved != name:
+                # An identical file was published first; keep that one
+                self.storage.delete(saved)
+
+        self.name = name
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+    def delete(self, save=True):
+        """Detach the file, deleting it only if nothing else refers to it"""
+        if not self:
+            return
+
+        others = self.field.reference_counts(
+            [self.name], exclude=self.instance)
+        if others[self.name]:
+            if hasattr(self, '_file'):
+                self.close()
+                del self.file
+            self.name = None
+            setattr(self.instance, self.field.attname, self.name)
+            self._committed = False
+            if save:
+                self.instance.save()
+        else:
+            super().delete(save)
+
+    delete.alters_data = True
+
+
+class ContentAddressedImageField(models.ImageField):
+    """ImageField storing files under upload_to/<xx>/<sha256><ext>"""
+    attr_class = ContentAddressedFieldFile
+
+    def reference_counts(self, names, exclude=None):
+        """Return {name: number of rows referring to it} for names"""
+        rows = self.model._default_manager.filter(
+            **{f'{self.attname}__in': names})
+        if exclude is not None:
+            rows = rows.exclude(pk=exclude.pk)
+
+        counts = dict.fromkeys(names, 0)
+        counts.update(
+            rows.order_by()
+            .values_list(self.attname)
+            .annotate(count=models.Count('*'))
+        )
+        return counts
@@ -0,0 +1,129 @@
+"""
+Django cmd to run benchmark scenarios against a disposable database
+"""
+import datetime
+import importlib
+import json
+import pkgutil
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+import benchmarks
+from benchmarks.utils import disposable_database
+
+
+def available_scenarios():
+    """Return the names of the modules in the benchmarks package"""
+    return sorted(
+        module.name for module in pkgutil.iter_modules(benchmarks.__path__)
+        if not module.ispkg and module.name != 'utils'
+    )
+
+
+def parse_option(text):
+    """Return (name, value) for NAME=VALUE, reading VALUE as JSON if valid"""
+    name, sep, value = text.partition('=')
+    if not sep or not name.isidentifier():
+        raise CommandError(f'Options must look like name=value, not {text}')
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def current_commit():
+    """Return the checked out git commit, or None outside a git checkout"""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def change(value, baseline):
+    """Return e.g. ' (baseline 12.5, +4.0%)' comparing value to baseline"""
+    numbers = (int, float)
+    if not isinstance(value, numbers) or not isinstance(baseline, numbers) \
+            or isinstance(value, bool) or isinstance(baseline, bool):
+        return ''
+    if baseline == 0:
+        return f' (baseline {baseline})'
+    return f' (baseline {baseline}, {(value - baseline) / baseline:+.1%})'
+
+
+class Command(BaseCommand):
+    help = 'Run benchmark scenarios against a throwaway test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios', nargs='+', metavar='scenario',
+            help=f'One of: {", ".join(available_scenarios())}',
+        )
+        parser.add_argument(
+            '--size', type=int,
+            help='Scenario data size, e.g. number of patterns.',
+        )
+        parser.add_argument(
+            '--repeat', type=int,
+            help='Number of timed repetitions per measurement.',
+        )
+        parser.add_argument(
+            '--option', action='append', default=[], metavar='NAME=VALUE',
+            help='Pass another option to the scenarios, e.g. users=20.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results, commit and options to this file as '
+                 'JSON.',
+        )
+        parser.add_argument(
+            '--compare', metavar='BASELINE',
+            help='Show the change from the results in this --output file.',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Reuse the test database between runs.',
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['scenarios']) - set(available_scenarios())
+        if unknown:
+            raise CommandError(
+                f'Unknown scenario(s): {", ".join(sorted(unknown))}')
+
+        kwargs = {
+            key: options[key] for key in ('size', 'repeat')
+            if options[key] is not None
+        }
+        kwargs.update(parse_option(text) for text in options['option'])
+        baseline = {}
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['results']
+
+        results = {}
+        with disposable_database(keepdb=options['keepdb']):
+            for name in options['scenarios']:
+                module = importlib.import_module(f'benchmarks.{name}')
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                results[name] = module.run(**kwargs)
+                previous = baseline.get(name, {})
+                for metric, value in results[name].items():
+                    self.stdout.write(
+                        f'  {metric}: {value}'
+                        f'{change(value, previous.get(metric))}')
+
+        if options['output']:
+            report = {
+                'commit': current_commit(),
+                'created': datetime.datetime.now(
+                    datetime.timezone.utc).isoformat(timespec='seconds'),
+                'options': kwargs,
+                'results': results,
+            }
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
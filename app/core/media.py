@@ -0,0 +1,207 @@
+"""
+Serving of uploaded media files.
+
+Files are either handed to the front-end web server with X-Sendfile or
+X-Accel-Redirect, or streamed with a FileResponse, which WSGI servers
+providing wsgi.file_wrapper send with sendfile(2). Single byte ranges
+and conditional requests are answered here, and content-addressed names
+are cached as immutable.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views import View
+
+
+# A path component named after a SHA-256 digest, e.g. an image stored by
+# core.fields.ContentAddressedImageField or the directory of its thumbnails
+CONTENT_ADDRESSED = re.compile(r'(?:^|/)[0-9a-f]{64}(?:\.[^/]*)?(?:/|$)')
+
+# Types browsers may render in place; anything else is downloaded, so a
+# stored file can never run as a page on the API's origin
+INLINE_TYPES = {'image/gif', 'image/jpeg', 'image/png', 'image/webp'}
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Bytes per read when a file is streamed through Python rather than sent
+# with sendfile(2); also passed to wsgi.file_wrapper
+BLOCK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    """No byte of the requested range lies within the file"""
+
+
+def parse_range(header, size):
+    """Return the (start, end) byte positions a Range header asks for.
+
+    end is inclusive. Returns None when the whole file should be sent:
+    without a header, for a malformed one, or for several ranges, which
+    are rarely worth a multipart response.
+    """
+    match = RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    elif last:
+        start, end = max(size - int(last), 0), size - 1
+        if not int(last):
+            raise RangeNotSatisfiable()
+    else:
+        return None
+
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class FileRange:
+    """File-like view of length bytes of an open file from start.
+
+    fileno() is passed through so that wsgi.file_wrapper implementations
+    can sendfile(2) from the current offset for Content-Length bytes.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class MediaView(View):
+    """Serve a file from MEDIA_ROOT with caching and range support"""
+    http_method_names = ['get', 'head']
+
+    def resolve(self, path):
+        """Return the absolute path and stat result of a servable file"""
+        if any(part.startswith('.') for part in path.split('/')):
+            raise Http404()
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+            stat_result = os.stat(full_path)
+        except (SuspiciousFileOperation, OSError, ValueError):
+            raise Http404()
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise Http404()
+
+        return full_path, stat_result
+
+    def base_response(self, path, stat_result):
+        """Return an empty response carrying the file's metadata headers"""
+        config = settings.MEDIA_SERVING
+        content_type, encoding = mimetypes.guess_type(path)
+        if content_type in INLINE_TYPES and not encoding:
+            response = HttpResponse(content_type=content_type)
+        else:
+            response = HttpResponse(content_type='application/octet-stream')
+            response['Content-Disposition'] = 'attachment'
+        response['Last-Modified'] = http_date(stat_result.st_mtime)
+        response['ETag'] = (
+            f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"')
+        if CONTENT_ADDRESSED.search(path):
+            patch_cache_control(
+                response, public=True, immutable=True,
+                max_age=config['IMMUTABLE_MAX_AGE'])
+        else:
+            patch_cache_control(
+                response, public=True, max_age=config['MAX_AGE'])
+
+        return response
+
+    def offload(self, response, path, full_path):
+        """Leave sending the file to the front-end server, if configured"""
+        config = settings.MEDIA_SERVING
+        if config['SENDFILE'] == 'x-sendfile':
+            response['X-Sendfile'] = full_path
+        elif config['SENDFILE'] == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = (
+                config['INTERNAL_URL'].rstrip('/') + '/' + quote(path))
+        else:
+            return None
+
+        return response
+
+    def wants_range(self, request, response):
+        """True unless an If-Range validator no longer matches the file"""
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if not if_range:
+            return True
+        if if_range.startswith('"'):
+            return if_range == response['ETag']
+
+        return parse_http_date_safe(if_range) == parse_http_date_safe(
+            response['Last-Modified'])
+
+    def get(self, request, path):
+        full_path, stat_result = self.resolve(path)
+        response = self.base_response(path, stat_result)
+
+        conditional = get_conditional_response(
+            request, etag=response['ETag'],
+            last_modified=int(stat_result.st_mtime), response=response)
+        if conditional is not response:
+            return conditional
+
+        offloaded = self.offload(response, path, full_path)
+        if offloaded is not None:
+            return offloaded
+
+        size = stat_result.st_size
+        response['Accept-Ranges'] = 'bytes'
+        byte_range = None
+        if self.wants_range(request, response):
+            try:
+                byte_range = parse_range(
+                    request.META.get('HTTP_RANGE'), size)
+            except RangeNotSatisfiable:
+                response.status_code = 416
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1 if size else 0
+        if request.method == 'HEAD':
+            streamed = response
+        else:
+            file = open(full_path, 'rb')
+            streamed = FileResponse(
+                FileRange(file, start, length) if byte_range else file,
+                content_type=response['Content-Type'])
+            streamed.block_size = BLOCK_SIZE
+            for header, value in response.items():
+                streamed[header] = value
+
+        if byte_range:
+            streamed.status_code = 206
+            streamed['Content-Range'] = f'bytes {start}-{end}/{size}'
+        streamed['Content-Length'] = length
+
+        return streamed
@@ -0,0 +1,150 @@
+"""
+In-process metrics registry with Prometheus text exposition
+"""
+import bisect
+import threading
+
+
+# Seconds, from a cached response to a slow export page
+TIME_BUCKETS = (
+    .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10,
+)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n') \
+        .replace('"', r'\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative histogram of observations per combination of labels.
+
+    observe() only takes a lock to bump a few counters, so it is cheap
+    enough to call several times per request.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=TIME_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Record value for the label values, in labelnames order"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [
+                    [0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def series(self):
+        """Return {labels: (cumulative bucket counts, count, sum)}"""
+        with self._lock:
+            snapshot = {
+                labels: (list(counts), count, total)
+                for labels, (counts, count, total) in self._series.items()
+            }
+        for labels, (counts, count, total) in snapshot.items():
+            for i in range(1, len(counts)):
+                counts[i] += counts[i - 1]
+        return snapshot
+
+    def samples(self):
+        """Yield (name, labels, value) for the exposition format"""
+        for labels, (counts, count, total) in sorted(self.series().items()):
+            for bound, cumulative in zip(
+                    (*self.buckets, float('inf')), counts):
+                yield (
+                    f'{self.name}_bucket',
+                    _labels(self.labelnames, labels,
+                            [('le', _number(bound))]),
+                    cumulative,
+                )
+            yield f'{self.name}_count', _labels(self.labelnames, labels), \
+                count
+            yield f'{self.name}_sum', _labels(self.labelnames, labels), total
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Registry:
+    """Named metrics of this process, rendered for Prometheus.
+
+    Collectors are callables returning extra (type, name, documentation,
+    [(labels dict, value)]) families, read at scrape time.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name, documentation, labelnames=(),
+                  buckets=TIME_BUCKETS):
+        """Return the histogram called name, creating it if needed"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(
+                    name, documentation, labelnames, buckets)
+        return metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def register_collector(self, collector):
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def clear(self):
+        """Forget every observation, keeping the metrics themselves"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self):
+        """Return every metric in the Prometheus text format 0.0.4"""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for sample, labels, value in metric.samples():
+                lines.append(f'{sample}{labels} {_number(value)}')
+
+        for collector in list(self._collectors):
+            for kind, name, documentation, samples in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(
+                        f'{name}{_labels(labels, labels.values())} '
+                        f'{_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
@@ -0,0 +1,294 @@
+"""
+Per-request cost instrumentation and response compression
+"""
+import asyncio
+import contextlib
+import contextvars
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.cache import patch_vary_headers
+
+from core import compression
+from core.metrics import COUNT_BUCKETS, REGISTRY
+
+
+METHODS = frozenset(
+    ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+UNRESOLVED = 'unresolved'
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds',
+    'Time to produce the response, excluding streamed bodies',
+    ('view', 'method', 'status'),
+)
+DB_SECONDS = REGISTRY.histogram(
+    'http_request_db_seconds',
+    'Time spent in database queries per request',
+    ('view',),
+)
+DB_QUERIES = REGISTRY.histogram(
+    'http_request_db_queries',
+    'Database queries per request',
+    ('view',),
+    COUNT_BUCKETS,
+)
+SERIALIZE_SECONDS = REGISTRY.histogram(
+    'http_request_serialize_seconds',
+    'Time spent serializing and rendering the response body',
+    ('view',),
+)
+
+
+def view_name(view_func, method):
+    """Return e.g. 'PatternViewSet.list' for the view handling method"""
+    cls = getattr(view_func, 'cls', None) or \
+        getattr(view_func, 'view_class', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__qualname__}'
+
+    handler = method.lower()
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        handler = actions.get(handler) or \
+            (actions.get('get') if handler == 'head' else None) or handler
+    return f'{cls.__name__}.{handler}'
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and their time"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class RequestCost(QueryTimer):
+    """Queries, DB time and serialization time of one request"""
+
+    def __init__(self):
+        super().__init__()
+        self.serialize_seconds = 0.0
+        self.serializing = False
+
+
+# The cost of the request being served. Context variables follow the
+# request into the threads sync_to_async runs its sync code on.
+_current_cost = contextvars.ContextVar('request_cost', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper charging queries to the request being served"""
+    cost = _current_cost.get()
+    if cost is None:
+        return execute(sql, params, many, context)
+    return cost(execute, sql, params, many, context)
+
+
+def track_queries(connection):
+    """Charge connection's queries to whichever request makes them"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def _connection_created(sender, connection, **kwargs):
+    track_queries(connection)
+
+
+@contextlib.contextmanager
+def serializing():
+    """Charge the time spent in the block to the request's serialization.
+
+    Blocks nested in one another are counted once.
+    """
+    cost = _current_cost.get()
+    if cost is None or cost.serializing:
+        yield
+        return
+
+    cost.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        cost.serializing = False
+        cost.serialize_seconds += time.perf_counter() - started
+
+
+class TimedSerializerMixin:
+    """Serializer mixin counting to_representation() as serialization"""
+
+    def to_representation(self, instance):
+        with serializing():
+            return super().to_representation(instance)
+
+
+class RequestMetricsMiddleware:
+    """Record the query count, DB time, rendering time and total time of
+    each request, labelled by view and action.
+
+    Observations go to the histograms of core.metrics.REGISTRY and, with
+    REQUEST_METRICS['SERVER_TIMING'], to a Server-Timing response header.
+    Serialization covers serializers' to_representation() and rendering.
+    Time spent streaming a response body after the view returns is not
+    counted. Runs in either mode, so under ASGI the chain stays async.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        for alias in connections:
+            track_queries(connections[alias])
+        started = time.perf_counter()
+        cost = RequestCost()
+        token = _current_cost.set(cost)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_cost.reset(token)
+        return self.finish(request, response, cost, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        cost = RequestCost()
+        token = _current_cost.set(cost)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_cost.reset(token)
+        return self.finish(request, response, cost, started)
+
+    def finish(self, request, response, cost, started):
+        total = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        view = view_name(match.func, request.method) if match else UNRESOLVED
+        serialize = cost.serialize_seconds
+        method = request.method if request.method in METHODS else 'other'
+        REQUEST_SECONDS.observe(
+            total, view, method, str(response.status_code))
+        DB_SECONDS.observe(cost.seconds, view)
+        DB_QUERIES.observe(cost.count, view)
+        SERIALIZE_SECONDS.observe(serialize, view)
+
+        if settings.REQUEST_METRICS['SERVER_TIMING']:
+            timing = (
+                f'db;dur={cost.seconds * 1000:.2f};'
+                f'desc="{cost.count} queries", '
+                f'serialize;dur={serialize * 1000:.2f}, '
+                f'total;dur={total * 1000:.2f}'
+            )
+            if response.has_header('Server-Timing'):
+                timing = f'{response["Server-Timing"]}, {timing}'
+            response['Server-Timing'] = timing
+        return response
+
+    def process_template_response(self, request, response):
+        """Render here, timed, rather than after the middleware returns"""
+        with serializing():
+            response.render()
+        return response
+
+
+class CompressionMiddleware:
+    """Compress responses with the best coding the client accepts.
+
+    Only responses of RESPONSE_COMPRESSION['TYPES'] are compressed, which
+    leaves out images and other already compressed media, and only once
+    they reach MIN_SIZE bytes. Streamed responses are compressed as they
+    are sent. Responses that are partial, served as byte ranges, handed
+    off to the web server or marked no-transform are left alone. Runs in
+    either mode, like RequestMetricsMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = settings.RESPONSE_COMPRESSION
+        self.encodings = [
+            encoding for encoding in config['ENCODINGS']
+            if encoding in compression.ENCODERS
+        ]
+        if not self.encodings:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        """Return response compressed for request, where it should be"""
+        if not self.compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.negotiate(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if encoding is None:
+            return response
+
+        config = settings.RESPONSE_COMPRESSION
+        encoder = compression.ENCODERS[encoding](config['LEVELS'][encoding])
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                encoder, response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = compression.compress(encoder, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # A strong ETag names the exact bytes, which now differ
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compressible(self, response):
+        """Return whether response may and should be compressed"""
+        config = settings.RESPONSE_COMPRESSION
+        if response.status_code in (206, 304) or any(
+                response.has_header(header) for header in (
+                    'Content-Encoding', 'Content-Range', 'Accept-Ranges',
+                    'X-Sendfile', 'X-Accel-Redirect')):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+
+        content_type = response.get('Content-Type', '').lower()
+        if not content_type.startswith(tuple(config['TYPES'])):
+            return False
+        return response.streaming or \
+            len(response.content) >= config['MIN_SIZE']
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.25 on 2026-10-17 03:28
+
+from django.db import migrations, models
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Fold duplicate (user, name) rows into the oldest one."""
+    Pattern = apps.get_model('core', 'Pattern')
+    for model_name, relation in (
+        ('Tag', 'tags'),
+        ('Datastructure', 'datastructures'),
+    ):
+        model = apps.get_model('core', model_name)
+        through = Pattern._meta.get_field(relation).remote_field.through
+        target = f'{model_name.lower()}_id'
+        duplicates = (
+            model.objects.values('user_id', 'name')
+            .annotate(count=models.Count('id'), keep=models.Min('id'))
+            .filter(count__gt=1)
+        )
+        for row in duplicates:
+            stale = list(
+                model.objects.filter(user_id=row['user_id'], name=row['name'])
+                .exclude(id=row['keep'])
+                .values_list('id', flat=True)
+            )
+            linked = through.objects.filter(**{f'{target}__in': stale})
+            through.objects.bulk_create(
+                [
+                    through(pattern_id=pattern_id, **{target: row['keep']})
+                    for pattern_id in linked.values_list(
+                        'pattern_id', flat=True).distinct()
+                ],
+                ignore_conflicts=True,
+            )
+            linked.delete()
+            model.objects.filter(id__in=stale).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_pattern_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_names,
+            migrations.RunPython.noop,
+        ),
+    ]
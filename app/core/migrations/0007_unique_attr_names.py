@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-17 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_merge_duplicate_attr_names'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='datastructure',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_datastructure_name_per_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_name_per_user'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-17 03:44
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+def through_index(table, column, other):
+    """Index the M2M table by column first so lookups on it are index-only"""
+    name = f'{table}_{column}_{other}_idx'
+    return migrations.RunSQL(
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" '
+        f'ON "{table}" ("{column}", "{other}")',
+        f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"',
+    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_modified_timestamps'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='pattern',
+            index=models.Index(fields=['user', '-id'], name='pattern_user_id_desc_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name', 'id'], name='tag_user_name_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='datastructure',
+            index=models.Index(fields=['user', 'name', 'id'], name='datastructure_user_name_id_idx'),
+        ),
+        through_index('core_pattern_tags', 'tag_id', 'pattern_id'),
+        through_index('core_pattern_datastructures', 'datastructure_id', 'pattern_id'),
+    ]
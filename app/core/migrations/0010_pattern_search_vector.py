@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-17 04:20
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+# Must match pattern.search.SEARCH_VECTOR
+BACKFILL_SQL = """
+UPDATE core_pattern SET search_vector =
+    setweight(to_tsvector('english'::regconfig, COALESCE(title, '')), 'A') ||
+    setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'B')
+"""
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0009_per_user_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pattern',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        AddIndexConcurrently(
+            model_name='pattern',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='pattern_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-17 05:02
+
+from django.db import migrations
+
+
+def prefix_index(table):
+    """Index upper-cased names in the C collation for prefix lookups.
+
+    Under C both LIKE 'PREFIX%' and ORDER BY can use the index whatever
+    the database's collation, so the first few matches are read straight
+    off it. The expression must match pattern.views.NAME_KEY.
+    """
+    name = f'{table}_user_name_prefix_idx'
+    return migrations.RunSQL(
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" '
+        f'ON "{table}" ("user_id", (UPPER("name") COLLATE "C"), "id")',
+        f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"',
+    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0010_pattern_search_vector'),
+    ]
+
+    operations = [
+        prefix_index('core_tag'),
+        prefix_index('core_datastructure'),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-17 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_attr_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pattern',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
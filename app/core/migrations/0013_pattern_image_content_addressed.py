@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:27
+
+import core.fields
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0012_pattern_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pattern',
+            name='image',
+            field=core.fields.ContentAddressedImageField(null=True, upload_to='uploads/pattern'),
+        ),
+        AddIndexConcurrently(
+            model_name='pattern',
+            index=models.Index(fields=['image'], name='pattern_image_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-17 05:35
+
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0013_pattern_image_content_addressed'),
+    ]
+
+    operations = [
+        RemoveIndexConcurrently(
+            model_name='datastructure',
+            name='datastructure_user_name_id_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='tag',
+            name='tag_user_name_id_idx',
+        ),
+    ]
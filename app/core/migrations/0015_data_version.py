@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-17 05:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_drop_name_id_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('user', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to='core.user')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -5,6 +5,8 @@ import uuid
 import os
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -12,13 +14,22 @@ from django.contrib.auth.models import (
     PermissionsMixin
 )
 
+from core.fields import ContentAddressedImageField
+
+
+PATTERN_IMAGE_DIR = os.path.join('uploads', 'pattern')
+
 
 def pattern_image_file_path(instance, filename):
-    """Generate file path for new Pattern image."""
+    """Generate a random file path for a Pattern image.
+
+    Pattern images are now named after their content; this naming is kept
+    for the migrations that refer to it and for existing files.
+    """
     ext = os.path.splitext(filename)[1]
     filename = f'{uuid.uuid4()}{ext}'
 
-    return os.path.join('uploads', 'pattern', filename)
+    return os.path.join(PATTERN_IMAGE_DIR, filename)
 
 
 class UserManager(BaseUserManager):
@@ -62,7 +73,23 @@ class Pattern(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
     datastructures = models.ManyToManyField('Datastructure')
-    image = models.ImageField(null=True, upload_to=pattern_image_file_path)
+    image = ContentAddressedImageField(null=True, upload_to=PATTERN_IMAGE_DIR)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
+    modified = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                name='pattern_user_id_desc_idx',
+            ),
+            models.Index(fields=['image'], name='pattern_image_idx'),
+            GinIndex(
+                fields=['search_vector'],
+                name='pattern_search_vector_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -75,6 +102,15 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -87,6 +123,32 @@ class Datastructure(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_datastructure_name_per_user',
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class DataVersion(models.Model):
+    """Generation counter of a User's Patterns, Tags and Datastructures.
+
+    Every write to them bumps it in the writing transaction. It is neither
+    cascaded nor constrained, so bumps made while a User's rows are being
+    deleted cannot trip over the deletion; the row is removed afterwards.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        related_name='+',
+    )
+    version = models.PositiveBigIntegerField(default=0)
@@ -0,0 +1,101 @@
+"""
+JSON renderer and parser backed by orjson when it is installed.
+
+API_JSON_BACKEND picks the library: 'orjson', 'stdlib' or 'auto', which
+uses orjson if it can be imported. Both classes fall back to their DRF
+counterparts for whatever orjson does differently: indented, non-compact
+or ASCII-only output, non-strict JSON, integers that may exceed 64 bits,
+charsets other than UTF-8 and invalid documents, so error messages stay
+the same too. Floats may be written in a different but equal form, e.g.
+1e-7 for 1e-07, and NaN, which DRF refuses to encode, becomes null.
+"""
+import codecs
+import io
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework import parsers, renderers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+BACKENDS = ('auto', 'orjson', 'stdlib')
+
+# orjson reads integers beyond 64 bits as floats; any run of 19 digits may
+# be one. Found by mapping digits to '0' and the rest to ' ', which is
+# much faster than a regular expression.
+DIGITS = bytes(
+    ord('0') if chr(byte).isdigit() and byte < 128 else ord(' ')
+    for byte in range(256)
+)
+LONG_NUMBER = b'0' * 19
+
+
+def use_orjson():
+    """Return whether API_JSON_BACKEND selects orjson"""
+    backend = settings.API_JSON_BACKEND
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(
+            f'API_JSON_BACKEND must be one of {", ".join(BACKENDS)}')
+    if backend == 'orjson' and orjson is None:
+        raise ImproperlyConfigured(
+            'API_JSON_BACKEND is orjson, but it is not installed')
+
+    return backend != 'stdlib' and orjson is not None
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """DRF's JSONRenderer, encoding with orjson where it can"""
+
+    # Left to DRF's encoder: orjson writes datetimes without DRF's 'Z' for
+    # UTC, and dataclasses DRF does not encode
+    orjson_options = orjson and (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not use_orjson() or self.ensure_ascii or \
+                not self.compact or not self.strict or self.get_indent(
+                    accepted_media_type, renderer_context or {}) is not None:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=self.orjson_options,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+
+        # Escaped like DRF does, to stay a strict JavaScript subset
+        return ret.replace('\u2028'.encode(), b'\\u2028') \
+            .replace('\u2029'.encode(), b'\\u2029')
+
+
+class JSONParser(parsers.JSONParser):
+    """DRF's JSONParser, decoding with orjson where it can"""
+    renderer_class = JSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not use_orjson() or not self.strict or \
+                codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if LONG_NUMBER in body.translate(DIGITS):
+            return super().parse(
+                io.BytesIO(body), media_type, parser_context)
+
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(
+                io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,87 @@
+"""
+File storage that publishes files atomically
+"""
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+
+class AtomicFileSystemStorage(FileSystemStorage):
+    """FileSystemStorage that never exposes a partially written file.
+
+    Content is streamed to a temporary file beside its destination and
+    then hard linked into place, which fails rather than overwrites when
+    another writer took the name first. Readers see either nothing or the
+    whole file.
+    """
+    TEMP_PREFIX = '.upload-'
+    TEMP_SUFFIX = '.part'
+
+    def _makedirs(self, directory):
+        try:
+            if self.directory_permissions_mode is not None:
+                # os.makedirs() doesn't apply mode to intermediate dirs
+                old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+                try:
+                    os.makedirs(
+                        directory, self.directory_permissions_mode,
+                        exist_ok=True)
+                finally:
+                    os.umask(old_umask)
+            else:
+                os.makedirs(directory, exist_ok=True)
+        except FileExistsError:
+            raise FileExistsError(
+                f'{directory} exists and is not a directory.')
+
+    def _write_temp(self, directory, content):
+        """Write content to a new temporary file in directory, synced"""
+        fd, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=self.TEMP_PREFIX, suffix=self.TEMP_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    temp.write(chunk)
+                temp.flush()
+                os.fsync(temp.fileno())
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        return temp_path
+
+    def touch(self, name):
+        """Mark name as just used; return False if it doesn't exist"""
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        self._makedirs(directory)
+
+        temp_path = self._write_temp(directory, content)
+        try:
+            while True:
+                try:
+                    os.link(temp_path, full_path)
+                except FileExistsError:
+                    name = self.get_available_name(name)
+                    full_path = self.path(name)
+                else:
+                    break
+        finally:
+            os.unlink(temp_path)
+
+        # Ensure the saved path is always relative to the storage root.
+        name = os.path.relpath(full_path, self.location)
+        return str(name).replace('\\', '/')
@@ -0,0 +1,8 @@
+"""
+The project's URLs with the read-heavy views made async, as under ASGI
+"""
+from app.urls import ASYNC_VIEWS, urlpatterns as sync_urlpatterns
+from core.async_views import async_urls
+
+
+urlpatterns = async_urls(sync_urlpatterns, ASYNC_VIEWS)
@@ -0,0 +1,109 @@
+"""
+Tests for the ASGI application
+"""
+import json
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from app.asgi import application
+from core import asgi
+from core.models import Pattern, Tag
+
+
+def asgi_get(path, query_string=b'', headers=()):
+    """GET path from the ASGI application; return (status, headers, body)"""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': query_string,
+        'headers': [(b'host', b'testserver'), *headers],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async_to_sync(application)(scope, receive, send)
+    start, *body = messages
+    return (
+        start['status'],
+        dict(start['headers']),
+        b''.join(message.get('body', b'') for message in body),
+    )
+
+
+class ASGIApplicationTests(TransactionTestCase):
+    """Test - Requests served by app.asgi.application"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'password123')
+        self.token = Token.objects.create(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Tree')
+        for i in range(5):
+            pattern = Pattern.objects.create(
+                user=self.user, title=f'Pattern {i}')
+            pattern.tags.add(tag)
+
+    @override_settings(PATTERN_EXPORT_CHUNK_SIZE=2)
+    def test_export_streams(self):
+        """Test - Exports query the db as they stream, off the event loop"""
+        auth = (b'authorization', f'Token {self.token.key}'.encode())
+        batch_size = asgi.STREAM_BATCH_SIZE
+        asgi.STREAM_BATCH_SIZE = 1
+        self.addCleanup(setattr, asgi, 'STREAM_BATCH_SIZE', batch_size)
+
+        status, headers, body = asgi_get(
+            reverse('pattern:pattern-export'), headers=[auth])
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'Content-Type'],
+                         b'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(
+            [row['title'] for row in rows],
+            [f'Pattern {i}' for i in reversed(range(5))])
+        self.assertEqual(rows[0]['tags'], [{'id': rows[0]['tags'][0]['id'],
+                                            'name': 'Tree'}])
+
+    def test_plain_responses(self):
+        """Test - Responses that are not streamed are sent as before"""
+        status, _, body = asgi_get(reverse('pattern:pattern-list'))
+
+        self.assertEqual(status, 401)
+        self.assertIn(b'detail', body)
+
+
+class MiddlewareChainTests(SimpleTestCase):
+
+    @override_settings(DEBUG=True, REQUEST_METRICS={
+        'ENABLED': True, 'SERVER_TIMING': False,
+    })
+    def test_chain_stays_async(self):
+        """Test - No middleware is adapted to sync under ASGI"""
+        with patch('django.core.handlers.base.logger') as logger:
+            ASGIHandler()
+
+        adapted = [
+            call.args for call in logger.debug.call_args_list
+            if 'adapted' in call.args[0]
+        ]
+        self.assertEqual(adapted, [])
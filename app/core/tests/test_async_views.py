@@ -0,0 +1,140 @@
+"""
+Tests for the async adapters of the read-heavy API views
+"""
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Datastructure, Pattern, Tag
+
+
+ASYNC_URLCONF = 'core.tests.async_urls'
+
+
+@override_settings(
+    TOKEN_AUTH_CACHE={'BACKEND': 'local', 'TIMEOUT': 60},
+    PATTERN_RESPONSE_CACHE={'BACKEND': 'local', 'TIMEOUT': 60},
+)
+class AsyncApiViewTests(TestCase):
+    """Test - Async views answer exactly as the sync views do"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'password123', name='Test User')
+        self.token = Token.objects.create(user=self.user)
+        self.pattern = Pattern.objects.create(user=self.user, title='Heap')
+        self.pattern.tags.add(Tag.objects.create(user=self.user, name='Tree'))
+        Datastructure.objects.create(user=self.user, name='Array')
+        self.urls = [
+            reverse('user:me'),
+            reverse('pattern:pattern-list'),
+            reverse('pattern:pattern-detail', args=[self.pattern.id]),
+            reverse('pattern:tag-list') + '?with_counts=1',
+            reverse('pattern:tag-autocomplete') + '?q=tr',
+            reverse('pattern:datastructure-list'),
+        ]
+
+    def sync_get(self, url, **headers):
+        return self.client.get(
+            url, HTTP_AUTHORIZATION=f'Token {self.token.key}', **{
+                f'HTTP_{name.upper().replace("-", "_")}': value
+                for name, value in headers.items()
+            })
+
+    def async_get(self, url, token=True, **headers):
+        """GET url through the async views, like an ASGI server would"""
+        if token:
+            headers['authorization'] = f'Token {self.token.key}'
+
+        async def get():
+            with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+                return await self.async_client.get(url, **headers)
+
+        return async_to_sync(get)()
+
+    def assertSameResponse(self, sync, asynchronous):
+        self.assertEqual(asynchronous.status_code, sync.status_code)
+        self.assertEqual(asynchronous.content, sync.content)
+        for header in ('Content-Type', 'ETag', 'Vary', 'Allow'):
+            self.assertEqual(
+                asynchronous.get(header), sync.get(header), header)
+
+    def test_cache_hits_answered_without_queries(self):
+        """Test - Profile reads from the token cache are served inline"""
+        url = reverse('user:me')
+        sync = self.sync_get(url)
+
+        with self.assertNumQueries(0):
+            asynchronous = self.async_get(url)
+
+        self.assertSameResponse(sync, asynchronous)
+
+    def test_cached_pattern_responses(self):
+        """Test - Cached responses only cost the data version query"""
+        for url in self.urls[1:]:
+            sync = self.sync_get(url)
+
+            with self.assertNumQueries(1):
+                asynchronous = self.async_get(url)
+
+            self.assertSameResponse(sync, asynchronous)
+
+    def test_misses_run_the_view(self):
+        """Test - Uncached requests run the sync view and match it"""
+        for url in self.urls:
+            asynchronous = self.async_get(url)
+            sync = self.sync_get(url)
+
+            self.assertSameResponse(sync, asynchronous)
+
+    def test_not_modified(self):
+        """Test - A matching If-None-Match gets a 304 after one query"""
+        url = reverse('pattern:pattern-list')
+        etag = self.sync_get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.async_get(url, **{'if-none-match': etag})
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_unauthenticated(self):
+        """Test - Requests without a token get the view's 401"""
+        url = reverse('pattern:pattern-list')
+
+        res = self.async_get(url, token=False)
+
+        self.assertEqual(res.status_code, 401)
+        sync = self.client.get(url)
+        self.assertEqual(res.content, sync.content)
+
+    def test_writes_run_the_view(self):
+        """Test - Other methods on an async route reach the sync view"""
+        async def post():
+            with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+                return await self.async_client.post(
+                    reverse('pattern:pattern-list'),
+                    {'title': 'Trie'},
+                    content_type='application/json',
+                    authorization=f'Token {self.token.key}',
+                )
+
+        res = async_to_sync(post)()
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()['title'], 'Trie')
+
+    @override_settings(PATTERN_RESPONSE_CACHE={
+        'BACKEND': 'django', 'TIMEOUT': 60, 'ALIAS': 'default',
+    })
+    def test_shared_cache_runs_the_view(self):
+        """Test - Caches needing I/O are only consulted off the loop"""
+        url = reverse('pattern:tag-list')
+        sync = self.sync_get(url)
+
+        asynchronous = self.async_get(url)
+
+        self.assertSameResponse(sync, asynchronous)
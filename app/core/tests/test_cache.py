@@ -0,0 +1,75 @@
+"""
+Tests for the shared caches
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.cache import (
+    DjangoCache,
+    LocalCache,
+    build_cache,
+)
+
+
+class LocalCacheTests(SimpleTestCase):
+
+    def test_get_and_set(self):
+        """Test - Values round trip and missing keys return the default"""
+        cache = LocalCache()
+        cache.set('a', 1)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('b', 'missing'), 'missing')
+
+    @patch('time.monotonic')
+    def test_entries_expire(self, patched_monotonic):
+        """Test - Entries are dropped once their timeout passes"""
+        patched_monotonic.return_value = 100
+        cache = LocalCache(timeout=10)
+        cache.set('a', 1)
+
+        patched_monotonic.return_value = 109
+        self.assertEqual(cache.get('a'), 1)
+        patched_monotonic.return_value = 110
+        self.assertIsNone(cache.get('a'))
+
+    def test_least_recently_used_evicted(self):
+        """Test - The cache never grows past max_entries"""
+        cache = LocalCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_delete_many(self):
+        """Test - Deleting keys, including unknown ones"""
+        cache = LocalCache()
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.delete_many(['a', 'missing'])
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+
+
+class BuildCacheTests(SimpleTestCase):
+
+    def test_build_backends(self):
+        """Test - Settings dicts select the cache backend"""
+        local = build_cache({'BACKEND': 'local', 'MAX_ENTRIES': 5})
+        shared = build_cache({'BACKEND': 'django'}, key_prefix='x:')
+
+        self.assertIsInstance(local, LocalCache)
+        self.assertEqual(local.max_entries, 5)
+        self.assertIsInstance(shared, DjangoCache)
+        self.assertIsNone(build_cache({'BACKEND': None}))
+
+    def test_unknown_backend(self):
+        """Test - Unknown backends are a configuration error"""
+        with self.assertRaises(ValueError):
+            build_cache({'BACKEND': 'nope'})
@@ -0,0 +1,225 @@
+"""
+Tests for response compression
+"""
+import asyncio
+import gzip
+import itertools
+import os
+import shutil
+import tempfile
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import compression
+from core.middleware import CompressionMiddleware
+from core.models import Pattern
+
+
+BODY = b'{"results": [' + b','.join(
+    b'{"id": %d, "title": "Pattern %d"}' % (i, i) for i in range(200)) + b']}'
+
+
+def respond(response, accept_encoding='gzip', **config):
+    """Return response after CompressionMiddleware with config"""
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+    with override_settings(RESPONSE_COMPRESSION=dict(
+            settings.RESPONSE_COMPRESSION, **config)):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(request)
+
+
+def json_response(body=BODY, **headers):
+    response = HttpResponse(body, content_type='application/json')
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+class NegotiationTests(SimpleTestCase):
+
+    def test_negotiate(self):
+        """Test - The client's preference wins, then the server's order"""
+        cases = [
+            ('gzip', 'gzip'),
+            ('gzip, br', 'br'),
+            ('br;q=0.5, gzip', 'gzip'),
+            ('*', 'br'),
+            ('br;q=0, *;q=0.1', 'gzip'),
+            ('x-gzip', 'gzip'),
+            ('identity', None),
+            ('', None),
+            ('gzip;q=0', None),
+            ('gzip;q=bad', None),
+        ]
+        for header, expected in cases:
+            self.assertEqual(
+                compression.negotiate(header, ['br', 'gzip']), expected,
+                header)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+
+    def test_gzip(self):
+        """Test - Large JSON responses are gzipped"""
+        response = respond(json_response(ETag='"v1"'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"v1"')
+
+    def test_not_accepted(self):
+        """Test - Clients not asking for compression get the raw body"""
+        response = respond(json_response(), accept_encoding='')
+
+        self.assertEqual(response.content, BODY)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_threshold(self):
+        """Test - Responses under MIN_SIZE are sent as is"""
+        response = respond(json_response(), MIN_SIZE=len(BODY) + 1)
+
+        self.assertEqual(response.content, BODY)
+        self.assertNotIn('Vary', response)
+
+    def test_level(self):
+        """Test - The configured gzip level is used"""
+        for level, flags in ((1, 4), (9, 2)):
+            response = respond(
+                json_response(), LEVELS={'gzip': level, 'br': 4})
+
+            # The gzip header's XFL byte marks fastest or best compression
+            self.assertEqual(response.content[8], flags)
+
+    def test_skipped(self):
+        """Test - Media, ranges and no-transform responses are left alone"""
+        for response in (
+            HttpResponse(b'\xff' * 2048, content_type='image/png'),
+            json_response(**{'Cache-Control': 'no-transform'}),
+            json_response(**{'Content-Encoding': 'gzip'}),
+            json_response(**{'Content-Range': 'bytes 0-9/100'}),
+            json_response(**{'Accept-Ranges': 'bytes'}),
+        ):
+            body, encoding = response.content, response.get('Content-Encoding')
+
+            response = respond(response, accept_encoding='*')
+
+            self.assertEqual(response.content, body)
+            self.assertEqual(response.get('Content-Encoding'), encoding)
+
+    def test_incompressible(self):
+        """Test - Bodies compression would grow are sent as is"""
+        body = os.urandom(4096)
+
+        response = respond(json_response(body))
+
+        self.assertEqual(response.content, body)
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_streaming(self):
+        """Test - Streams are compressed chunk by chunk as sent"""
+        consumed = []
+
+        def chunks():
+            for i in itertools.count():
+                if i == 200:
+                    return
+                consumed.append(i)
+                yield os.urandom(1024).hex().encode()
+
+        response = respond(StreamingHttpResponse(
+            chunks(), content_type='application/x-ndjson'))
+
+        self.assertEqual(consumed, [])
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response)
+        stream = iter(response.streaming_content)
+        first = next(stream)
+        self.assertLess(len(consumed), 200)
+        body = gzip.decompress(first + b''.join(stream))
+        self.assertEqual(len(body), 200 * 2048)
+
+    def test_async(self):
+        """Test - Async responses are compressed without leaving the loop"""
+        async def get_response(request):
+            return json_response()
+
+        middleware = CompressionMiddleware(get_response)
+        response = async_to_sync(middleware)(
+            RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli(self):
+        """Test - Brotli is preferred when the client accepts it"""
+        response = respond(json_response(), accept_encoding='gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), BODY)
+
+
+class CompressionApiTests(TestCase):
+    """Test - Compression of the API and media responses"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client.force_authenticate(self.user)
+        for i in range(50):
+            Pattern.objects.create(
+                user=self.user, title=f'Pattern {i}', link=f'link {i}')
+
+    def test_list(self):
+        """Test - Pattern lists are compressed and revalidate"""
+        url = reverse('pattern:pattern-list')
+        plain = self.client.get(url)
+
+        res = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        revalidated = self.client.get(
+            url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_export(self):
+        """Test - Exports are compressed as they stream"""
+        url = reverse('pattern:pattern-export')
+        plain = b''.join(self.client.get(url).streaming_content)
+
+        res = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(res.streaming_content)), plain)
+
+    def test_media_skipped(self):
+        """Test - Images are sent as stored"""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with open(os.path.join(media_root, 'image.png'), 'wb') as f:
+            f.write(b'\x89PNG' * 1024)
+
+        with override_settings(MEDIA_ROOT=media_root):
+            res = self.client.get(
+                reverse('media', args=['image.png']),
+                HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertNotIn('Content-Encoding', res)
@@ -0,0 +1,150 @@
+"""
+Tests for the database connection pool
+"""
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.pool import ConnectionPool, PoolExhausted
+
+
+DB_STATS_URL = reverse('db-stats')
+
+
+class FakeConnection:
+    """Stand-in for a DB-API connection"""
+
+    def __init__(self):
+        self.closed = False
+        self.usable = True
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    return ConnectionPool(
+        FakeConnection,
+        is_usable=lambda conn: conn.usable and not conn.closed,
+        **kwargs,
+    )
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def test_released_connection_reused(self):
+        """Test - A released connection is handed out again"""
+        pool = make_pool(max_size=2)
+        conn = pool.acquire()
+        pool.release(conn)
+
+        self.assertIs(pool.acquire(), conn)
+        stats = pool.stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['reused'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_unusable_connection_discarded(self):
+        """Test - Connections failing the health check are replaced"""
+        pool = make_pool(max_size=1)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.usable = False
+
+        replacement = pool.acquire()
+
+        self.assertIsNot(replacement, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['health_check_failures'], 1)
+
+    @patch('time.monotonic')
+    def test_ping_after_idle(self, patched_monotonic):
+        """Test - Long idle connections must answer a ping"""
+        patched_monotonic.return_value = 0
+        pings = []
+        pool = make_pool(ping_after=10, ping=lambda conn: pings.append(conn))
+        conn = pool.acquire()
+        pool.release(conn)
+
+        patched_monotonic.return_value = 5
+        pool.release(pool.acquire())
+        self.assertEqual(pings, [])
+
+        patched_monotonic.return_value = 20
+        pool.acquire()
+        self.assertEqual(pings, [conn])
+
+    def test_error_policy(self):
+        """Test - The error policy fails fast once the pool is full"""
+        pool = make_pool(max_size=1, overflow='error')
+        pool.acquire()
+
+        with self.assertRaises(PoolExhausted):
+            pool.acquire()
+
+    def test_block_policy_times_out(self):
+        """Test - The block policy gives up after its timeout"""
+        pool = make_pool(max_size=1, timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolExhausted):
+            pool.acquire()
+
+    def test_block_policy_waits_for_release(self):
+        """Test - A blocked acquire gets the next released connection"""
+        pool = make_pool(max_size=1, timeout=5)
+        conn = pool.acquire()
+        threading.Timer(0.05, pool.release, args=[conn]).start()
+
+        self.assertIs(pool.acquire(), conn)
+        self.assertGreaterEqual(pool.stats()['waits'], 1)
+
+    def test_grow_policy_closes_overflow(self):
+        """Test - Overflow connections are closed when released"""
+        pool = make_pool(max_size=1, overflow='grow')
+        first = pool.acquire()
+        extra = pool.acquire()
+        pool.release(extra)
+        pool.release(first)
+
+        self.assertTrue(extra.closed)
+        self.assertFalse(first.closed)
+        self.assertEqual(pool.stats()['open'], 1)
+
+    def test_unknown_overflow_policy(self):
+        """Test - Overflow policies are validated"""
+        with self.assertRaises(ValueError):
+            make_pool(overflow='sometimes')
+
+
+class DatabaseStatsApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_stats_require_admin(self):
+        """Test - Only staff may read connection stats"""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(DB_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_stats_for_admin(self):
+        """Test - Staff see per-database connection counters"""
+        admin = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testpass123')
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(DB_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('connections_opened', res.data['default'])
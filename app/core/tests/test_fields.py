@@ -0,0 +1,105 @@
+"""
+Tests for the content-addressed image field
+"""
+import hashlib
+import io
+import posixpath
+import shutil
+import tempfile
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from core.models import Pattern
+
+
+def image_bytes(fmt):
+    """Return a small image encoded in fmt"""
+    output = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(output, fmt)
+    return output.getvalue()
+
+
+class ContentAddressedImageFieldTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'password123')
+
+    def create_pattern(self, content=b'image', name='upload.PNG'):
+        pattern = Pattern.objects.create(user=self.user, title='Trie')
+        pattern.image.save(name, ContentFile(content))
+        return pattern
+
+    def test_named_after_content(self):
+        """Test - Images are stored under the SHA-256 of their content"""
+        content = image_bytes('PNG')
+        digest = hashlib.sha256(content).hexdigest()
+
+        pattern = self.create_pattern(content)
+
+        self.assertEqual(
+            pattern.image.name, f'uploads/pattern/{digest[:2]}/{digest}.png')
+        with default_storage.open(pattern.image.name) as f:
+            self.assertEqual(f.read(), content)
+
+    def test_extension_from_format(self):
+        """Test - The extension is that of the format, not the name's"""
+        for fmt, ext in (('JPEG', '.jpg'), ('GIF', '.gif')):
+            pattern = self.create_pattern(image_bytes(fmt), name='evil.html')
+
+            self.assertTrue(pattern.image.name.endswith(ext), fmt)
+
+    def test_no_extension_for_other_files(self):
+        """Test - Files that are not images get no extension"""
+        pattern = self.create_pattern(name='upload.png')
+
+        self.assertEqual(posixpath.splitext(pattern.image.name)[1], '')
+
+    def test_identical_content_stored_once(self):
+        """Test - Identical uploads share a file, others get their own"""
+        first = self.create_pattern()
+        second = self.create_pattern(name='other.png')
+        third = self.create_pattern(b'another image')
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, third.image.name)
+        _, files = default_storage.listdir(
+            posixpath.dirname(first.image.name))
+        self.assertEqual(len(files), 1)
+
+    def test_reference_counts(self):
+        """Test - Counts the Patterns referring to each name"""
+        shared = self.create_pattern().image.name
+        self.create_pattern()
+        single = self.create_pattern(b'another image').image.name
+        field = Pattern._meta.get_field('image')
+
+        counts = field.reference_counts([shared, single, 'missing.png'])
+
+        self.assertEqual(counts, {shared: 2, single: 1, 'missing.png': 0})
+
+    def test_delete_keeps_shared_file(self):
+        """Test - Deleting a shared image only detaches it"""
+        first = self.create_pattern()
+        second = self.create_pattern()
+        name = first.image.name
+
+        first.image.delete()
+
+        first.refresh_from_db()
+        self.assertFalse(first.image)
+        self.assertTrue(default_storage.exists(name))
+
+        second.image.delete()
+
+        self.assertFalse(default_storage.exists(name))
@@ -0,0 +1,169 @@
+"""
+Tests for the media serving view
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core.media import RangeNotSatisfiable, parse_range
+
+
+DIGEST = 'ab' * 32
+CONTENT = bytes(range(256)) * 4
+
+
+class ParseRangeTests(SimpleTestCase):
+
+    def test_ranges(self):
+        """Test - Single byte ranges in each form"""
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=50-500', 100), (50, 99))
+        self.assertEqual(parse_range('bytes=-500', 100), (0, 99))
+
+    def test_ignored(self):
+        """Test - Absent, malformed and multiple ranges send everything"""
+        for header in (None, '', 'bytes=5-2', 'items=0-1', 'bytes=0-1,5-6'):
+            self.assertIsNone(parse_range(header, 100))
+
+    def test_unsatisfiable(self):
+        """Test - Ranges past the end of the file are unsatisfiable"""
+        for header in ('bytes=100-', 'bytes=-0'):
+            with self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, 100)
+
+
+class MediaViewTests(SimpleTestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.name = f'uploads/pattern/ab/{DIGEST}.png'
+        for name in (self.name, 'legacy.png', '.hidden.png', 'page.html',
+                     'image.svg', 'image.png.gz'):
+            path = os.path.join(self.media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(CONTENT)
+
+    def url(self, name):
+        return reverse('media', args=[name])
+
+    def get(self, name=None, **headers):
+        return self.client.get(self.url(name or self.name), **headers)
+
+    def test_full_file(self):
+        """Test - Whole files are streamed with their metadata"""
+        res = self.get()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
+        self.assertEqual(res['Content-Type'], 'image/png')
+        self.assertEqual(res['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+    def test_only_images_inline(self):
+        """Test - Files other than raster images are sent as downloads"""
+        self.assertTrue(self.get()['Content-Disposition'].startswith('inline'))
+        for name in ('page.html', 'image.svg', 'image.png.gz'):
+            res = self.get(name)
+
+            self.assertEqual(res.status_code, 200, name)
+            self.assertEqual(res['Content-Type'], 'application/octet-stream')
+            self.assertEqual(res['Content-Disposition'], 'attachment')
+            self.assertNotIn('Content-Encoding', res)
+
+    def test_cache_headers(self):
+        """Test - Content-addressed names are cached as immutable"""
+        immutable = settings.MEDIA_SERVING['IMMUTABLE_MAX_AGE']
+
+        self.assertEqual(
+            self.get()['Cache-Control'],
+            f'public, immutable, max-age={immutable}')
+        self.assertEqual(
+            self.get('legacy.png')['Cache-Control'],
+            f'public, max-age={settings.MEDIA_SERVING["MAX_AGE"]}')
+
+    def test_range(self):
+        """Test - A byte range is answered with 206 and just those bytes"""
+        res = self.get(HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[10:20])
+        self.assertEqual(res['Content-Length'], '10')
+        self.assertEqual(
+            res['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+
+    def test_range_unsatisfiable(self):
+        """Test - Ranges past the end get a 416"""
+        res = self.get(HTTP_RANGE=f'bytes={len(CONTENT)}-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_if_range(self):
+        """Test - A stale If-Range validator sends the whole file"""
+        etag = self.get()['ETag']
+
+        res = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(res.status_code, 206)
+
+        res = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
+
+    def test_not_modified(self):
+        """Test - Matching validators get a 304 with the cache headers"""
+        etag = self.get()['ETag']
+
+        res = self.get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertIn('immutable', res['Cache-Control'])
+
+    def test_head(self):
+        """Test - HEAD reports the length without opening the file"""
+        res = self.client.head(self.url(self.name))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(res.content, b'')
+
+    def test_not_found(self):
+        """Test - Missing, hidden, directory and outside paths 404"""
+        for name in ('missing.png', '.hidden.png', 'uploads/pattern',
+                     '../etc/passwd', 'uploads/../../etc/passwd'):
+            self.assertEqual(self.get(name).status_code, 404, name)
+
+    @override_settings(MEDIA_SERVING=dict(
+        settings.MEDIA_SERVING, SENDFILE='x-accel-redirect'))
+    def test_x_accel_redirect(self):
+        """Test - nginx is redirected to the internal location"""
+        res = self.get(HTTP_RANGE='bytes=0-9')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(
+            res['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertIn('immutable', res['Cache-Control'])
+
+    @override_settings(MEDIA_SERVING=dict(
+        settings.MEDIA_SERVING, SENDFILE='x-sendfile'))
+    def test_x_sendfile(self):
+        """Test - The file's path is handed over in X-Sendfile"""
+        res = self.get('legacy.png')
+
+        self.assertEqual(res.content, b'')
+        self.assertEqual(
+            res['X-Sendfile'], os.path.join(self.media_root, 'legacy.png'))
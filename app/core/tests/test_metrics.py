@@ -0,0 +1,102 @@
+"""
+Tests for the metrics registry and its Prometheus endpoint
+"""
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.metrics import Histogram, Registry
+
+
+METRICS_URL = reverse('metrics')
+
+
+class HistogramTests(SimpleTestCase):
+
+    def test_buckets_are_cumulative(self):
+        """Test - Bucket counts include every smaller bucket"""
+        histogram = Histogram('h', 'Help', ('view',), buckets=(1, 5))
+        for value in (0.5, 1, 3, 7):
+            histogram.observe(value, 'a')
+
+        counts, count, total = histogram.series()[('a',)]
+
+        self.assertEqual(counts, [2, 3, 4])
+        self.assertEqual(count, 4)
+        self.assertEqual(total, 11.5)
+
+    def test_series_per_label_values(self):
+        """Test - Each combination of label values is its own series"""
+        histogram = Histogram('h', 'Help', ('view',), buckets=(1,))
+        histogram.observe(0, 'a')
+        histogram.observe(0, 'b')
+
+        self.assertEqual(set(histogram.series()), {('a',), ('b',)})
+
+
+class RegistryTests(SimpleTestCase):
+
+    def test_render(self):
+        """Test - Metrics render in the Prometheus text format"""
+        registry = Registry()
+        registry.histogram('latency_seconds', 'Latency', ('view',), (0.1,)) \
+            .observe(0.05, 'Pattern"View')
+        registry.register_collector(lambda: [
+            ('gauge', 'pool_open', 'Open', [({'alias': 'default'}, 3)]),
+        ])
+
+        text = registry.render()
+
+        self.assertIn('# TYPE latency_seconds histogram\n', text)
+        self.assertIn(
+            'latency_seconds_bucket{view="Pattern\\"View",le="0.1"} 1\n',
+            text)
+        self.assertIn(
+            'latency_seconds_bucket{view="Pattern\\"View",le="+Inf"} 1\n',
+            text)
+        self.assertIn('latency_seconds_count{view="Pattern\\"View"} 1\n', text)
+        self.assertIn('# TYPE pool_open gauge\npool_open{alias="default"} 3\n',
+                      text)
+
+    def test_histogram_is_shared(self):
+        """Test - Asking for a metric twice returns the same one"""
+        registry = Registry()
+
+        self.assertIs(
+            registry.histogram('h', 'Help'), registry.histogram('h', 'Help'))
+
+
+class MetricsApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_metrics_require_admin(self):
+        """Test - Only staff may scrape the metrics"""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_for_admin(self):
+        """Test - Request histograms and connection counters are served"""
+        admin = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testpass123')
+        self.client.force_authenticate(admin)
+        self.client.get(reverse('user:me'))
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        text = res.content.decode()
+        self.assertIn(
+            'http_request_db_queries_count{view="ManageUserView.get"}', text)
+        self.assertIn(
+            'db_connections_opened_total{alias="default"}', text)
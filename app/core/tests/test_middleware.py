@@ -0,0 +1,164 @@
+"""
+Tests for the request instrumentation middleware
+"""
+import asyncio
+import re
+import time
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.serializers import Serializer
+from rest_framework.test import APIClient
+
+from core.metrics import REGISTRY
+from core.middleware import RequestMetricsMiddleware
+from core.models import Pattern
+
+
+def timing(res, name):
+    """Return the named Server-Timing entry of res as its desc, or dur"""
+    header = res['Server-Timing']
+    desc = re.search(rf'{name};dur=[\d.]+;desc="(\d+) queries"', header)
+    if desc:
+        return int(desc.group(1))
+    return float(re.search(rf'{name};dur=([\d.]+)', header).group(1))
+
+
+def async_get(client, path, **extra):
+    """GET path through client, an AsyncClient, from sync code"""
+    async def get():
+        return await client.get(path, **extra)
+
+    return async_to_sync(get)()
+
+
+def observations(name, *labels):
+    """Return how many requests the histogram name recorded for labels"""
+    series = REGISTRY.get(name).series().get(labels)
+    return series[1] if series else 0
+
+
+@override_settings(REQUEST_METRICS={'ENABLED': True, 'SERVER_TIMING': True})
+class RequestMetricsMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Pattern.objects.create(user=self.user, title='Heap')
+
+    def test_server_timing(self):
+        """Test - Responses carry the query count and timings"""
+        res = self.client.get(reverse('pattern:pattern-list'))
+
+        timing = res['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(timing, r'serialize;dur=[\d.]+')
+        self.assertRegex(timing, r'total;dur=[\d.]+')
+
+    def test_counts_queries(self):
+        """Test - The query count matches the queries the view ran"""
+        url = reverse('pattern:datastructure-list')
+        with override_settings(PATTERN_RESPONSE_CACHE={'BACKEND': ''}):
+            with self.assertNumQueries(2):
+                res = self.client.get(url)
+
+        self.assertIn('desc="2 queries"', res['Server-Timing'])
+
+    def test_labelled_by_viewset_action(self):
+        """Test - Observations are labelled by viewset and action"""
+        before = observations(
+            'http_request_duration_seconds',
+            'PatternViewSet.list', 'GET', '200')
+        detail_before = observations(
+            'http_request_db_queries', 'PatternViewSet.retrieve')
+        pattern = Pattern.objects.get()
+
+        self.client.get(reverse('pattern:pattern-list'))
+        self.client.head(
+            reverse('pattern:pattern-detail', args=[pattern.id]))
+
+        self.assertEqual(observations(
+            'http_request_duration_seconds',
+            'PatternViewSet.list', 'GET', '200'), before + 1)
+        self.assertEqual(observations(
+            'http_request_db_queries', 'PatternViewSet.retrieve'),
+            detail_before + 1)
+
+    def test_unresolved(self):
+        """Test - Requests matching no URL share one label"""
+        before = observations('http_request_db_queries', 'unresolved')
+
+        self.client.get('/no/such/path/')
+
+        self.assertEqual(
+            observations('http_request_db_queries', 'unresolved'),
+            before + 1)
+
+    def test_sync_and_async_capable(self):
+        """Test - The middleware runs in the mode of the chain it wraps"""
+        async def async_get_response(request):
+            return HttpResponse()
+
+        self.assertTrue(asyncio.iscoroutinefunction(
+            RequestMetricsMiddleware(async_get_response)))
+        self.assertFalse(asyncio.iscoroutinefunction(
+            RequestMetricsMiddleware(lambda request: HttpResponse())))
+
+    def test_async_counts_queries(self):
+        """Test - Under ASGI the queries of sync views are still counted"""
+        token = Token.objects.create(user=self.user)
+        url = reverse('pattern:pattern-list')
+
+        sync = Client().get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        asynchronous = async_get(
+            self.async_client, url, authorization=f'Token {token.key}')
+
+        self.assertEqual(asynchronous.status_code, 200)
+        self.assertGreater(timing(sync, 'db'), 0)
+        self.assertEqual(timing(asynchronous, 'db'), timing(sync, 'db'))
+
+    def test_serializer_time_counted(self):
+        """Test - Time spent in serializers counts as serialization"""
+        token = Token.objects.create(user=self.user)
+        url = reverse('pattern:pattern-detail',
+                      args=[Pattern.objects.get().id])
+        to_representation = Serializer.to_representation
+
+        def slow(serializer, instance):
+            time.sleep(0.05)
+            return to_representation(serializer, instance)
+
+        with patch.object(Serializer, 'to_representation', slow):
+            sync = self.client.get(url)
+            asynchronous = async_get(
+                self.async_client, url, authorization=f'Token {token.key}')
+
+        self.assertGreaterEqual(timing(sync, 'serialize'), 50)
+        self.assertGreaterEqual(timing(asynchronous, 'serialize'), 50)
+
+    @override_settings(REQUEST_METRICS={
+        'ENABLED': True, 'SERVER_TIMING': False,
+    })
+    def test_server_timing_off(self):
+        """Test - The header can be left off, keeping the metrics"""
+        res = self.client.get(reverse('user:me'))
+
+        self.assertNotIn('Server-Timing', res)
+
+
+class ServerTimingDefaultTests(TestCase):
+
+    def test_off_by_default(self):
+        """Test - Clients are not sent timings unless configured to be"""
+        res = self.client.get(reverse('user:me'))
+
+        self.assertNotIn('Server-Timing', res)
@@ -2,6 +2,7 @@
 Tests for Models
 """
 from unittest.mock import patch
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from core import models
@@ -74,6 +75,16 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(tag), tag.name)
 
+    def test_tag_name_unique_per_user(self):
+        """Test - A User cannot own two Tags with the same name"""
+        user = create_user()
+        other = create_user(email='other@example.com')
+        models.Tag.objects.create(user=user, name='Tag1')
+        models.Tag.objects.create(user=other, name='Tag1')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Tag1')
+
     def test_create_datastructure(self):
         """Test - Successfully Create a Data Structure"""
         user = create_user()
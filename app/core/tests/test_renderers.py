@@ -0,0 +1,199 @@
+"""
+Tests for the orjson-backed JSON renderer and parser
+"""
+import datetime
+import decimal
+import io
+import json
+import uuid
+from collections import OrderedDict
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from core import renderers as fast
+from core.models import Datastructure, Pattern, Tag
+from user.tests.test_user_api import create_user
+
+
+SAMPLE = OrderedDict([
+    ('id', 1),
+    ('title', 'Überblick "quoted" \\ </script>\n  '),
+    ('emoji', '\U0001f600'),
+    ('nested', [{'id': 2, 'name': None}, [], {}]),
+    ('flags', [True, False]),
+    ('when', datetime.datetime(
+        2021, 5, 1, 12, 0, tzinfo=datetime.timezone.utc)),
+    ('day', datetime.date(2021, 5, 1)),
+    ('price', decimal.Decimal('1.50')),
+    ('uuid', uuid.UUID(int=1)),
+    ('lazy', gettext_lazy('Not found.')),
+    ('pair', (1, 2)),
+    ('big', 2 ** 70),
+    ('ratio', 0.5),
+])
+
+
+def stdlib_render(data, **kwargs):
+    return renderers.JSONRenderer().render(data, **kwargs)
+
+
+class JSONRendererTests(SimpleTestCase):
+
+    def test_same_bytes(self):
+        """Test - orjson output matches DRF's byte for byte"""
+        for data in (SAMPLE, [SAMPLE], {'big': 2 ** 70}, [], 'text', 3):
+            self.assertEqual(
+                fast.JSONRenderer().render(data), stdlib_render(data))
+
+    @skipUnless(fast.orjson, 'orjson is not installed')
+    def test_uses_orjson(self):
+        """Test - Plain data is encoded by orjson"""
+        with patch.object(fast.orjson, 'dumps', wraps=fast.orjson.dumps) \
+                as dumps:
+            fast.JSONRenderer().render({'id': 1})
+
+        dumps.assert_called_once()
+
+    def test_none(self):
+        """Test - No data renders an empty body"""
+        self.assertEqual(fast.JSONRenderer().render(None), b'')
+
+    def test_indent(self):
+        """Test - Indented output is left to DRF"""
+        for kwargs in (
+            {'accepted_media_type': 'application/json; indent=4'},
+            {'renderer_context': {'indent': 2}},
+        ):
+            self.assertEqual(
+                fast.JSONRenderer().render(SAMPLE, **kwargs),
+                stdlib_render(SAMPLE, **kwargs))
+
+    @skipUnless(fast.orjson, 'orjson is not installed')
+    @override_settings(API_JSON_BACKEND='stdlib')
+    def test_stdlib_backend(self):
+        """Test - The stdlib backend never calls orjson"""
+        with patch.object(fast.orjson, 'dumps') as dumps:
+            body = fast.JSONRenderer().render(SAMPLE)
+
+        dumps.assert_not_called()
+        self.assertEqual(body, stdlib_render(SAMPLE))
+
+    def test_orjson_missing(self):
+        """Test - auto falls back to stdlib, orjson is a config error"""
+        with patch.object(fast, 'orjson', None):
+            self.assertEqual(
+                fast.JSONRenderer().render(SAMPLE), stdlib_render(SAMPLE))
+            with override_settings(API_JSON_BACKEND='orjson'):
+                with self.assertRaises(ImproperlyConfigured):
+                    fast.JSONRenderer().render(SAMPLE)
+
+    @override_settings(API_JSON_BACKEND='simplejson')
+    def test_unknown_backend(self):
+        """Test - Unknown backends are a configuration error"""
+        with self.assertRaises(ImproperlyConfigured):
+            fast.JSONRenderer().render(SAMPLE)
+
+
+class JSONParserTests(SimpleTestCase):
+
+    def parse(self, parser, body, encoding='utf-8'):
+        return parser.parse(
+            io.BytesIO(body), 'application/json', {'encoding': encoding})
+
+    def test_same_data(self):
+        """Test - Documents parse to the same data as with DRF"""
+        for body in (
+            stdlib_render(json.loads(stdlib_render(SAMPLE))),
+            b' {"a": [1, 2.5, -0.0, 1e300, "\\ud83d\\ude00"]}\n',
+            b'{"a": 1, "a": 2}',
+            b'{"big": 123456789012345678901234567890}',
+            b'"\\ud800"',
+        ):
+            self.assertEqual(
+                self.parse(fast.JSONParser(), body),
+                self.parse(parsers.JSONParser(), body))
+
+    def test_other_charsets(self):
+        """Test - Bodies in other charsets are decoded as declared"""
+        body = '{"title": "Überblick"}'.encode('latin-1')
+
+        data = self.parse(fast.JSONParser(), body, encoding='latin-1')
+
+        self.assertEqual(data, {'title': 'Überblick'})
+
+    def test_errors(self):
+        """Test - Invalid documents fail with DRF's messages"""
+        for body in (b'{"a": ', b'{"a": NaN}', b'\xef\xbb\xbf{}', b''):
+            with self.assertRaises(ParseError) as expected:
+                self.parse(parsers.JSONParser(), body)
+            with self.assertRaises(ParseError) as raised:
+                self.parse(fast.JSONParser(), body)
+
+            self.assertEqual(
+                str(raised.exception.detail),
+                str(expected.exception.detail))
+
+
+class JSONBackendApiTests(TestCase):
+    """Test - The pattern and user APIs answer the same with either library"""
+
+    def setUp(self):
+        self.user = create_user(
+            email='user@example.com', password='testpass123', name='Zoë')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        pattern = Pattern.objects.create(
+            user=self.user, title='Fenwick   tree', link='x')
+        pattern.tags.add(Tag.objects.create(user=self.user, name='Bäume'))
+        pattern.datastructures.add(
+            Datastructure.objects.create(user=self.user, name='Array'))
+        self.urls = [
+            reverse('user:me'),
+            reverse('pattern:pattern-list'),
+            reverse('pattern:pattern-detail', args=[pattern.id]),
+            reverse('pattern:tag-list') + '?with_counts=1',
+            reverse('pattern:datastructure-list'),
+            reverse('pattern:tag-autocomplete') + '?q=b',
+        ]
+
+    @override_settings(PATTERN_RESPONSE_CACHE={'BACKEND': ''})
+    def test_reads(self):
+        """Test - Read responses are byte-identical"""
+        for url in self.urls:
+            res = self.client.get(url)
+            with override_settings(API_JSON_BACKEND='stdlib'):
+                expected = self.client.get(url)
+
+            self.assertEqual(res.content, expected.content, url)
+
+    def test_writes(self):
+        """Test - JSON bodies are parsed and answered the same"""
+        payload = {'title': 'Überblick', 'tags': [{'name': 'Bäume'}]}
+        res = self.client.post(
+            reverse('pattern:pattern-list'), payload, format='json')
+        with override_settings(API_JSON_BACKEND='stdlib'):
+            expected = self.client.post(
+                reverse('pattern:pattern-list'), payload, format='json')
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(
+            json.loads(res.content) | {'id': None},
+            json.loads(expected.content) | {'id': None})
+
+    def test_parse_error(self):
+        """Test - Malformed bodies get DRF's 400"""
+        res = self.client.post(
+            reverse('pattern:pattern-list'), '{"title": ',
+            content_type='application/json')
+
+        self.assertEqual(res.status_code, 400)
+        self.assertTrue(res.json()['detail'].startswith('JSON parse error'))
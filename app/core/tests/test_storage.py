@@ -0,0 +1,63 @@
+"""
+Tests for the atomic file storage
+"""
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from core.storage import AtomicFileSystemStorage
+
+
+class AtomicFileSystemStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = AtomicFileSystemStorage(
+            location=self.location, file_permissions_mode=0o644)
+
+    def _files(self, directory=''):
+        return sorted(os.listdir(os.path.join(self.location, directory)))
+
+    def test_save(self):
+        """Test - Saved content lands under its name with no temp files"""
+        name = self.storage.save('a/b/file.txt', ContentFile(b'hello'))
+
+        self.assertEqual(name, 'a/b/file.txt')
+        with self.storage.open(name) as saved:
+            self.assertEqual(saved.read(), b'hello')
+        self.assertEqual(self._files('a/b'), ['file.txt'])
+        mode = os.stat(self.storage.path(name)).st_mode & 0o777
+        self.assertEqual(mode, 0o644)
+
+    def test_save_never_overwrites(self):
+        """Test - A taken name gets an alternative instead of overwriting"""
+        self.storage.save('file.txt', ContentFile(b'first'))
+        real_exists = self.storage.exists
+        checked = []
+
+        def exists(name):
+            """Lose the race: the name looks free when first checked"""
+            checked.append(name)
+            return len(checked) > 1 and real_exists(name)
+
+        with patch.object(self.storage, 'exists', side_effect=exists):
+            name = self.storage.save('file.txt', ContentFile(b'second'))
+
+        self.assertNotEqual(name, 'file.txt')
+        with self.storage.open('file.txt') as first:
+            self.assertEqual(first.read(), b'first')
+        self.assertEqual(len(self._files()), 2)
+
+    def test_failed_write_leaves_nothing(self):
+        """Test - A write that fails part way publishes nothing"""
+        content = ContentFile(b'data')
+        with patch.object(content, 'chunks', side_effect=IOError):
+            with self.assertRaises(IOError):
+                self.storage.save('file.txt', content)
+
+        self.assertEqual(self._files(), [])
@@ -0,0 +1,38 @@
+"""
+Operational views for the API
+"""
+from django.http import HttpResponse
+
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from core.db.stats import connection_stats
+from core.metrics import REGISTRY
+from user.authentication import CachedTokenAuthentication
+
+
+class DatabaseStatsView(APIView):
+    """Connection reuse and pool counters for this worker process"""
+    authentication_classes = [
+        CachedTokenAuthentication,
+        *api_settings.DEFAULT_AUTHENTICATION_CLASSES,
+    ]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(connection_stats())
+
+
+class MetricsView(APIView):
+    """Request and connection metrics for this worker process, in the
+    Prometheus text format"""
+    authentication_classes = DatabaseStatsView.authentication_classes
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(
+            REGISTRY.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PatternConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pattern'
+
+    def ready(self):
+        from pattern import signals  # noqa: F401
@@ -0,0 +1,178 @@
+"""
+Per-user response caching and conditional GETs for the Pattern APIs.
+
+A User's data version counts the writes to their Patterns, Tags and
+Datastructures. Each write bumps it in its own transaction, and ETags and
+cache keys are derived from it, so a write made by any process changes
+them all and every worker stops serving what it cached or validated
+before. Reading it is a primary key lookup.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections, router
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.cache import parse_etags
+from django.utils.http import http_date, urlencode
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.cache import build_cache
+from core.models import DataVersion, Pattern
+
+
+_UNSET = object()
+_response_cache = _UNSET
+
+
+def get_response_cache():
+    """Return the cache configured by PATTERN_RESPONSE_CACHE"""
+    global _response_cache
+    if _response_cache is _UNSET:
+        _response_cache = build_cache(
+            settings.PATTERN_RESPONSE_CACHE, key_prefix='pattern-response:')
+
+    return _response_cache
+
+
+@receiver(setting_changed)
+def _reset_response_cache(setting, **kwargs):
+    global _response_cache
+    if setting == 'PATTERN_RESPONSE_CACHE':
+        _response_cache = _UNSET
+
+
+def data_version(user_id):
+    """Return the User's data version, '0' before their first write"""
+    version = DataVersion.objects.filter(pk=user_id).values_list(
+        'version', flat=True).first()
+    return str(version or 0)
+
+
+def bump_versions(user_ids):
+    """Bump the data version of every User in user_ids.
+
+    Call it after the writes it covers, in their transaction if there is
+    one. The bump locks the version row until commit, so concurrent writes
+    bump one after the other, and each commit leaves a version no reader
+    has seen before.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+
+    table = DataVersion._meta.db_table
+    with connections[router.db_for_write(DataVersion)].cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO "{table}" ("user_id", "version") '
+            f'SELECT user_id, 1 FROM unnest(%s::bigint[]) AS user_id '
+            f'ON CONFLICT ("user_id") DO UPDATE '
+            f'SET "version" = "{table}"."version" + 1',
+            [user_ids],
+        )
+
+
+def touch_patterns(pattern_ids):
+    """Mark Patterns modified now, after a change to their relations"""
+    Pattern.objects.filter(pk__in=pattern_ids).update(
+        modified=timezone.now())
+
+
+class CachedResponseMixin:
+    """Serve list responses from the per-user cache.
+
+    Responses carry a strong ETag derived from the cache key, and requests
+    whose If-None-Match matches it get a 304 after the version lookup alone.
+    ETags work with the cache disabled too. The key includes the scheme and
+    host, which the absolute URLs in responses are built from.
+    """
+    cached_actions = ('list',)
+
+    def _cache_key(self, request, version):
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        return ':'.join([
+            str(request.user.pk),
+            version,
+            type(self).__name__,
+            self.action,
+            str(self.kwargs.get(self.lookup_field, '')),
+            request.scheme,
+            request.get_host(),
+            params,
+        ])
+
+    def _not_modified(self, request, etag):
+        header = request.headers.get('If-None-Match')
+        if not header:
+            return False
+        etags = [
+            tag[2:] if tag.startswith('W/') else tag
+            for tag in parse_etags(header)
+        ]
+        return '*' in etags or etag in etags
+
+    def _etag(self, request, key):
+        return '"{}"'.format(hashlib.sha1(
+            f'{key}:{request.accepted_renderer.format}'.encode()
+        ).hexdigest())
+
+    def _validated(self, response, etag):
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        key = self._cache_key(request, data_version(request.user.pk))
+        etag = self._etag(request, key)
+        if self._not_modified(request, etag):
+            return self._validated(
+                Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+        cache = get_response_cache()
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            response = Response(cached['data'])
+            if cached['last_modified']:
+                response['Last-Modified'] = cached['last_modified']
+            return self._validated(response, etag)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        if cache is not None:
+            cache.set(key, {
+                'data': response.data,
+                'last_modified': response.get('Last-Modified'),
+            })
+        return self._validated(response, etag)
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    """Serve retrieve responses from the per-user cache too.
+
+    Detail responses also carry the object's Last-Modified time.
+    """
+    cached_actions = ('list', 'retrieve')
+
+    def get_last_modified(self, instance):
+        """Return when instance's representation last changed"""
+        return getattr(instance, 'modified', None)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            self._retrieve, request, *args, **kwargs)
+
+    def _retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        response = Response(self.get_serializer(instance).data)
+        modified = self.get_last_modified(instance)
+        if modified is not None:
+            response['Last-Modified'] = http_date(modified.timestamp())
+        return response
@@ -0,0 +1,91 @@
+"""
+Streaming exports of a User's Pattern library
+"""
+import csv
+import json
+
+from django.db.models import prefetch_related_objects
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from pattern.serializers import PatternDetailSerializer
+
+
+CSV_COLUMNS = ['id', 'title', 'link', 'description', 'tags', 'datastructures']
+CSV_NAME_SEPARATOR = '|'
+
+
+class _Echo:
+    """File-like object whose write() returns what it was given"""
+
+    def write(self, value):
+        return value
+
+
+def iter_patterns(queryset, chunk_size):
+    """Yield Patterns from a server-side cursor, prefetching per chunk.
+
+    Only chunk_size Patterns and their Tags and Datastructures are held in
+    memory at once, whatever the size of the library.
+    """
+    batch = []
+    for pattern in queryset.prefetch_related(None).iterator(
+            chunk_size=chunk_size):
+        batch.append(pattern)
+        if len(batch) >= chunk_size:
+            prefetch_related_objects(batch, 'tags', 'datastructures')
+            yield from batch
+            batch = []
+
+    if batch:
+        prefetch_related_objects(batch, 'tags', 'datastructures')
+        yield from batch
+
+
+def iter_json_lines(patterns):
+    """Yield one JSON document per Pattern"""
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for pattern in patterns:
+        data = PatternDetailSerializer(pattern).data
+        yield encoder.encode(data) + '\n'
+
+
+def iter_csv(patterns):
+    """Yield a CSV header and then one CSV row per Pattern"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for pattern in patterns:
+        yield writer.writerow([
+            pattern.id,
+            pattern.title,
+            pattern.link,
+            pattern.description,
+            CSV_NAME_SEPARATOR.join(tag.name for tag in pattern.tags.all()),
+            CSV_NAME_SEPARATOR.join(
+                ds.name for ds in pattern.datastructures.all()),
+        ])
+
+
+class JSONLinesRenderer(BaseRenderer):
+    """Negotiates JSON Lines exports and renders their error responses"""
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+    charset = 'utf-8'
+    stream = staticmethod(iter_json_lines)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=JSONEncoder) + '\n'
+
+
+class CSVRenderer(BaseRenderer):
+    """Negotiates CSV exports and renders their error responses"""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+    stream = staticmethod(iter_csv)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        writer = csv.writer(_Echo())
+        rows = data.items() if isinstance(data, dict) else [[data]]
+        return ''.join(writer.writerow(row) for row in rows)
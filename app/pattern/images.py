@@ -0,0 +1,129 @@
+"""
+Reference counting and garbage collection of Pattern image files.
+
+Identical images share one content-addressed file, so a file may only be
+deleted once no Pattern refers to it. The counts are taken from the
+Patterns themselves, through an index on Pattern.image, so they can't
+drift from the rows. A file must also have gone untouched for the grace
+period: an upload reusing it touches it before its reference commits.
+"""
+import collections
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from core.models import PATTERN_IMAGE_DIR, Pattern
+from core.storage import AtomicFileSystemStorage
+from pattern.thumbnails import delete_derivatives
+
+
+logger = logging.getLogger(__name__)
+
+
+def reference_counts(names):
+    """Return {name: number of Patterns using it} for image names"""
+    return Pattern._meta.get_field('image').reference_counts(names)
+
+
+def delete_unreferenced(names, storage=default_storage, grace=None,
+                        dry_run=False):
+    """Delete those image files no Pattern refers to, and their derivatives.
+
+    Files modified within the last grace seconds (PATTERN_IMAGE_GC_GRACE
+    by default) are kept. Returns the names deleted.
+    """
+    if grace is None:
+        grace = settings.PATTERN_IMAGE_GC_GRACE
+    cutoff = time.time() - grace
+
+    deleted = []
+    for name, count in reference_counts(names).items():
+        if count:
+            continue
+        try:
+            modified = os.stat(storage.path(name)).st_mtime
+        except FileNotFoundError:
+            continue
+        if modified > cutoff:
+            continue
+        if not dry_run:
+            storage.delete(name)
+            delete_derivatives(name, storage)
+        deleted.append(name)
+
+    return deleted
+
+
+def _release(names):
+    try:
+        delete_unreferenced(names)
+    except Exception:
+        logger.exception('Could not release images %s', names)
+
+
+def release_images(*names):
+    """Delete image files once the current transaction commits, if unused"""
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: _release(names))
+
+
+def scan_files(path):
+    """Yield os.DirEntry for every file below path, one directory at a time"""
+    try:
+        entries = os.scandir(path)
+    except FileNotFoundError:
+        return
+
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def collect_garbage(storage=default_storage, batch_size=500, grace=None,
+                    dry_run=False):
+    """Delete orphaned image files and abandoned partial uploads.
+
+    The image directory is scanned lazily and checked against the database
+    batch_size files at a time, so memory use doesn't grow with the number
+    of files. Returns counts of the files scanned, deleted and kept.
+    """
+    if grace is None:
+        grace = settings.PATTERN_IMAGE_GC_GRACE
+    cutoff = time.time() - grace
+    root = storage.path(PATTERN_IMAGE_DIR)
+    stats = collections.Counter(scanned=0, deleted=0, kept=0, partial=0)
+
+    def flush(batch):
+        deleted = delete_unreferenced(
+            batch, storage=storage, grace=grace, dry_run=dry_run)
+        stats['deleted'] += len(deleted)
+        stats['kept'] += len(batch) - len(deleted)
+        batch.clear()
+
+    batch = []
+    for entry in scan_files(root):
+        stats['scanned'] += 1
+        if entry.name.startswith(AtomicFileSystemStorage.TEMP_PREFIX):
+            if entry.stat(follow_symlinks=False).st_mtime <= cutoff:
+                if not dry_run:
+                    os.unlink(entry.path)
+                stats['partial'] += 1
+            continue
+
+        relative = os.path.relpath(entry.path, storage.location)
+        batch.append(relative.replace(os.sep, '/'))
+        if len(batch) >= batch_size:
+            flush(batch)
+
+    if batch:
+        flush(batch)
+
+    return stats
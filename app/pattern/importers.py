@@ -0,0 +1,156 @@
+"""
+Streaming parsers for bulk Pattern imports
+"""
+import codecs
+import json
+
+from django.utils.translation import gettext as _
+
+
+READ_SIZE = 64 * 1024
+MAX_RECORD_SIZE = 1024 * 1024
+
+# Characters at the end of the buffer a decode error may lie in and still
+# only mean the record goes on in the next chunk
+LOOKAHEAD = 8
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+
+
+class ImportRecordError(Exception):
+    """A single import record could not be decoded"""
+
+    def __init__(self, message, fatal=False):
+        super().__init__(message)
+        self.fatal = fatal
+
+
+def _iter_text(stream, read_size):
+    """Yield decoded text chunks read from a binary stream"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            break
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+def _skip_whitespace(buffer, pos):
+    while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _iter_json_lines(buffer, chunks, max_record_size):
+    """Yield one record per non-blank line"""
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            yield line
+        if len(buffer) > max_record_size:
+            raise ImportRecordError(_('Record too large.'), fatal=True)
+    yield buffer
+
+
+def _incomplete(exc, buffer):
+    """Return whether exc may only be due to the buffer ending too soon.
+
+    Only an unterminated string or an error within the last few
+    characters, the length of the longest token such as a \\uXXXX escape,
+    can be fixed by reading more; anything earlier is a syntax error.
+    """
+    return exc.msg.startswith('Unterminated string') or \
+        exc.pos >= len(buffer) - LOOKAHEAD
+
+
+def _iter_json_array(buffer, chunks, max_record_size):
+    """Yield the elements of a top level JSON array one at a time"""
+    pos = 1
+    expect = 'first'
+    eof = False
+    while True:
+        pos = _skip_whitespace(buffer, pos)
+        complete = False
+        if pos < len(buffer):
+            char = buffer[pos]
+            if expect != 'value' and char == ']':
+                return
+            if expect == 'separator':
+                if char != ',':
+                    raise ImportRecordError(
+                        _("Expecting ',' delimiter."), fatal=True)
+                pos += 1
+                expect = 'value'
+                continue
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as exc:
+                if eof or not _incomplete(exc, buffer):
+                    raise ImportRecordError(exc.msg, fatal=True)
+            else:
+                # A number at the very end may go on in the next chunk
+                complete = end < len(buffer) or eof
+            if complete:
+                yield value
+                pos = end
+                expect = 'separator'
+                continue
+        elif eof:
+            raise ImportRecordError(_('Unterminated JSON array.'), fatal=True)
+
+        if len(buffer) - pos > max_record_size:
+            raise ImportRecordError(_('Record too large.'), fatal=True)
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def iter_records(stream, read_size=READ_SIZE,
+                 max_record_size=MAX_RECORD_SIZE):
+    """Yield (row, record) pairs from a JSON Lines or JSON array body.
+
+    The body is read and decoded in chunks, so only the record being
+    parsed is held in memory. A record that fails to decode is yielded as
+    an ImportRecordError in place of the record; a fatal error ends the
+    stream since the remainder cannot be resynchronised. Syntax errors in
+    an array are fatal as soon as they are read, and no record may exceed
+    max_record_size characters, so a malformed body costs linear time.
+    """
+    chunks = _iter_text(stream, read_size)
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        if buffer.strip(_WHITESPACE):
+            break
+    buffer = buffer.lstrip(_WHITESPACE)
+    if not buffer:
+        return
+
+    if buffer[0] == '[':
+        row = 0
+        try:
+            for row, record in enumerate(_iter_json_array(
+                    buffer, chunks, max_record_size), 1):
+                yield row, record
+        except ImportRecordError as exc:
+            yield row + 1, exc
+        return
+
+    row = 0
+    try:
+        for line in _iter_json_lines(buffer, chunks, max_record_size):
+            if not line.strip(_WHITESPACE):
+                continue
+            row += 1
+            try:
+                yield row, json.loads(line)
+            except ValueError as exc:
+                yield row, ImportRecordError(str(exc))
+    except ImportRecordError as exc:
+        yield row + 1, exc
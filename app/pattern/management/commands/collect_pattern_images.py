@@ -0,0 +1,43 @@
+"""
+Django cmd to delete Pattern image files no Pattern refers to
+"""
+from django.core.management.base import BaseCommand
+
+from pattern.images import collect_garbage
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete orphaned Pattern images, their thumbnails and abandoned '
+        'partial uploads.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Files checked against the database per query.',
+        )
+        parser.add_argument(
+            '--grace', type=int,
+            help=(
+                'Keep files modified within this many seconds. Defaults '
+                'to PATTERN_IMAGE_GC_GRACE.'
+            ),
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report what would be deleted without deleting it.',
+        )
+
+    def handle(self, *args, **options):
+        stats = collect_garbage(
+            batch_size=options['batch_size'],
+            grace=options['grace'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {stats["scanned"]} files. {verb} {stats["deleted"]} '
+            f'orphaned images and {stats["partial"]} partial uploads; '
+            f'kept {stats["kept"]}.'
+        ))
@@ -0,0 +1,26 @@
+"""
+Pagination for the Pattern APIs
+"""
+from django.conf import settings
+
+from rest_framework.pagination import CursorPagination
+
+
+class PatternCursorPagination(CursorPagination):
+    """Keyset pagination over the newest Patterns first"""
+    ordering = ('-id',)
+    page_size = settings.PATTERN_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PATTERN_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        """Page search results by rank, best matches first"""
+        if 'rank' in queryset.query.annotations:
+            return ('-rank', '-id')
+
+        return super().get_ordering(request, queryset, view)
+
+
+class PatternAttrCursorPagination(PatternCursorPagination):
+    """Keyset pagination over Tags and Datastructures by name"""
+    ordering = ('-name', '-id')
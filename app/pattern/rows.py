@@ -0,0 +1,77 @@
+"""
+Read-only Pattern representations built straight from .values() rows.
+
+Listing Patterns through PatternSerializer builds a model instance and
+walks every serializer field for each Pattern and each of its Tags and
+Datastructures. The functions here build the same data from plain column
+values instead, with one query per rendered relation, and produce exactly
+the JSON the serializer would.
+"""
+import collections
+
+from core.middleware import serializing
+from core.models import Pattern
+
+
+# Relations rendered nested as {'id', 'name'} objects, or as ids
+RELATIONS = ('tags', 'datastructures')
+
+# Columns rendered as is, with no conversion by their serializer field
+COLUMNS = ('id', 'title', 'link')
+
+
+def supports(fields):
+    """Return whether every one of fields can be rendered from rows"""
+    return all(name in COLUMNS or name in RELATIONS for name in fields)
+
+
+def values(queryset, fields, extra=()):
+    """Return queryset yielding dicts of fields' columns and extra ones"""
+    columns = [name for name in fields if name in COLUMNS]
+    return queryset.prefetch_related(None).values(*columns, *extra)
+
+
+def relation_map(relation, pattern_ids, nested=True):
+    """Return {pattern id: [related item]} ordered by the items' ids"""
+    field = Pattern._meta.get_field(relation)
+    target = field.m2m_reverse_field_name()
+    links = field.remote_field.through.objects.filter(
+        pattern_id__in=pattern_ids).order_by(f'{target}_id')
+
+    items = collections.defaultdict(list)
+    if nested:
+        for pattern_id, pk, name in links.values_list(
+                'pattern_id', f'{target}_id', f'{target}__name'):
+            items[pattern_id].append({'id': pk, 'name': name})
+    else:
+        for pattern_id, pk in links.values_list(
+                'pattern_id', f'{target}_id'):
+            items[pattern_id].append(pk)
+    return items
+
+
+def pattern_rows(rows, fields, compact=()):
+    """Return the representation of each row with fields in order.
+
+    rows are dicts from values(), which may hold extra columns such as
+    the search rank; relations in compact are rendered as lists of ids.
+    """
+    rows = list(rows)
+    ids = [row['id'] for row in rows]
+    related = {
+        relation: relation_map(
+            relation, ids, nested=relation not in compact)
+        for relation in RELATIONS
+        if relation in fields and ids
+    }
+    with serializing():
+        return [
+            {
+                name: (
+                    related[name].get(row['id'], [])
+                    if name in related else row[name]
+                )
+                for name in fields
+            }
+            for row in rows
+        ]
@@ -0,0 +1,42 @@
+"""
+Full-text search over Pattern titles and descriptions
+"""
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+
+SEARCH_CONFIG = 'english'
+
+# Titles outrank descriptions. Kept in step with core.0010's backfill.
+SEARCH_VECTOR = (
+    SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+    SearchVector('description', weight='B', config=SEARCH_CONFIG)
+)
+
+
+def update_search_vectors(queryset):
+    """Recompute the stored search vector of every Pattern in queryset.
+
+    Search results change with it, so the Patterns are touched too.
+    """
+    return queryset.update(
+        search_vector=SEARCH_VECTOR, modified=timezone.now())
+
+
+def search_patterns(queryset, terms):
+    """Keep Patterns matching terms and annotate them with their rank.
+
+    terms use web search syntax: quoted phrases, OR and -excluded words.
+    Matching goes through the GIN index on the stored vectors, so only
+    matching Patterns are ranked. The rank is widened to double precision
+    so it survives the round trip through a pagination cursor exactly.
+    """
+    query = SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(search_vector=query).annotate(rank=Cast(
+        SearchRank(F('search_vector'), query), FloatField()))
@@ -1,16 +1,91 @@
 """
 Serializers for Pattern APIs
 """
+from django.core.files.storage import default_storage
+from django.core.validators import validate_image_file_extension
+from django.utils.translation import gettext as _
+
 from rest_framework import serializers
 
+from core.middleware import TimedSerializerMixin
 from core.models import (
     Pattern,
     Tag,
     Datastructure,
 )
+from pattern.cache import bump_versions, touch_patterns
+from pattern.search import update_search_vectors
+from pattern.uploads import HeaderValidatedImageField
+
+
+def get_or_create_by_name(model, user, names):
+    """Return a {name: obj} map for names, creating missing ones in bulk.
+
+    Existing rows are resolved in one query and the missing ones are
+    inserted with a single bulk insert. Rows a concurrent request inserted
+    first are skipped by the (user, name) constraint and re-read.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+
+    objs = {
+        obj.name: obj
+        for obj in model.objects.filter(user=user, name__in=names)
+    }
+    missing = [name for name in names if name not in objs]
+    if missing:
+        model.objects.bulk_create(
+            [model(user=user, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        objs.update(
+            (obj.name, obj)
+            for obj in model.objects.filter(user=user, name__in=missing)
+        )
+        bump_versions([user.pk])
+
+    return objs
+
+
+def link_patterns(relation, pairs):
+    """Insert every (pattern, obj) row of a Pattern M2M in one query"""
+    field = Pattern._meta.get_field(relation)
+    through = field.remote_field.through
+    source = f'{field.m2m_field_name()}_id'
+    target = f'{field.m2m_reverse_field_name()}_id'
+    through.objects.bulk_create(
+        [
+            through(**{source: pattern.pk, target: obj.pk})
+            for pattern, obj in pairs
+        ],
+        ignore_conflicts=True,
+    )
+    touch_patterns({pattern.pk for pattern, obj in pairs})
+    bump_versions({pattern.user_id for pattern, obj in pairs})
 
 
-class DatastructureSerializer(serializers.ModelSerializer):
+class PatternAttrSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
+    """Base serializer for Tags and Datastructures"""
+
+    def validate_name(self, value):
+        """Reject renaming onto a name the User already uses"""
+        if self.instance is None:
+            return value
+
+        duplicate = type(self.instance).objects.filter(
+            user=self.instance.user,
+            name=value,
+        ).exclude(pk=self.instance.pk)
+        if duplicate.exists():
+            msg = _('An item with this name already exists.')
+            raise serializers.ValidationError(msg, code='unique')
+
+        return value
+
+
+class DatastructureSerializer(PatternAttrSerializer):
     """Serializer for datastructures."""
 
     class Meta:
@@ -19,7 +94,7 @@ class DatastructureSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(PatternAttrSerializer):
     """Serializer for Tags"""
 
     class Meta:
@@ -28,7 +103,74 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class PatternSerializer(serializers.ModelSerializer):
+class DatastructureCountSerializer(DatastructureSerializer):
+    """Datastructure with the number of Patterns using it"""
+    pattern_count = serializers.IntegerField(read_only=True)
+
+    class Meta(DatastructureSerializer.Meta):
+        fields = DatastructureSerializer.Meta.fields + ['pattern_count']
+
+
+class TagCountSerializer(TagSerializer):
+    """Tag with the number of Patterns using it"""
+    pattern_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['pattern_count']
+
+
+class PatternListSerializer(serializers.ListSerializer):
+    """Create many Patterns with a fixed number of queries"""
+
+    def create(self, validated_data):
+        """Bulk insert Patterns, then their Tags and Datastructures"""
+        relations = ('tags', 'datastructures')
+        related = [
+            {relation: attrs.pop(relation, []) for relation in relations}
+            for attrs in validated_data
+        ]
+        patterns = Pattern.objects.bulk_create(
+            [Pattern(**attrs) for attrs in validated_data]
+        )
+        for relation in relations:
+            model = Pattern._meta.get_field(relation).related_model
+            by_user = {}
+            for pattern, items in zip(patterns, related):
+                names = by_user.setdefault(pattern.user, [])
+                names.extend(item['name'] for item in items[relation])
+            objs = {
+                user: get_or_create_by_name(model, user, names)
+                for user, names in by_user.items()
+            }
+            link_patterns(relation, [
+                (pattern, objs[pattern.user][item['name']])
+                for pattern, items in zip(patterns, related)
+                for item in items[relation]
+            ])
+        update_search_vectors(Pattern.objects.filter(
+            pk__in=[pattern.pk for pattern in patterns]))
+        bump_versions({pattern.user_id for pattern in patterns})
+
+        return patterns
+
+
+class SparseFieldsetMixin:
+    """Render only the named fields, with the relations named in compact
+    as lists of primary keys instead of nested objects"""
+
+    def __init__(self, *args, fields=None, compact=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in compact:
+            if name in self.fields:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    many=True, read_only=True)
+
+
+class PatternSerializer(TimedSerializerMixin, SparseFieldsetMixin,
+                        serializers.ModelSerializer):
     """Serializer for Patterns"""
     tags = TagSerializer(many=True, required=False)
     datastructures = DatastructureSerializer(many=True, required=False)
@@ -37,26 +179,23 @@ class PatternSerializer(serializers.ModelSerializer):
         model = Pattern
         fields = ['id', 'title', 'link', 'tags', 'datastructures']
         read_only_fields = ['id']
+        list_serializer_class = PatternListSerializer
+
+    def _get_or_create_attrs(self, relation, items, pattern):
+        """Attach named Tags or Datastructures to pattern in bulk"""
+        model = Pattern._meta.get_field(relation).related_model
+        names = [item['name'] for item in items]
+        objs = get_or_create_by_name(
+            model, self.context['request'].user, names)
+        link_patterns(relation, [(pattern, obj) for obj in objs.values()])
 
     def _get_or_create_tags(self, tags, pattern):
         """Handle getting or creating tags as needed"""
-        auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            pattern.tags.add(tag_obj)
+        self._get_or_create_attrs('tags', tags, pattern)
 
     def _get_or_create_datastructures(self, datastructures, pattern):
         """Handle getting or creating datastructures as needed"""
-        auth_user = self.context['request'].user
-        for datastructure in datastructures:
-            datastructure_obj, created = Datastructure.objects.get_or_create(
-                user=auth_user,
-                **datastructure,
-            )
-            pattern.datastructures.add(datastructure_obj)
+        self._get_or_create_attrs('datastructures', datastructures, pattern)
 
     def create(self, validated_data):
         """Create a Pattern"""
@@ -74,7 +213,7 @@ class PatternSerializer(serializers.ModelSerializer):
         datastructures = validated_data.pop('datastructures', None)
         if tags is not None:
             instance.tags.clear()
-            self._get_or_create_tags(tags, instance)\
+            self._get_or_create_tags(tags, instance)
 
         if datastructures is not None:
             instance.datastructures.clear()
@@ -87,18 +226,34 @@ class PatternSerializer(serializers.ModelSerializer):
         return instance
 
 
-class PatternImageSerializer(serializers.ModelSerializer):
+class PatternImageSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     """Serializer for uploading images to Patterns"""
+    image = HeaderValidatedImageField(
+        validators=[validate_image_file_extension])
 
     class Meta:
         model = Pattern
         fields = ['id', 'image']
         read_only_fields = ['id']
-        extra_kwargs = {'image': {'required': 'True'}}
 
 
 class PatternDetailSerializer(PatternSerializer):
     """Serializer for the pattern detail view"""
+    thumbnails = serializers.SerializerMethodField()
 
     class Meta(PatternSerializer.Meta):
-        fields = PatternSerializer.Meta.fields + ['description']
+        fields = PatternSerializer.Meta.fields + ['description', 'thumbnails']
+
+    def get_thumbnails(self, obj) -> dict:
+        """Map each thumbnail size to its URL per image format"""
+        request = self.context.get('request')
+        thumbnails = {}
+        for size, formats in obj.thumbnails.items():
+            thumbnails[size] = {}
+            for fmt, name in formats.items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                thumbnails[size][fmt] = url
+        return thumbnails
@@ -0,0 +1,85 @@
+"""
+Signal handlers bumping Users' data versions on every write, touching
+Patterns whose Tags or Datastructures change, keeping search vectors
+current and releasing the images of deleted Patterns
+"""
+from django.conf import settings
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from core.models import (
+    DataVersion,
+    Pattern,
+    Tag,
+    Datastructure,
+)
+from pattern.cache import bump_versions, touch_patterns
+from pattern.images import release_images
+from pattern.search import update_search_vectors
+
+
+SEARCHED_FIELDS = {'title', 'description'}
+
+
+@receiver(post_save, sender=Pattern)
+def pattern_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or SEARCHED_FIELDS & set(update_fields):
+        update_search_vectors(Pattern.objects.filter(pk=instance.pk))
+    bump_versions([instance.user_id])
+
+
+@receiver(post_delete, sender=Pattern)
+def pattern_deleted(sender, instance, **kwargs):
+    release_images(instance.image.name)
+    bump_versions([instance.user_id])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Datastructure)
+def pattern_attr_saved(sender, instance, **kwargs):
+    bump_versions([instance.user_id])
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    DataVersion.objects.filter(pk=instance.pk).delete()
+
+
+def _linked_pattern_ids(instance):
+    """Return the ids of the Patterns linked to a Tag or Datastructure"""
+    return list(instance.pattern_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Datastructure)
+def pattern_attr_deleting(sender, instance, **kwargs):
+    instance._linked_pattern_ids = _linked_pattern_ids(instance)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Datastructure)
+def pattern_attr_deleted(sender, instance, **kwargs):
+    touch_patterns(getattr(instance, '_linked_pattern_ids', ()))
+    bump_versions([instance.user_id])
+
+
+@receiver(m2m_changed, sender=Pattern.tags.through)
+@receiver(m2m_changed, sender=Pattern.datastructures.through)
+def pattern_links_changed(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """Touch the Patterns whose links changed, once they have"""
+    if action == 'pre_clear' and reverse:
+        instance._linked_pattern_ids = _linked_pattern_ids(instance)
+    elif action.startswith('post_'):
+        if not reverse:
+            touch_patterns([instance.pk])
+        elif action == 'post_clear':
+            touch_patterns(getattr(instance, '_linked_pattern_ids', ()))
+        else:
+            touch_patterns(pk_set)
+        bump_versions([instance.user_id])
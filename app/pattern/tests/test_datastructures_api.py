@@ -60,7 +60,7 @@ class PrivateIngredientsApiTests(TestCase):
         datastructures = Datastructure.objects.all().order_by('-name')
         serializer = DatastructureSerializer(datastructures, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test list of ingredients is limited to authenticated user."""
@@ -73,9 +73,9 @@ class PrivateIngredientsApiTests(TestCase):
         res = self.client.get(DS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], datastructure.name)
-        self.assertEqual(res.data[0]['id'], datastructure.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], datastructure.name)
+        self.assertEqual(res.data['results'][0]['id'], datastructure.id)
 
     def test_update_datastructure(self):
         """Test - Update a Datastructure"""
@@ -116,8 +116,8 @@ class PrivateIngredientsApiTests(TestCase):
 
         s1 = DatastructureSerializer(ds1)
         s2 = DatastructureSerializer(ds2)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filtered_ingredients_unique(self):
         """Test - Filtered datastructures returns list unique to DS"""
@@ -136,4 +136,30 @@ class PrivateIngredientsApiTests(TestCase):
 
         res = self.client.get(DS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_datastructures_with_counts(self):
+        """Test - with_counts adds each Datastructure's Pattern count"""
+        used = Datastructure.objects.create(user=self.user, name='Array')
+        unused = Datastructure.objects.create(user=self.user, name='Trie')
+        for title in ('Sliding Window', 'Two Pointers'):
+            pattern = Pattern.objects.create(title=title, user=self.user)
+            pattern.datastructures.add(used)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(DS_URL, {'with_counts': 1})
+
+        counts = {ds['id']: ds['pattern_count'] for ds in res.data['results']}
+        self.assertEqual(counts, {used.id: 2, unused.id: 0})
+
+    def test_datastructures_autocomplete(self):
+        """Test - Datastructure names are suggested by prefix"""
+        for name in ['Stack', 'String', 'Heap']:
+            Datastructure.objects.create(user=self.user, name=name)
+
+        res = self.client.get(
+            reverse('pattern:datastructure-autocomplete'), {'q': 'st'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [ds['name'] for ds in res.data], ['Stack', 'String'])
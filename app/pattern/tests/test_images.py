@@ -0,0 +1,134 @@
+"""
+Tests for releasing and garbage collecting Pattern image files
+"""
+import io
+import os
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Pattern
+from pattern import images, thumbnails
+from pattern.tests.test_thumbnails import (
+    THUMBNAILS,
+    MediaRootMixin,
+    image_bytes,
+)
+
+
+@override_settings(PATTERN_THUMBNAILS=THUMBNAILS, PATTERN_IMAGE_GC_GRACE=0)
+class ReleaseTests(MediaRootMixin, TestCase):
+    """Test - Releasing images no Pattern refers to"""
+
+    def upload(self, pattern, content):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = client.post(
+                reverse('pattern:pattern-upload-image', args=[pattern.id]),
+                {'image': ContentFile(content, name='upload.png')},
+                format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        pattern.refresh_from_db()
+        return pattern.image.name
+
+    def test_replaced_image_deleted(self):
+        """Test - Replacing an image deletes the old file and thumbnails"""
+        old = self.upload(self.pattern, image_bytes())
+        self.assertTrue(default_storage.exists(
+            thumbnails.derivative_name(old, 'small', 'webp')))
+
+        new = self.upload(self.pattern, image_bytes(size=(50, 50)))
+
+        self.assertNotEqual(old, new)
+        self.assertFalse(default_storage.exists(old))
+        self.assertFalse(default_storage.exists(
+            thumbnails.derivative_name(old, 'small', 'webp')))
+        self.assertTrue(default_storage.exists(new))
+
+    def test_shared_image_kept(self):
+        """Test - A file still used by another Pattern survives"""
+        other = Pattern.objects.create(user=self.user, title='Stack')
+        shared = self.upload(self.pattern, image_bytes())
+        self.assertEqual(self.upload(other, image_bytes()), shared)
+
+        self.upload(self.pattern, image_bytes(size=(50, 50)))
+
+        self.assertTrue(default_storage.exists(shared))
+
+    def test_deleted_pattern_releases_image(self):
+        """Test - Deleting a Pattern deletes its unshared image"""
+        name = self.upload(self.pattern, image_bytes())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pattern.delete()
+
+        self.assertFalse(default_storage.exists(name))
+
+    @override_settings(PATTERN_IMAGE_GC_GRACE=3600)
+    def test_recent_image_kept(self):
+        """Test - Files used within the grace period are kept"""
+        name = self.set_image()
+        Pattern.objects.filter(pk=self.pattern.pk).update(image='')
+
+        self.assertEqual(images.delete_unreferenced([name]), [])
+        self.assertTrue(default_storage.exists(name))
+
+
+class CollectGarbageTests(MediaRootMixin, TestCase):
+    """Test - The collect_pattern_images command"""
+
+    def setUp(self):
+        super().setUp()
+        self.used = self.set_image()
+        self.orphan = default_storage.save(
+            'uploads/pattern/legacy.png', ContentFile(image_bytes()))
+        self.partial = default_storage.path(
+            'uploads/pattern/ab/.upload-x.part')
+        os.makedirs(os.path.dirname(self.partial), exist_ok=True)
+        with open(self.partial, 'wb') as f:
+            f.write(b'partial')
+
+        past = time.time() - 7200
+        for path in (self.orphan, self.used):
+            os.utime(default_storage.path(path), (past, past))
+        os.utime(self.partial, (past, past))
+
+    def collect(self, *args):
+        out = io.StringIO()
+        call_command(
+            'collect_pattern_images', '--grace=3600', '--batch-size=1',
+            *args, stdout=out)
+        return out.getvalue()
+
+    def test_collects_orphans(self):
+        """Test - Orphans and partial uploads go, used images stay"""
+        out = self.collect()
+
+        self.assertIn('Deleted 1 orphaned images and 1 partial uploads', out)
+        self.assertFalse(default_storage.exists(self.orphan))
+        self.assertFalse(os.path.exists(self.partial))
+        self.assertTrue(default_storage.exists(self.used))
+
+    def test_dry_run(self):
+        """Test - A dry run reports without deleting anything"""
+        out = self.collect('--dry-run')
+
+        self.assertIn('Would delete 1 orphaned images', out)
+        self.assertTrue(default_storage.exists(self.orphan))
+        self.assertTrue(os.path.exists(self.partial))
+
+    def test_recent_orphans_kept(self):
+        """Test - Orphans written within the grace period are kept"""
+        os.utime(default_storage.path(self.orphan))
+
+        self.collect()
+
+        self.assertTrue(default_storage.exists(self.orphan))
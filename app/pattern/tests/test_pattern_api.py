@@ -1,24 +1,35 @@
 """
 Tests for Pattern APIs
 """
+import csv
+import io
+import json
 import tempfile
 import os
+from unittest.mock import patch
 
 from PIL import Image
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
-from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import (
+    DataVersion,
     Pattern,
     Tag,
     Datastructure,
 )
 
+from pattern.cache import bump_versions, data_version
+from pattern.importers import iter_records
 from pattern.serializers import (
     PatternSerializer,
     PatternDetailSerializer,
@@ -26,6 +37,8 @@ from pattern.serializers import (
 
 
 PATTERN_URL = reverse('pattern:pattern-list')
+BULK_IMPORT_URL = reverse('pattern:pattern-bulk-import')
+EXPORT_URL = reverse('pattern:pattern-export')
 
 
 def detail_url(pattern_id):
@@ -89,7 +102,7 @@ class PrivatePatternApiTests(TestCase):
         patterns = Pattern.objects.all().order_by('-id')
         serializer = PatternSerializer(patterns, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_pattern_detail(self):
         """Test - Get Specific Details of an Algo Pattern"""
@@ -321,9 +334,9 @@ class PrivatePatternApiTests(TestCase):
         s1 = PatternSerializer(r1)
         s2 = PatternSerializer(r2)
         s3 = PatternSerializer(r3)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
 
     def test_filter_by_datastructures(self):
         """Test - Filter Patterns by Data Structures"""
@@ -342,9 +355,760 @@ class PrivatePatternApiTests(TestCase):
         s1 = PatternSerializer(r1)
         s2 = PatternSerializer(r2)
         s3 = PatternSerializer(r3)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
+
+    def test_filter_by_tags_no_duplicates(self):
+        """Test - A Pattern matching several Tags is listed once"""
+        pattern = create_pattern(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='Array')
+        tag2 = Tag.objects.create(user=self.user, name='HashMap')
+        pattern.tags.add(tag1, tag2)
+
+        params = {'tags': f'{tag1.id},{tag2.id}'}
+        res = self.client.get(PATTERN_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [pattern.id])
+
+    def test_filter_by_tags_match_all(self):
+        """Test - match=all keeps only Patterns carrying every Tag"""
+        tag1 = Tag.objects.create(user=self.user, name='Array')
+        tag2 = Tag.objects.create(user=self.user, name='HashMap')
+        both = create_pattern(user=self.user, title='Two Sum')
+        both.tags.add(tag1, tag2)
+        one = create_pattern(user=self.user, title='Binary Search')
+        one.tags.add(tag1)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'}
+        res = self.client.get(PATTERN_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [both.id])
+
+    def test_filter_match_all_across_relations(self):
+        """Test - match=all applies to Tags and Datastructures together"""
+        tag = Tag.objects.create(user=self.user, name='Array')
+        ds1 = Datastructure.objects.create(user=self.user, name='Heap')
+        ds2 = Datastructure.objects.create(user=self.user, name='Stack')
+        match = create_pattern(user=self.user, title='Top K')
+        match.tags.add(tag)
+        match.datastructures.add(ds1, ds2)
+        partial = create_pattern(user=self.user, title='K Way Merge')
+        partial.tags.add(tag)
+        partial.datastructures.add(ds1)
+
+        params = {
+            'tags': f'{tag.id}',
+            'datastructures': f'{ds1.id},{ds2.id}',
+            'match': 'all',
+        }
+        res = self.client.get(PATTERN_URL, params)
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [match.id])
+
+    def test_filter_invalid_match(self):
+        """Test - Unknown match modes are rejected"""
+        res = self.client.get(PATTERN_URL, {'tags': '1', 'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('match', res.data)
+
+    def test_filter_by_tags_without_distinct(self):
+        """Test - Tag filters use EXISTS rather than DISTINCT over a join"""
+        tag = Tag.objects.create(user=self.user, name='Array')
+        create_pattern(user=self.user).tags.add(tag)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(PATTERN_URL, {'tags': f'{tag.id}'})
+
+        # After the data version query
+        sql = queries.captured_queries[1]['sql'].upper()
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('DISTINCT', sql)
+
+    def _create_tagged_patterns(self, count):
+        """Create patterns that each carry a tag and a datastructure"""
+        for i in range(count):
+            pattern = create_pattern(user=self.user, title=f'Pattern {i}')
+            pattern.tags.add(
+                Tag.objects.create(user=self.user, name=f'Tag {pattern.id}'))
+            pattern.datastructures.add(Datastructure.objects.create(
+                user=self.user, name=f'DS {pattern.id}'))
+
+    def test_list_query_count_is_constant(self):
+        """Test - Listing Patterns does not issue a query per Pattern"""
+        self._create_tagged_patterns(2)
+        with CaptureQueriesContext(connection) as small:
+            res = self.client.get(PATTERN_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self._create_tagged_patterns(10)
+        with CaptureQueriesContext(connection) as large:
+            res = self.client.get(PATTERN_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(len(large), len(small))
+
+    def test_detail_query_count_is_constant(self):
+        """Test - Pattern detail fetches relations in a fixed no. of queries"""
+        pattern = create_pattern(user=self.user)
+        for i in range(10):
+            pattern.tags.add(Tag.objects.create(user=self.user, name=f'T{i}'))
+
+        with self.assertNumQueries(4):
+            res = self.client.get(detail_url(pattern.id))
+
+        self.assertEqual(len(res.data['tags']), 10)
+
+    def test_create_pattern_tags_in_fixed_queries(self):
+        """Test - Nested Tags are resolved in bulk regardless of count"""
+        Tag.objects.create(user=self.user, name='Tag 0')
+        payload = {
+            'title': 'Many tags',
+            'tags': [{'name': f'Tag {i}'} for i in range(30)],
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(PATTERN_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        pattern = Pattern.objects.get(id=res.data['id'])
+        self.assertEqual(pattern.tags.count(), 30)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 30)
+        self.assertLess(len(queries), 15)
+
+    def test_create_pattern_duplicate_tag_names(self):
+        """Test - Repeated Tag names in a payload create one Tag"""
+        payload = {
+            'title': 'Duplicates',
+            'tags': [{'name': 'Array'}, {'name': 'Array'}],
+        }
+        res = self.client.post(PATTERN_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        pattern = Pattern.objects.get(id=res.data['id'])
+        self.assertEqual(pattern.tags.count(), 1)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_list_is_cursor_paginated(self):
+        """Test - Walk the Pattern list page by page via cursors"""
+        patterns = [
+            create_pattern(user=self.user, title=f'Pattern {i}')
+            for i in range(5)
+        ]
+
+        res = self.client.get(PATTERN_URL, {'page_size': 2})
+        seen = [item['id'] for item in res.data['results']]
+        while res.data['next']:
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(res.data['next'])
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            for query in queries:
+                self.assertNotIn('OFFSET', query['sql'].upper())
+            seen += [item['id'] for item in res.data['results']]
+
+        expected = sorted((p.id for p in patterns), reverse=True)
+        self.assertEqual(seen, expected)
+
+
+class BulkImportApiTests(TestCase):
+    """Test - Importing many Patterns in one request"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _post(self, body, content_type='application/x-ndjson'):
+        return self.client.post(
+            BULK_IMPORT_URL, data=body, content_type=content_type)
+
+    def test_import_json_lines(self):
+        """Test - Import Patterns from a JSON Lines body"""
+        Tag.objects.create(user=self.user, name='Array')
+        rows = [
+            {
+                'title': f'Pattern {i}',
+                'description': 'Imported',
+                'tags': [{'name': 'Array'}, {'name': f'Tag {i % 3}'}],
+                'datastructures': [{'name': 'Heap'}],
+            }
+            for i in range(20)
+        ]
+        body = '\n'.join(json.dumps(row) for row in rows)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self._post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            res.data, {'created': 20, 'failed': 0, 'errors': []})
+        self.assertLess(len(queries), 20)
+        patterns = Pattern.objects.filter(user=self.user)
+        self.assertEqual(patterns.count(), 20)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        pattern = patterns.get(title='Pattern 4')
+        self.assertEqual(pattern.description, 'Imported')
+        self.assertEqual(
+            sorted(tag.name for tag in pattern.tags.all()),
+            ['Array', 'Tag 1'],
+        )
+        self.assertEqual(pattern.datastructures.get().name, 'Heap')
+
+    def test_import_json_array(self):
+        """Test - Import Patterns from a JSON array body"""
+        body = json.dumps([{'title': 'Two Pointers'}, {'title': 'Cyclic'}])
+
+        res = self._post(body, content_type='application/json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(Pattern.objects.filter(user=self.user).count(), 2)
+
+    def test_import_reports_row_errors(self):
+        """Test - Invalid rows are reported and valid rows are kept"""
+        body = '\n'.join([
+            json.dumps({'title': 'Valid'}),
+            json.dumps({'link': 'http://example.com'}),
+            '{not json',
+            json.dumps({'title': 'Also valid'}),
+        ])
+
+        res = self._post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['failed'], 2)
+        self.assertEqual([e['row'] for e in res.data['errors']], [2, 3])
+        self.assertIn('title', res.data['errors'][0]['errors'])
+
+    @override_settings(PATTERN_IMPORT_MAX_ERRORS=3)
+    def test_import_reports_first_errors(self):
+        """Test - Only the first errors are detailed, all are counted"""
+        body = '\n'.join(
+            [json.dumps({'link': 'no title'})] * 10 +
+            [json.dumps({'title': 'Valid'})])
+
+        res = self._post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(res.data['failed'], 10)
+        self.assertEqual([e['row'] for e in res.data['errors']], [1, 2, 3])
+
+    def test_import_array_requires_commas(self):
+        """Test - Array elements without a comma between them are rejected"""
+        body = '[{"title": "First"} {"title": "Second"}]'
+
+        res = self._post(body, content_type='application/json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(res.data['errors'], [
+            {'row': 2, 'errors': ["Expecting ',' delimiter."]},
+        ])
+
+    def test_import_array_syntax_error_fails_fast(self):
+        """Test - A syntax error ends the import without reading on"""
+        body = '[{"title": x}, ' + '{"title": "ok"}, ' * 10000 + ']'
+        stream = io.BytesIO(body.encode())
+
+        records = list(iter_records(stream, read_size=64))
+
+        self.assertEqual(len(records), 1)
+        self.assertTrue(records[0][1].fatal)
+        self.assertLessEqual(stream.tell(), 64)
+
+    def test_import_record_too_large(self):
+        """Test - An unterminated record stops once it exceeds the limit"""
+        stream = io.BytesIO(('["' + 'a' * 10000).encode())
+
+        records = list(iter_records(
+            stream, read_size=64, max_record_size=1000))
+
+        self.assertEqual(str(records[0][1]), 'Record too large.')
+        self.assertLess(stream.tell(), 1200)
+
+    def test_import_nothing_valid(self):
+        """Test - A body with no valid rows is a bad request"""
+        res = self._post(json.dumps({'link': 'missing title'}))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Pattern.objects.exists())
+
+
+@override_settings(PATTERN_RESPONSE_CACHE={'BACKEND': 'local', 'TIMEOUT': 60})
+class ResponseCacheTests(TestCase):
+    """Test - Per-user caching of Pattern responses"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_repeat_list_served_from_cache(self):
+        """Test - An unchanged list only costs the data version query"""
+        create_pattern(user=self.user)
+        first = self.client.get(PATTERN_URL, {'tags': ''})
+
+        with self.assertNumQueries(1):
+            second = self.client.get(PATTERN_URL, {'tags': ''})
+
+        self.assertEqual(second.data, first.data)
+
+    def test_query_params_cached_separately(self):
+        """Test - Filters are part of the cache key"""
+        pattern = create_pattern(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Array')
+        pattern.tags.add(tag)
+        create_pattern(user=self.user)
+
+        self.client.get(PATTERN_URL)
+        res = self.client.get(PATTERN_URL, {'tags': tag.id})
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_scheme_cached_separately(self):
+        """Test - https requests never get links cached for http ones"""
+        for i in range(3):
+            create_pattern(user=self.user, title=f'Pattern {i}')
+
+        self.client.get(PATTERN_URL, {'page_size': 1})
+        res = self.client.get(PATTERN_URL, {'page_size': 1}, secure=True)
+
+        self.assertTrue(res.data['next'].startswith('https://'))
+
+    def test_api_writes_invalidate(self):
+        """Test - Creating and updating via the API refresh the cache"""
+        self.client.get(PATTERN_URL)
+        res = self.client.post(
+            PATTERN_URL,
+            {'title': 'New', 'tags': [{'name': 'Heap'}]},
+            format='json',
+        )
+        detail = detail_url(res.data['id'])
+        self.client.get(detail)
+        self.client.patch(
+            detail, {'tags': [{'name': 'Trie'}]}, format='json')
+
+        listed = self.client.get(PATTERN_URL)
+        retrieved = self.client.get(detail)
+
+        self.assertEqual(len(listed.data['results']), 1)
+        self.assertEqual(listed.data['results'][0]['tags'][0]['name'], 'Trie')
+        self.assertEqual(retrieved.data['tags'][0]['name'], 'Trie')
+
+    def test_tag_rename_invalidates(self):
+        """Test - Renaming a Tag refreshes cached Patterns"""
+        pattern = create_pattern(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Array')
+        pattern.tags.add(tag)
+        self.client.get(PATTERN_URL)
+
+        self.client.patch(
+            reverse('pattern:tag-detail', args=[tag.id]), {'name': 'List'})
+        res = self.client.get(PATTERN_URL)
+
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'List')
+
+    def test_cache_is_per_user(self):
+        """Test - Users never see each other's cached responses"""
+        create_pattern(user=self.user)
+        self.client.get(PATTERN_URL)
+        other = create_user(email='other@example.com', password='pass1234')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(PATTERN_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_list_etag_not_modified(self):
+        """Test - A matching If-None-Match short-circuits to a 304"""
+        create_pattern(user=self.user)
+        res = self.client.get(PATTERN_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(PATTERN_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertFalse(res.content)
+
+    def test_etag_changes_after_write(self):
+        """Test - Writes retire the previous ETag"""
+        pattern = create_pattern(user=self.user)
+        etag = self.client.get(detail_url(pattern.id))['ETag']
+
+        self.client.patch(detail_url(pattern.id), {'title': 'Renamed'})
+        res = self.client.get(detail_url(pattern.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.data['title'], 'Renamed')
+
+    def test_version_ignores_clocks(self):
+        """Test - Writes stamped earlier than the last one change the ETag"""
+        pattern = create_pattern(user=self.user)
+        url = detail_url(pattern.id)
+        etag = self.client.get(url)['ETag']
+
+        Pattern.objects.filter(pk=pattern.pk).update(
+            title='Elsewhere',
+            modified=pattern.modified - timezone.timedelta(hours=1))
+        bump_versions([self.user.pk])
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Elsewhere')
+
+    def test_every_write_bumps_version(self):
+        """Test - Saves, deletes, links and bulk imports bump the version"""
+        versions = [data_version(self.user.pk)]
+
+        def bumped():
+            versions.append(data_version(self.user.pk))
+            return int(versions[-1]) > int(versions[-2])
+
+        pattern = create_pattern(user=self.user)
+        self.assertTrue(bumped())
+        tag = Tag.objects.create(user=self.user, name='Array')
+        self.assertTrue(bumped())
+        pattern.tags.add(tag)
+        self.assertTrue(bumped())
+        tag.delete()
+        self.assertTrue(bumped())
+        self.client.post(
+            BULK_IMPORT_URL, data=json.dumps({'title': 'Imported'}),
+            content_type='application/x-ndjson')
+        self.assertTrue(bumped())
+        pattern.delete()
+        self.assertTrue(bumped())
+
+    def test_versions_per_user(self):
+        """Test - A User's writes leave other Users' versions alone"""
+        other = create_user(email='other@example.com', password='pass123')
+        version = data_version(other.pk)
+
+        create_pattern(user=self.user)
+
+        self.assertEqual(data_version(other.pk), version)
+
+    def test_deleting_user_drops_version(self):
+        """Test - A deleted User's version row goes with them"""
+        create_pattern(user=self.user)
+
+        self.user.delete()
+
+        self.assertFalse(DataVersion.objects.exists())
+
+    def test_tag_link_changes_touch_pattern(self):
+        """Test - Adding or removing a Tag moves Last-Modified forward"""
+        pattern = create_pattern(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Array')
+        stamps = [Pattern.objects.get(pk=pattern.pk).modified]
+
+        pattern.tags.add(tag)
+        stamps.append(Pattern.objects.get(pk=pattern.pk).modified)
+        tag.pattern_set.remove(pattern)
+        stamps.append(Pattern.objects.get(pk=pattern.pk).modified)
+        pattern.tags.add(tag)
+        tag.delete()
+        stamps.append(Pattern.objects.get(pk=pattern.pk).modified)
+
+        self.assertEqual(stamps, sorted(set(stamps)))
+
+    def test_etag_differs_by_query(self):
+        """Test - Different filters yield different ETags"""
+        first = self.client.get(PATTERN_URL)
+        second = self.client.get(PATTERN_URL, {'tags': '1'})
+
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_detail_last_modified(self):
+        """Test - Detail responses carry the newest related change"""
+        pattern = create_pattern(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Array')
+        pattern.tags.add(tag)
+
+        res = self.client.get(detail_url(pattern.id))
+        cached = self.client.get(detail_url(pattern.id))
+
+        pattern.refresh_from_db()
+        expected = http_date(max(pattern.modified, tag.modified).timestamp())
+        self.assertEqual(res['Last-Modified'], expected)
+        self.assertEqual(cached['Last-Modified'], expected)
+
+    @override_settings(PATTERN_RESPONSE_CACHE={'BACKEND': None})
+    def test_cache_disabled(self):
+        """Test - Every request is queried with caching disabled"""
+        self.client.get(PATTERN_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(PATTERN_URL)
+
+        self.assertGreater(len(queries), 0)
+
+
+class SearchApiTests(TestCase):
+    """Test - Full-text search over Patterns"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _search(self, terms, **params):
+        res = self.client.get(PATTERN_URL, {'search': terms, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in res.data['results']]
+
+    def test_search_title_and_description(self):
+        """Test - Search matches stemmed words in titles and descriptions"""
+        title = create_pattern(user=self.user, title='Sliding windows')
+        body = create_pattern(
+            user=self.user, title='Two Pointers',
+            description='Shrink the window from the left')
+        create_pattern(user=self.user, title='Topological Sort')
+
+        self.assertCountEqual(self._search('window'), [title.id, body.id])
+
+    def test_search_ranks_title_matches_first(self):
+        """Test - Title matches outrank description matches"""
+        body = create_pattern(
+            user=self.user, title='Two Pointers',
+            description='Often paired with a heap')
+        title = create_pattern(user=self.user, title='Heap')
+
+        self.assertEqual(self._search('heap'), [title.id, body.id])
+
+    def test_search_limited_to_user(self):
+        """Test - Search never returns other Users' Patterns"""
+        other = create_user(email='other@example.com', password='pass123')
+        create_pattern(user=other, title='Heap')
+
+        self.assertEqual(self._search('heap'), [])
+
+    def test_search_with_tag_filter(self):
+        """Test - Search combines with the tags filter"""
+        tag = Tag.objects.create(user=self.user, name='Array')
+        tagged = create_pattern(user=self.user, title='Binary search')
+        tagged.tags.add(tag)
+        create_pattern(user=self.user, title='Binary search tree')
+
+        self.assertEqual(
+            self._search('binary', tags=f'{tag.id}'), [tagged.id])
+
+    def test_search_after_update(self):
+        """Test - Updating a title updates what it is found by"""
+        pattern = create_pattern(user=self.user, title='Heap')
+        self.client.patch(
+            detail_url(pattern.id), {'title': 'Trie'}, format='json')
+
+        self.assertEqual(self._search('heap'), [])
+        self.assertEqual(self._search('trie'), [pattern.id])
+
+    def test_search_bulk_imported(self):
+        """Test - Bulk imported Patterns are searchable"""
+        body = '\n'.join(json.dumps({'title': f'Heap {i}'}) for i in range(3))
+        self.client.post(
+            BULK_IMPORT_URL, body, content_type='application/x-ndjson')
+
+        self.assertEqual(len(self._search('heap')), 3)
+
+    def test_search_pages_by_rank(self):
+        """Test - Ranked results page without gaps or repeats"""
+        for i in range(6):
+            create_pattern(user=self.user, title='Heap ' + 'heap ' * (i % 3))
+
+        res = self.client.get(PATTERN_URL, {'search': 'heap', 'page_size': 2})
+        ids = [item['id'] for item in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [item['id'] for item in res.data['results']]
+
+        self.assertCountEqual(
+            ids,
+            Pattern.objects.filter(user=self.user).values_list(
+                'id', flat=True))
+
+
+class SparseFieldsetApiTests(TestCase):
+    """Test - Rendering and fetching only the requested fields"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Array')
+        self.ds = Datastructure.objects.create(user=self.user, name='Heap')
+        self.pattern = create_pattern(
+            user=self.user, title='Two pointers', description='Desc')
+        self.pattern.tags.add(self.tag)
+        self.pattern.datastructures.add(self.ds)
+
+    def test_fields(self):
+        """Test - Only the id and the requested columns are fetched"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PATTERN_URL, {'fields': 'title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': self.pattern.id, 'title': 'Two pointers'}])
+        # The data version query, then the list itself
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"link"', queries[1]['sql'])
+
+    def test_default_unchanged(self):
+        """Test - Without parameters every field is rendered nested"""
+        res = self.client.get(PATTERN_URL)
+
+        serializer = PatternSerializer([self.pattern], many=True)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_compact(self):
+        """Test - Compact mode renders relations as ids"""
+        res = self.client.get(PATTERN_URL, {'compact': 1})
+
+        item = res.data['results'][0]
+        self.assertEqual(item['tags'], [self.tag.id])
+        self.assertEqual(item['datastructures'], [self.ds.id])
+        self.assertEqual(item['title'], 'Two pointers')
+
+    def test_compact_expand(self):
+        """Test - Expanded relations stay nested in compact mode"""
+        res = self.client.get(
+            PATTERN_URL, {'compact': 1, 'expand': 'tags'})
+
+        item = res.data['results'][0]
+        self.assertEqual(item['tags'], [{'id': self.tag.id, 'name': 'Array'}])
+        self.assertEqual(item['datastructures'], [self.ds.id])
+
+    def test_expand_adds_relation(self):
+        """Test - Expanded relations are rendered even if not in fields"""
+        with self.assertNumQueries(3):
+            res = self.client.get(
+                PATTERN_URL, {'fields': 'title', 'expand': 'tags'})
+
+        self.assertEqual(res.data['results'], [{
+            'id': self.pattern.id,
+            'title': 'Two pointers',
+            'tags': [{'id': self.tag.id, 'name': 'Array'}],
+        }])
+
+    def test_detail(self):
+        """Test - Detail fields include the description"""
+        res = self.client.get(
+            detail_url(self.pattern.id),
+            {'fields': 'description,datastructures', 'compact': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'id': self.pattern.id,
+            'description': 'Desc',
+            'datastructures': [self.ds.id],
+        })
+        self.assertIn('Last-Modified', res)
+
+    def test_invalid(self):
+        """Test - Unknown fields and relations are rejected"""
+        for params in (
+            {'fields': 'title,secret'},
+            {'fields': 'description'},
+            {'expand': 'title'},
+            {'compact': 'yes'},
+        ):
+            res = self.client.get(PATTERN_URL, params)
+
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_writes_unaffected(self):
+        """Test - Fieldset parameters only apply to reads"""
+        res = self.client.post(
+            f'{PATTERN_URL}?fields=title',
+            {'title': 'Sliding window'},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn('tags', res.data)
+
+
+class ExportApiTests(TestCase):
+    """Test - Streaming exports of a User's Patterns"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        tag = Tag.objects.create(user=self.user, name='Array')
+        ds = Datastructure.objects.create(user=self.user, name='Heap')
+        for i in range(3):
+            pattern = create_pattern(
+                user=self.user, title=f'Pattern {i}', description='Desc')
+            pattern.tags.add(tag)
+            pattern.datastructures.add(ds)
+        create_pattern(user=create_user(email='other@example.com'))
+
+    def test_export_json_lines(self):
+        """Test - Export streams one JSON document per Pattern"""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(
+            res['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        patterns = Pattern.objects.filter(user=self.user).order_by('-id')
+        expected = PatternDetailSerializer(patterns, many=True).data
+        self.assertEqual(rows, json.loads(json.dumps(expected)))
+
+    def test_export_csv(self):
+        """Test - Export streams CSV rows with joined relation names"""
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['title'], 'Pattern 2')
+        self.assertEqual(rows[0]['description'], 'Desc')
+        self.assertEqual(rows[0]['tags'], 'Array')
+        self.assertEqual(rows[0]['datastructures'], 'Heap')
+
+    @override_settings(PATTERN_EXPORT_CHUNK_SIZE=2)
+    def test_export_prefetches_per_chunk(self):
+        """Test - Export fetches relations once per chunk of Patterns"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(EXPORT_URL)
+            b''.join(res.streaming_content)
+
+        selects = [
+            q for q in queries if q['sql'].lstrip().startswith('SELECT')]
+        self.assertLessEqual(len(selects), 1 + 2 * 2)
 
 
 class ImageUploadTests(TestCase):
@@ -384,3 +1148,65 @@ class ImageUploadTests(TestCase):
         res = self.client.post(url, payload, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PATTERN_IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_upload_image_too_large(self):
+        """Test - Uploads over the size limit are refused with a 413"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.bmp') as image_file:
+            image_file.write(os.urandom(200 * 1024))
+            image_file.seek(0)
+            res = self.client.post(
+                url, {'image': image_file}, format='multipart')
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def _upload(self, size, fmt='PNG', suffix=None):
+        """Upload a blank image of size in fmt"""
+        url = image_upload_url(self.recipe.id)
+        suffix = f'.{fmt.lower()}' if suffix is None else suffix
+        with tempfile.NamedTemporaryFile(suffix=suffix) as image_file:
+            Image.new('RGB', size).save(image_file, format=fmt)
+            image_file.seek(0)
+            return self.client.post(
+                url, {'image': image_file}, format='multipart')
+
+    @override_settings(PATTERN_IMAGE_MAX_DIMENSION=100)
+    def test_upload_image_too_wide(self):
+        """Test - Images wider than allowed are refused"""
+        res = self._upload((101, 10))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+
+    @override_settings(PATTERN_IMAGE_MAX_PIXELS=1000)
+    def test_upload_image_too_many_pixels(self):
+        """Test - Images with more pixels than allowed are refused"""
+        res = self._upload((50, 50))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_image_unsupported_format(self):
+        """Test - Formats outside the allowed list are refused"""
+        res = self._upload((10, 10), fmt='BMP')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_image_non_image_extension(self):
+        """Test - Valid images named as other kinds of file are refused"""
+        res = self._upload((10, 10), fmt='GIF', suffix='.html')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_upload_image_not_decoded(self):
+        """Test - Validation reads the header without decoding pixels"""
+        with patch('PIL.ImageFile.ImageFile.load') as load:
+            res = self._upload((10, 10))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        load.assert_not_called()
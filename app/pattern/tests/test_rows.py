@@ -0,0 +1,146 @@
+"""
+Parity tests for Pattern listings rendered from .values() rows
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import (
+    Pattern,
+    Tag,
+    Datastructure,
+)
+from pattern import rows
+from pattern.serializers import PatternSerializer
+from pattern.views import PatternViewSet
+
+
+PATTERN_URL = reverse('pattern:pattern-list')
+
+
+def create_pattern(user, **params):
+    """Create and return a sample algo pattern"""
+    defaults = {
+        'title': 'Sample pattern title',
+        'link': 'http://example.com/pattern.pdf',
+    }
+    defaults.update(params)
+    return Pattern.objects.create(user=user, **defaults)
+
+
+@override_settings(PATTERN_RESPONSE_CACHE={'BACKEND': ''})
+class PatternRowsParityTests(TestCase):
+    """Test - Row listings are byte-identical to serializer listings"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client.force_authenticate(self.user)
+
+        self.tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Two pointers', 'Binary search', 'Trie ü', '"Q"')
+        ]
+        self.datastructures = [
+            Datastructure.objects.create(user=self.user, name=name)
+            for name in ('Heap', 'Array')
+        ]
+        titles = [
+            'Sliding window', 'Heap of heaps', 'Überblick', 'Search <tree>',
+            'Binary search tree', 'Plain',
+        ]
+        for i, title in enumerate(titles):
+            pattern = create_pattern(
+                user=self.user, title=title, link='' if i % 2 else f'l{i}',
+                description=f'About {title.lower()} and heaps')
+            pattern.tags.add(*reversed(self.tags[:i % 5]))
+            pattern.datastructures.add(*self.datastructures[:i % 3])
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123')
+        create_pattern(user=other).tags.add(
+            Tag.objects.create(user=other, name='Other'))
+
+    def get_both(self, url, params=None):
+        """Return (rows, serializer) responses to GET url"""
+        from_rows = self.client.get(url, params)
+        with patch.object(PatternViewSet, 'list_from_rows', False):
+            serialized = self.client.get(url, params)
+        return from_rows, serialized
+
+    def assertParity(self, params=None):
+        from_rows, serialized = self.get_both(PATTERN_URL, params)
+
+        self.assertEqual(from_rows.status_code, serialized.status_code)
+        self.assertEqual(from_rows.content, serialized.content, params)
+        return from_rows
+
+    def test_list(self):
+        """Test - The default listing"""
+        res = self.assertParity()
+
+        self.assertEqual(len(res.data['results']), 6)
+
+    def test_filters(self):
+        """Test - Tag and Datastructure filters, any and all"""
+        tags = ','.join(str(tag.id) for tag in self.tags[:2])
+        for params in (
+            {'tags': tags},
+            {'tags': tags, 'match': 'all'},
+            {'datastructures': str(self.datastructures[1].id)},
+        ):
+            self.assertParity(params)
+
+    def test_search(self):
+        """Test - Ranked search results"""
+        self.assertParity({'search': 'heap'})
+        self.assertParity({'search': 'no such words'})
+
+    def test_pages(self):
+        """Test - Every page and the cursors between them"""
+        for params in ({'page_size': 2}, {'page_size': 2, 'search': 'heap'}):
+            from_rows = self.assertParity(params)
+            while from_rows.data['next']:
+                from_rows, serialized = self.get_both(from_rows.data['next'])
+                self.assertEqual(from_rows.content, serialized.content)
+
+    def test_fieldsets(self):
+        """Test - Sparse fieldsets and compact relations"""
+        for params in (
+            {'fields': 'title'},
+            {'fields': 'link,tags'},
+            {'compact': 1},
+            {'compact': 1, 'expand': 'datastructures'},
+            {'fields': 'title', 'expand': 'tags'},
+        ):
+            self.assertParity(params)
+
+    def test_empty(self):
+        """Test - A User without Patterns"""
+        Pattern.objects.filter(user=self.user).delete()
+
+        self.assertParity()
+
+    def test_pattern_rows(self):
+        """Test - pattern_rows renders what PatternSerializer does"""
+        queryset = Pattern.objects.order_by('-id')
+        fields = PatternSerializer.Meta.fields
+        patterns = queryset.prefetch_related(
+            *(PatternViewSet()._prefetch(name) for name in rows.RELATIONS))
+
+        self.assertEqual(
+            JSONRenderer().render(rows.pattern_rows(
+                rows.values(queryset, fields), fields)),
+            JSONRenderer().render(
+                PatternSerializer(patterns, many=True).data),
+        )
+
+    def test_unsupported_fields(self):
+        """Test - Fields needing the serializer are not listed from rows"""
+        self.assertTrue(rows.supports(['id', 'title', 'tags']))
+        self.assertFalse(rows.supports(['id', 'description']))
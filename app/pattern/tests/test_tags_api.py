@@ -3,7 +3,7 @@ Tests for Tags API
 """
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -16,6 +16,7 @@ from core.models import (
 from pattern.serializers import TagSerializer
 
 TAGS_URL = reverse('pattern:tag-list')
+AUTOCOMPLETE_URL = reverse('pattern:tag-autocomplete')
 
 
 def detail_url(tag_id):
@@ -59,7 +60,7 @@ class PrivatePatternApiTests(TestCase):
         tags = Tag.objects.all().order_by('-name')
         serializer = TagSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Test - Listed Tags limited to authenticated User"""
@@ -70,9 +71,9 @@ class PrivatePatternApiTests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
-        self.assertEqual(res.data[0]['id'], tag.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['id'], tag.id)
 
     def test_update_tag(self):
         """Test updating a tag"""
@@ -86,6 +87,17 @@ class PrivatePatternApiTests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_update_tag_duplicate_name(self):
+        """Test - Renaming a Tag onto an existing name is rejected"""
+        Tag.objects.create(user=self.user, name='Array')
+        tag = Tag.objects.create(user=self.user, name='Heap')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'Array'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Heap')
+
     def test_delete_tag(self):
         """Test - Deleting a Tag"""
         tag = Tag.objects.create(user=self.user, name='BFS')
@@ -97,6 +109,14 @@ class PrivatePatternApiTests(TestCase):
         tags = Tag.objects.filter(user=self.user)
         self.assertFalse(tags.exists())
 
+    def test_no_tag_detail(self):
+        """Test - Single Tags cannot be fetched, only listed"""
+        tag = Tag.objects.create(user=self.user, name='BFS')
+
+        res = self.client.get(detail_url(tag.id))
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
     def test_filter_tags_assigned_to_recipes(self):
         """Test - Display Tags assigned to Patterns"""
         tag1 = Tag.objects.create(user=self.user, name='PriorityQueue')
@@ -111,8 +131,8 @@ class PrivatePatternApiTests(TestCase):
 
         s1 = TagSerializer(tag1)
         s2 = TagSerializer(tag2)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filtered_tags_unique(self):
         """Test - Filtered Tags returns list unique to Tags"""
@@ -131,4 +151,147 @@ class PrivatePatternApiTests(TestCase):
 
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_tags_with_counts(self):
+        """Test - with_counts counts each Tag's Patterns in the list query"""
+        used = Tag.objects.create(user=self.user, name='Array')
+        unused = Tag.objects.create(user=self.user, name='Graph')
+        for title in ('Two Sum', 'Two Pointers'):
+            Pattern.objects.create(title=title, user=self.user).tags.add(used)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(TAGS_URL, {'with_counts': 1})
+
+        counts = {
+            tag['id']: tag['pattern_count'] for tag in res.data['results']
+        }
+        self.assertEqual(counts, {used.id: 2, unused.id: 0})
+
+    def test_tags_assigned_only_with_counts(self):
+        """Test - assigned_only and with_counts combine"""
+        tag = Tag.objects.create(user=self.user, name='Array')
+        Tag.objects.create(user=self.user, name='Graph')
+        Pattern.objects.create(title='Two Sum', user=self.user).tags.add(tag)
+
+        res = self.client.get(
+            TAGS_URL, {'assigned_only': 1, 'with_counts': 1})
+
+        self.assertEqual(res.data['results'], [
+            {'id': tag.id, 'name': 'Array', 'pattern_count': 1},
+        ])
+
+    def test_tags_without_counts(self):
+        """Test - Tags omit pattern_count unless asked for"""
+        Tag.objects.create(user=self.user, name='Array')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertNotIn('pattern_count', res.data['results'][0])
+
+    def test_tags_cursor_paginated_by_name(self):
+        """Test - Tags are paged in descending name order"""
+        for name in ['Array', 'Graph', 'Heap', 'Stack', 'Trie']:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'page_size': 3})
+        names = [tag['name'] for tag in res.data['results']]
+        res = self.client.get(res.data['next'])
+        names += [tag['name'] for tag in res.data['results']]
+
+        self.assertEqual(names, ['Trie', 'Stack', 'Heap', 'Graph', 'Array'])
+        self.assertIsNone(res.data['next'])
+
+
+@override_settings(PATTERN_RESPONSE_CACHE={'BACKEND': 'local', 'TIMEOUT': 60})
+class TagAutocompleteApiTests(TestCase):
+    """Test - Tag name suggestions"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _names(self, **params):
+        res = self.client.get(AUTOCOMPLETE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [tag['name'] for tag in res.data]
+
+    def test_autocomplete_prefix(self):
+        """Test - Names starting with the prefix are listed A to Z"""
+        for name in ['heap', 'Hash Map', 'Graph', 'Hashing']:
+            Tag.objects.create(user=self.user, name=name)
+
+        self.assertEqual(
+            self._names(q='ha'), ['Hash Map', 'Hashing'])
+        self.assertEqual(
+            self._names(q='H'), ['Hash Map', 'Hashing', 'heap'])
+
+    def test_autocomplete_limit(self):
+        """Test - limit caps the number of suggestions"""
+        for i in range(15):
+            Tag.objects.create(user=self.user, name=f'Tag {i:02}')
+
+        self.assertEqual(len(self._names(q='tag')), 10)
+        self.assertEqual(
+            self._names(q='tag', limit=2), ['Tag 00', 'Tag 01'])
+
+    def test_autocomplete_invalid_limit(self):
+        """Test - Out of range limits are rejected"""
+        for limit in ['0', '51', 'ten']:
+            res = self.client.get(AUTOCOMPLETE_URL, {'limit': limit})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_limited_to_user(self):
+        """Test - Other Users' Tags are never suggested"""
+        other = create_user(email='other@example.com')
+        Tag.objects.create(user=other, name='Heap')
+
+        self.assertEqual(self._names(q='he'), [])
+
+    def test_autocomplete_escapes_wildcards(self):
+        """Test - LIKE wildcards in the prefix match literally"""
+        Tag.objects.create(user=self.user, name='Array')
+
+        self.assertEqual(self._names(q='%'), [])
+        self.assertEqual(self._names(q='_rray'), [])
+
+    def test_autocomplete_any_last_character(self):
+        """Test - Prefixes ending at the edges of Unicode are answered"""
+        Tag.objects.create(user=self.user, name='Max \U0010ffff')
+        Tag.objects.create(user=self.user, name='Hangul \ud7ff')
+
+        self.assertEqual(self._names(q='max \U0010ffff'), ['Max \U0010ffff'])
+        self.assertEqual(self._names(q='hangul \ud7ff'), ['Hangul \ud7ff'])
+        self.assertEqual(self._names(q='\U0010ffff'), [])
+
+    def test_autocomplete_upper_cased_like_names(self):
+        """Test - Prefixes are upper-cased by the db like the names"""
+        Tag.objects.create(user=self.user, name='Straße')
+
+        self.assertEqual(self._names(q='straß'), ['Straße'])
+        self.assertEqual(self._names(q='STRASS'), [])
+
+    def test_autocomplete_null_character(self):
+        """Test - Prefixes with null characters are rejected"""
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'a\x00'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_cached_until_tags_change(self):
+        """Test - Repeats are served from cache until a Tag changes"""
+        tag = Tag.objects.create(user=self.user, name='Heap')
+        self._names(q='he')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self._names(q='he'), ['Heap'])
+
+        self.client.patch(detail_url(tag.id), {'name': 'Trie'})
+        self.assertEqual(self._names(q='he'), [])
+
+        Tag.objects.create(user=self.user, name='Hello')
+        self.assertEqual(self._names(q='he'), ['Hello'])
+
+        self.client.delete(detail_url(Tag.objects.get(name='Hello').id))
+        self.assertEqual(self._names(q='he'), [])
@@ -0,0 +1,181 @@
+"""
+Tests for the Pattern image derivative pipeline
+"""
+import io
+import posixpath
+import shutil
+import tempfile
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Pattern
+from pattern import thumbnails
+from pattern.cache import data_version
+
+
+THUMBNAILS = {
+    'SIZES': {'small': 16, 'medium': 64},
+    'FORMATS': ['webp', 'jpeg'],
+    'QUALITY': 80,
+    'WORKERS': 1,
+    'SYNC': True,
+}
+
+
+def image_bytes(size=(200, 100), fmt='PNG', mode='RGBA'):
+    """Return an encoded image of size"""
+    output = io.BytesIO()
+    Image.new(mode, size, 'red').save(output, fmt)
+    return output.getvalue()
+
+
+class MediaRootMixin:
+    """Point MEDIA_ROOT at a fresh directory for each test"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'password123')
+        self.pattern = Pattern.objects.create(user=self.user, title='Heap')
+
+    def set_image(self, content=None):
+        self.pattern.image.save(
+            'original.png', ContentFile(content or image_bytes()))
+        return self.pattern.image.name
+
+
+@override_settings(PATTERN_THUMBNAILS=THUMBNAILS)
+class DerivativeTests(MediaRootMixin, TestCase):
+    """Test - Generating derivatives"""
+
+    def test_generates_each_size_and_format(self):
+        """Test - Every size is written in every format, within bounds"""
+        derivatives = thumbnails.generate_derivatives(self.set_image())
+
+        self.assertEqual(set(derivatives), {'small', 'medium'})
+        for size, edge in THUMBNAILS['SIZES'].items():
+            for fmt, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+                with default_storage.open(derivatives[size][fmt]) as f:
+                    image = Image.open(f)
+                    self.assertEqual(image.format, pil_format)
+                    self.assertEqual(max(image.size), edge)
+
+    def test_generation_is_idempotent(self):
+        """Test - Repeating a job reuses the derivatives already written"""
+        name = self.set_image()
+        first = thumbnails.generate_derivatives(name)
+        second = thumbnails.generate_derivatives(name)
+
+        self.assertEqual(first, second)
+        _, files = default_storage.listdir(
+            posixpath.dirname(first['small']['webp']))
+        self.assertEqual(sorted(files), [
+            'medium.jpeg', 'medium.webp', 'small.jpeg', 'small.webp',
+        ])
+
+    def test_job_bumps_version(self):
+        """Test - Recording derivatives changes the User's ETags"""
+        name = self.set_image()
+        version = data_version(self.user.pk)
+
+        thumbnails.process_pattern(self.pattern.id, name)
+
+        self.assertGreater(
+            int(data_version(self.user.pk)), int(version))
+
+    def test_stale_job_records_nothing(self):
+        """Test - A job for a replaced image leaves the Pattern alone"""
+        old = self.set_image()
+        self.set_image(image_bytes(fmt='JPEG', mode='RGB'))
+
+        thumbnails.process_pattern(self.pattern.id, old)
+
+        self.pattern.refresh_from_db()
+        self.assertEqual(self.pattern.thumbnails, {})
+
+    def test_upload_exposes_thumbnails(self):
+        """Test - Uploading an image adds thumbnail URLs to the detail"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        upload = ContentFile(image_bytes(), name='upload.png')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = client.post(
+                reverse('pattern:pattern-upload-image',
+                        args=[self.pattern.id]),
+                {'image': upload}, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = client.get(
+            reverse('pattern:pattern-detail', args=[self.pattern.id]))
+        small = res.data['thumbnails']['small']
+        self.assertTrue(small['webp'].startswith('http://testserver/'))
+        self.assertTrue(small['webp'].endswith('/small.webp'))
+        self.assertTrue(small['jpeg'].endswith('/small.jpeg'))
+
+    def test_replacing_image_clears_thumbnails(self):
+        """Test - A new image drops the old one's thumbnails at once"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('pattern:pattern-upload-image', args=[self.pattern.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(url, {
+                'image': ContentFile(image_bytes(), name='first.png'),
+            }, format='multipart')
+        self.pattern.refresh_from_db()
+        old = self.pattern.thumbnails
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            res = client.post(url, {
+                'image': ContentFile(
+                    image_bytes(fmt='JPEG', mode='RGB'), name='second.jpg'),
+            }, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.pattern.refresh_from_db()
+        self.assertEqual(self.pattern.thumbnails, {})
+        for callback in callbacks:
+            callback()
+        self.pattern.refresh_from_db()
+        self.assertEqual(set(self.pattern.thumbnails), {'small', 'medium'})
+        self.assertNotEqual(self.pattern.thumbnails, old)
+
+    @override_settings(PATTERN_THUMBNAILS=dict(THUMBNAILS, FORMATS=[]))
+    def test_disabled(self):
+        """Test - No job is scheduled when no formats are configured"""
+        self.set_image()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            thumbnails.schedule_thumbnails(self.pattern)
+
+        self.assertEqual(callbacks, [])
+
+
+@override_settings(PATTERN_THUMBNAILS=dict(THUMBNAILS, SYNC=False))
+class BackgroundDerivativeTests(MediaRootMixin, TransactionTestCase):
+    """Test - Derivatives generated on the thread pool"""
+
+    def test_generated_after_commit(self):
+        """Test - Scheduled jobs run on the pool once committed"""
+        self.set_image()
+
+        thumbnails.schedule_thumbnails(self.pattern)
+        thumbnails.shutdown_executor()
+
+        self.pattern.refresh_from_db()
+        self.assertEqual(
+            set(self.pattern.thumbnails['medium']), {'webp', 'jpeg'})
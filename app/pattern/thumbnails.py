@@ -0,0 +1,181 @@
+"""
+Background generation of resized Pattern image derivatives.
+
+Uploads only schedule the work; a small thread pool decodes the original
+once and writes a WebP and/or JPEG copy per configured size. Derivative
+names follow from the original's name, so a repeated job reuses the files
+already written, and a job for an image that has since been replaced
+records nothing.
+"""
+import contextlib
+import io
+import logging
+import os
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Pattern
+from pattern.cache import bump_versions
+from pattern.uploads import open_image
+
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_ROOT = 'derivatives'
+
+FORMATS = {
+    'webp': ('WEBP', {'method': 4}),
+    'jpeg': ('JPEG', {'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the shared thread pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PATTERN_THUMBNAILS['WORKERS'],
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def shutdown_executor(wait=True):
+    """Stop the thread pool, by default after its queued jobs finish"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+@receiver(setting_changed)
+def _reset_executor(setting, **kwargs):
+    if setting == 'PATTERN_THUMBNAILS':
+        shutdown_executor()
+
+
+def derivative_dir(name):
+    """Return the storage directory holding the derivatives of name"""
+    return posixpath.join(DERIVATIVE_ROOT, os.path.splitext(name)[0])
+
+
+def derivative_name(name, size, fmt):
+    """Return the storage name of one derivative of the image name"""
+    return posixpath.join(derivative_dir(name), f'{size}.{fmt}')
+
+
+def delete_derivatives(name, storage=default_storage):
+    """Delete every derivative of the image name, whatever its size"""
+    directory = derivative_dir(name)
+    try:
+        _, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+
+    for file in files:
+        storage.delete(posixpath.join(directory, file))
+    with contextlib.suppress(OSError):
+        os.rmdir(storage.path(directory))
+
+
+def render(image, edge, fmt, quality):
+    """Return image shrunk to fit edge x edge, encoded as fmt"""
+    pil_format, options = FORMATS[fmt]
+    copy = image.copy()
+    copy.thumbnail((edge, edge), Image.LANCZOS)
+    if fmt == 'jpeg' and copy.mode != 'RGB':
+        copy = copy.convert('RGB')
+    output = io.BytesIO()
+    copy.save(output, pil_format, quality=quality, **options)
+    return output.getvalue()
+
+
+def generate_derivatives(name, storage=default_storage):
+    """Write every configured derivative of the image name.
+
+    Derivatives that already exist are kept, so repeating a job only
+    costs the existence checks. Returns {size: {format: storage name}}.
+    """
+    config = settings.PATTERN_THUMBNAILS
+    wanted = {
+        (size, fmt): derivative_name(name, size, fmt)
+        for size in config['SIZES']
+        for fmt in config['FORMATS']
+    }
+    missing = {
+        key: target for key, target in wanted.items()
+        if not storage.exists(target)
+    }
+    if missing:
+        with storage.open(name) as source:
+            image = open_image(source)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        for (size, fmt), target in missing.items():
+            content = render(
+                image, config['SIZES'][size], fmt, config['QUALITY'])
+            wanted[size, fmt] = storage.save(target, ContentFile(content))
+
+    derivatives = {}
+    for (size, fmt), target in wanted.items():
+        derivatives.setdefault(size, {})[fmt] = target
+    return derivatives
+
+
+def process_pattern(pattern_id, name):
+    """Generate the derivatives of a Pattern's image and record them.
+
+    Nothing is recorded if the Pattern's image changed in the meantime;
+    the job scheduled by that change records its own.
+    """
+    pattern = Pattern.objects.filter(pk=pattern_id, image=name)
+    user_id = pattern.values_list('user_id', flat=True).first()
+    if user_id is None:
+        return
+
+    derivatives = generate_derivatives(name)
+    with transaction.atomic():
+        if pattern.update(thumbnails=derivatives, modified=timezone.now()):
+            bump_versions([user_id])
+
+
+def _run_job(pattern_id, name):
+    """Run process_pattern on a pool thread, which owns its connection"""
+    close_old_connections()
+    try:
+        process_pattern(pattern_id, name)
+    except Exception:
+        logger.exception(
+            'Could not generate thumbnails of %s for Pattern %s',
+            name, pattern_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_thumbnails(pattern):
+    """Generate pattern's derivatives once the current transaction commits"""
+    config = settings.PATTERN_THUMBNAILS
+    if not pattern.image or not config['FORMATS']:
+        return
+
+    args = (pattern.pk, pattern.image.name)
+    if config['SYNC']:
+        transaction.on_commit(lambda: process_pattern(*args))
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run_job, *args))
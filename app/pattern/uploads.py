@@ -0,0 +1,140 @@
+"""
+Bounded, streaming handling of Pattern image uploads
+"""
+import warnings
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import MultiPartParser
+
+
+# Allowance for the multipart boundaries and headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('The upload is too large.')
+    default_code = 'upload_too_large'
+
+
+class ImageTooLarge(ValueError):
+    """An image's header declares more pixels than allowed"""
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """Refuse uploads over max_size before and while they are read.
+
+    A declared Content-Length over the limit is refused before any of the
+    body is read; otherwise each file is counted as it streams past, so a
+    body without a usable length is still cut off at the limit.
+    """
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size
+        self.received = 0
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length and (
+                content_length > self.max_size + MULTIPART_OVERHEAD):
+            raise UploadTooLarge()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            raise UploadTooLarge()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class ImageUploadParser(MultiPartParser):
+    """Multipart parser that streams files to disk within a size limit"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        request._request.upload_handlers = [
+            MaxSizeUploadHandler(
+                request, settings.PATTERN_IMAGE_MAX_UPLOAD_SIZE),
+            TemporaryFileUploadHandler(request),
+        ]
+        return super().parse(stream, media_type, parser_context)
+
+
+def open_image(fp):
+    """Open an image reading its header only, refusing pixel bombs.
+
+    Pillow defers decoding until pixels are needed, so the format and
+    size are known without decoding anything. Raises ImageTooLarge if
+    they exceed the configured limits and OSError if fp is not an image.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', Image.DecompressionBombWarning)
+        try:
+            image = Image.open(fp)
+        except (Image.DecompressionBombError,
+                Image.DecompressionBombWarning) as exc:
+            raise ImageTooLarge(str(exc))
+
+    width, height = image.size
+    if (max(width, height) > settings.PATTERN_IMAGE_MAX_DIMENSION or
+            width * height > settings.PATTERN_IMAGE_MAX_PIXELS):
+        raise ImageTooLarge(f'{width}x{height} image')
+
+    return image
+
+
+class HeaderValidatedImageField(serializers.ImageField):
+    """ImageField checking format and dimensions from the header alone"""
+    default_error_messages = {
+        'invalid_image': _(
+            'Upload a valid image. The file you uploaded was either not an '
+            'image or a corrupted image.'
+        ),
+        'image_format': _('Images must be one of: {formats}.'),
+        'image_size': _(
+            'Images may be at most {dimension} pixels wide or high and '
+            '{pixels} pixels in total.'
+        ),
+    }
+
+    def to_internal_value(self, data):
+        file_object = serializers.FileField.to_internal_value(self, data)
+        try:
+            image = open_image(file_object)
+        except ImageTooLarge:
+            self.fail(
+                'image_size',
+                dimension=settings.PATTERN_IMAGE_MAX_DIMENSION,
+                pixels=settings.PATTERN_IMAGE_MAX_PIXELS,
+            )
+        except Exception:
+            self.fail('invalid_image')
+        finally:
+            file_object.seek(0)
+
+        if image.format not in settings.PATTERN_IMAGE_FORMATS:
+            self.fail(
+                'image_format',
+                formats=', '.join(settings.PATTERN_IMAGE_FORMATS),
+            )
+
+        file_object.image = image
+        file_object.content_type = Image.MIME.get(image.format)
+        return file_object
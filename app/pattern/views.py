@@ -1,20 +1,37 @@
 """
 Views for the Pattern APIs
 """
+import collections
+
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
     OpenApiParameter,
     OpenApiTypes,
 )
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Count,
+    Exists,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Collate, Upper
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
+
 from rest_framework import (
     viewsets,
     mixins,
     status
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 from core.models import (
@@ -23,47 +40,275 @@ from core.models import (
     Datastructure,
 )
 from pattern import serializers
+from pattern.cache import CachedResponseMixin, CachedRetrieveMixin
+from pattern.exporters import (
+    CSVRenderer,
+    JSONLinesRenderer,
+    iter_patterns,
+)
+from pattern.images import release_images
+from pattern.importers import (
+    ImportRecordError,
+    iter_records,
+)
+from pattern.pagination import (
+    PatternCursorPagination,
+    PatternAttrCursorPagination,
+)
+from pattern import rows
+from pattern.search import search_patterns
+from pattern.thumbnails import schedule_thumbnails
+from pattern.uploads import ImageUploadParser
+from user.authentication import CachedTokenAuthentication
+
+
+# Case folded name key served by the core.0011 prefix indexes
+NAME_KEY = Collate(Upper('name'), 'C')
+
+PATTERN_RELATIONS = ('tags', 'datastructures')
+
+# Fields to render, and the relations among them rendered as ids
+Fieldset = collections.namedtuple('Fieldset', ['fields', 'compact'])
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        'fields', OpenApiTypes.STR,
+        description='Comma separated fields to include, besides the id',
+    ),
+    OpenApiParameter(
+        'expand', OpenApiTypes.STR,
+        description='Comma separated relations to include as nested '
+                    'objects, even in compact mode',
+    ),
+    OpenApiParameter(
+        'compact', OpenApiTypes.INT, enum=[0, 1],
+        description='Include relations as lists of ids',
+    ),
+]
 
 
 @extend_schema_view(
     list=extend_schema(
         parameters=[
-            OpenApiParameter('tags', OpenApiTypes.STR),
-            OpenApiParameter('ingredients', OpenApiTypes.STR),
+            OpenApiParameter(
+                'tags', OpenApiTypes.STR,
+                description='Comma separated Tag IDs to filter by',
+            ),
+            OpenApiParameter(
+                'datastructures', OpenApiTypes.STR,
+                description='Comma separated Datastructure IDs to filter by',
+            ),
+            OpenApiParameter(
+                'match', OpenApiTypes.STR, enum=['any', 'all'],
+                description='Whether Patterns need any or all of the IDs',
+            ),
+            OpenApiParameter(
+                'search', OpenApiTypes.STR,
+                description='Full-text search over titles and descriptions, '
+                            'ranked best match first',
+            ),
+            *FIELDSET_PARAMETERS,
         ]
-    )
+    ),
+    retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
 )
-class PatternViewSet(viewsets.ModelViewSet):
+class PatternViewSet(CachedRetrieveMixin, viewsets.ModelViewSet):
     """View for manage Pattern APIs"""
     serializer_class = serializers.PatternSerializer
-    queryset = Pattern.objects.all()
-    authentication_classes = [TokenAuthentication]
+    queryset = Pattern.objects.defer('search_vector')
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = PatternCursorPagination
+    sparse_actions = ('list', 'retrieve')
+    # List from .values() rows rather than through the serializer
+    list_from_rows = True
 
     def _params_to_ints(self, qs):
         """Convert a list of strings to integers"""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _names_param(self, name):
+        """Return the comma separated names in query param name"""
+        value = self.request.query_params.get(name, '')
+        return [item for item in map(str.strip, value.split(',')) if item]
+
+    @cached_property
+    def fieldset(self):
+        """Return the Fieldset asked for, or None to render everything.
+
+        fields names what to render, always with the id. compact=1 renders
+        the relations as lists of ids, except those named in expand, which
+        are rendered as nested objects and included even if not in fields.
+        """
+        params = self.request.query_params if self.request else {}
+        if self.action not in self.sparse_actions or not any(
+                name in params for name in ('fields', 'expand', 'compact')):
+            return None
+
+        available = self.get_serializer_class().Meta.fields
+        wanted = self._names_param('fields') if 'fields' in params \
+            else available
+        expand = self._names_param('expand')
+        errors = {}
+        unknown = set(wanted) - set(available)
+        if unknown:
+            errors['fields'] = [
+                f'Unknown fields: {", ".join(sorted(unknown))}.']
+        unknown = set(expand) - set(PATTERN_RELATIONS)
+        if unknown:
+            errors['expand'] = [
+                f'Unknown relations: {", ".join(sorted(unknown))}.']
+        if params.get('compact', '0') not in ('0', '1'):
+            errors['compact'] = ['Must be 0 or 1.']
+        if errors:
+            raise ValidationError(errors)
+
+        wanted = {'id', *wanted, *expand}
+        fields = [name for name in available if name in wanted]
+        compact = []
+        if params.get('compact') == '1':
+            compact = [
+                name for name in PATTERN_RELATIONS
+                if name in wanted and name not in expand
+            ]
+        return Fieldset(fields, compact)
+
+    def _sparse_queryset(self, queryset, fieldset):
+        """Fetch the columns and prefetch the relations fieldset renders"""
+        columns = [
+            name for name in fieldset.fields
+            if name not in PATTERN_RELATIONS
+        ]
+        if self.action == 'retrieve':
+            columns.append('modified')
+        for relation in PATTERN_RELATIONS:
+            if relation in fieldset.compact:
+                queryset = queryset.prefetch_related(
+                    self._prefetch(relation, 'id', 'modified'))
+            elif relation in fieldset.fields:
+                queryset = queryset.prefetch_related(
+                    self._prefetch(relation))
+
+        return queryset.only(*columns)
+
+    def _prefetch(self, relation, *columns):
+        """Prefetch relation's items in id order, as rows.pattern_rows"""
+        model = Pattern._meta.get_field(relation).related_model
+        queryset = model.objects.order_by('id')
+        if columns:
+            queryset = queryset.only(*columns)
+        return Prefetch(relation, queryset=queryset)
+
+    def _filter_by_relation(self, queryset, relation, ids, match):
+        """Keep Patterns linked to any or all of ids through relation.
+
+        Each test is an EXISTS against the M2M table, so matching Patterns
+        are never duplicated and no DISTINCT is needed.
+        """
+        field = Pattern._meta.get_field(relation)
+        links = field.remote_field.through.objects.filter(
+            pattern_id=OuterRef('pk'))
+        column = f'{field.m2m_reverse_field_name()}_id'
+        if match == 'all':
+            for pk in set(ids):
+                queryset = queryset.filter(
+                    Exists(links.filter(**{column: pk})))
+            return queryset
+
+        return queryset.filter(
+            Exists(links.filter(**{f'{column}__in': ids})))
+
     def get_queryset(self):
         """Retrieve recipies for authenticated User"""
         tags = self.request.query_params.get('tags')
         datastructures = self.request.query_params.get('datastructures')
+        search = self.request.query_params.get('search', '').strip()
+        match = self.request.query_params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': ['Must be "any" or "all".']})
+
         queryset = self.queryset
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = self._filter_by_relation(
+                queryset, 'tags', tag_ids, match)
         if datastructures:
             datastructure_ids = self._params_to_ints(datastructures)
-            queryset = queryset.filter(
-                datastructures__id__in=datastructure_ids)
+            queryset = self._filter_by_relation(
+                queryset, 'datastructures', datastructure_ids, match)
+        ordering = ['-id']
+        if search:
+            queryset = search_patterns(queryset, search)
+            ordering.insert(0, '-rank')
 
-        return queryset.filter(
+        queryset = queryset.filter(
             user=self.request.user
-        ).order_by('-id').distinct()
+        ).order_by(*ordering)
+        if self.fieldset is not None:
+            return self._sparse_queryset(queryset, self.fieldset)
+
+        return queryset.prefetch_related(
+            *map(self._prefetch, PATTERN_RELATIONS))
+
+    def get_last_modified(self, instance):
+        """A Pattern changes with the Tags and Datastructures it renders"""
+        relations = PATTERN_RELATIONS if self.fieldset is None else [
+            name for name in PATTERN_RELATIONS
+            if name in self.fieldset.fields
+        ]
+        return max(
+            obj.modified for obj in [
+                instance,
+                *(
+                    related for relation in relations
+                    for related in getattr(instance, relation).all()
+                ),
+            ]
+        )
+
+    def _row_fields(self):
+        """Return the fields to list from rows, or None if it can't be"""
+        fields = self.fieldset.fields if self.fieldset is not None \
+            else self.get_serializer_class().Meta.fields
+        if self.list_from_rows and rows.supports(fields):
+            return fields
+        return None
+
+    def list(self, request, *args, **kwargs):
+        if self._row_fields() is None:
+            return super().list(request, *args, **kwargs)
+
+        return self._cached_response(
+            self._list_rows, request, *args, **kwargs)
+
+    def _list_rows(self, request, *args, **kwargs):
+        """List the page of Patterns without model or serializer instances.
+
+        The page is read with .values(), keeping the rank of search
+        results for the cursor, and rendered by rows.pattern_rows.
+        """
+        fields = self._row_fields()
+        compact = self.fieldset.compact if self.fieldset is not None else ()
+        queryset = self.filter_queryset(self.get_queryset())
+        extra = ['rank'] if 'rank' in queryset.query.annotations else []
+        page = self.paginate_queryset(rows.values(queryset, fields, extra))
+        if page is None:
+            return Response(rows.pattern_rows(
+                rows.values(queryset, fields), fields, compact))
+
+        return self.get_paginated_response(
+            rows.pattern_rows(page, fields, compact))
+
+    def get_serializer(self, *args, **kwargs):
+        """Render only the Fieldset asked for"""
+        if self.fieldset is not None:
+            kwargs.setdefault('fields', self.fieldset.fields)
+            kwargs.setdefault('compact', self.fieldset.compact)
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
-        if self.action == 'retrieve':
+        if self.action in ('retrieve', 'bulk_import'):
             return serializers.PatternDetailSerializer
         elif self.action == 'upload_image':
             return serializers.PatternImageSerializer
@@ -75,18 +320,110 @@ class PatternViewSet(viewsets.ModelViewSet):
         create a new algo pattern"""
         serializer.save(user=self.request.user)
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @action(
+        methods=['POST'],
+        detail=True,
+        url_path='upload-image',
+        parser_classes=[ImageUploadParser],
+    )
     def upload_image(self, request, pk=None):
         """Upload an image to pattern."""
         recipe = self.get_object()
+        previous = recipe.image.name
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            # The old image's derivatives go until the new ones are made
+            pattern = serializer.save(thumbnails={})
+            schedule_thumbnails(pattern)
+            if pattern.image.name != previous:
+                release_images(previous)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def _save_import_chunk(self, rows):
+        """Write one chunk of validated import rows in a transaction"""
+        serializer = self.get_serializer(many=True)
+        with transaction.atomic():
+            serializer.create(
+                [dict(attrs, user=self.request.user) for attrs in rows])
+
+    @extend_schema(
+        request={
+            'application/x-ndjson': OpenApiTypes.OBJECT,
+            'application/json': OpenApiTypes.OBJECT,
+        },
+        responses={201: OpenApiTypes.OBJECT},
+    )
+    @action(methods=['POST'], detail=False, url_path='bulk-import')
+    def bulk_import(self, request):
+        """Create Patterns from a JSON Lines or JSON array body."""
+        chunk_size = settings.PATTERN_IMPORT_CHUNK_SIZE
+        max_errors = settings.PATTERN_IMPORT_MAX_ERRORS
+        created = failed = 0
+        errors = []
+        rows = []
+        stream = request.stream
+        records = iter_records(stream) if stream is not None else ()
+        for row, record in records:
+            if isinstance(record, ImportRecordError):
+                row_errors = [str(record)]
+            else:
+                serializer = self.get_serializer(data=record)
+                row_errors = (
+                    None if serializer.is_valid() else serializer.errors)
+            if row_errors is not None:
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append({'row': row, 'errors': row_errors})
+                continue
+            rows.append(serializer.validated_data)
+            if len(rows) >= chunk_size:
+                self._save_import_chunk(rows)
+                created += len(rows)
+                rows = []
+
+        if rows:
+            self._save_import_chunk(rows)
+            created += len(rows)
+
+        return Response(
+            {'created': created, 'failed': failed, 'errors': errors},
+            status=(
+                status.HTTP_201_CREATED if created
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'format', OpenApiTypes.STR, enum=['jsonl', 'csv'],
+                description='Export format, defaults to JSON Lines',
+            ),
+        ],
+        responses={200: OpenApiTypes.STR},
+    )
+    @action(
+        methods=['GET'],
+        detail=False,
+        renderer_classes=[JSONLinesRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """Stream the User's Patterns as JSON Lines or CSV."""
+        renderer = request.accepted_renderer
+        patterns = iter_patterns(
+            self.get_queryset(), settings.PATTERN_EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            renderer.stream(patterns),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="patterns.{renderer.format}"')
+
+        return response
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -96,38 +433,118 @@ class PatternViewSet(viewsets.ModelViewSet):
                 OpenApiTypes.INT, enum=[0, 1],
                 description='Filter by items assigned to patterns',
             ),
+            OpenApiParameter(
+                'with_counts', OpenApiTypes.INT, enum=[0, 1],
+                description='Include how many Patterns use each item',
+            ),
         ]
     )
 )
-class BasePatternAttrViewSet(mixins.DestroyModelMixin,
+class BasePatternAttrViewSet(CachedResponseMixin,
+                             mixins.DestroyModelMixin,
                              mixins.UpdateModelMixin,
                              mixins.ListModelMixin,
                              viewsets.GenericViewSet):
     """Generic Viewsets for Pattern Attributes"""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = PatternAttrCursorPagination
+    cached_actions = ('list', 'autocomplete')
+    count_serializer_class = None
+    autocomplete_limit = 10
+    autocomplete_max_limit = 50
+
+    def _flag(self, name):
+        """Return whether the 0/1 query param name is set"""
+        return bool(int(self.request.query_params.get(name, 0)))
+
+    def _links(self):
+        """Return the Pattern M2M rows of the outer item and their column"""
+        rel = self.queryset.model._meta.get_field('pattern')
+        column = f'{rel.field.m2m_reverse_field_name()}_id'
+        links = rel.through.objects.filter(**{column: OuterRef('pk')})
+        return links, column
 
     def get_queryset(self):
         """Override get_queryset method to filter down to created user"""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
+        links, column = self._links()
         queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(pattern__isnull=False)
+        if self._flag('assigned_only'):
+            queryset = queryset.filter(Exists(links))
+        if self.action == 'list' and self._flag('with_counts'):
+            counts = links.order_by().values(column).annotate(
+                count=Count('*')).values('count')
+            queryset = queryset.annotate(pattern_count=Coalesce(
+                Subquery(counts, output_field=IntegerField()), Value(0)))
 
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by('-name', '-id')
+
+    def get_serializer_class(self):
+        """Add usage counts to listed items when asked for"""
+        if self.action == 'list' and self._flag('with_counts'):
+            return self.count_serializer_class
+
+        return self.serializer_class
+
+    def _autocomplete_limit(self):
+        """Return the requested number of suggestions, within bounds"""
+        limit = self.request.query_params.get('limit')
+        if limit is None:
+            return self.autocomplete_limit
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.autocomplete_max_limit:
+            raise ValidationError({'limit': [
+                f'Must be between 1 and {self.autocomplete_max_limit}.'
+            ]})
+
+        return limit
+
+    def _autocomplete(self, request):
+        prefix = request.query_params.get('q', '')
+        if '\x00' in prefix:
+            raise ValidationError({'q': ['Null characters are not allowed.']})
+        queryset = self.get_queryset().annotate(name_key=NAME_KEY)
+        if prefix:
+            # Upper-cased by Postgres as the names were, and under C the
+            # planner turns the LIKE into a range scan of the index
+            queryset = queryset.filter(name_key__startswith=Collate(
+                Upper(Value(prefix)), 'C'))
+        queryset = queryset.order_by('name_key', 'id').only('id', 'name')
+        suggestions = queryset[:self._autocomplete_limit()]
+        return Response(self.get_serializer(suggestions, many=True).data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'q', OpenApiTypes.STR,
+                description='Case insensitive name prefix',
+            ),
+            OpenApiParameter(
+                'limit', OpenApiTypes.INT,
+                description='Number of suggestions, at most 50',
+            ),
+        ],
+    )
+    @action(methods=['GET'], detail=False, pagination_class=None)
+    def autocomplete(self, request):
+        """List the first names starting with a prefix, A to Z."""
+        return self._cached_response(self._autocomplete, request)
 
 
 class TagViewSet(BasePatternAttrViewSet):
     """Manage Tags within database"""
     serializer_class = serializers.TagSerializer
+    count_serializer_class = serializers.TagCountSerializer
     queryset = Tag.objects.all()
 
 
 class DatastructureViewSet(BasePatternAttrViewSet):
     """Manage Datastructures in the database"""
     serializer_class = serializers.DatastructureSerializer
+    count_serializer_class = serializers.DatastructureCountSerializer
     queryset = Datastructure.objects.all()
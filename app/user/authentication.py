@@ -0,0 +1,128 @@
+"""
+Authentication classes for the API
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.signals import setting_changed
+from django.db import router
+from django.dispatch import receiver
+
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+
+from core.cache import build_cache
+
+
+_UNSET = object()
+_token_cache = _UNSET
+
+
+def get_token_cache():
+    """Return the token lookup cache configured by TOKEN_AUTH_CACHE"""
+    global _token_cache
+    if _token_cache is _UNSET:
+        _token_cache = build_cache(
+            settings.TOKEN_AUTH_CACHE, key_prefix='token-auth:')
+
+    return _token_cache
+
+
+@receiver(setting_changed)
+def _reset_token_cache(setting, **kwargs):
+    global _token_cache
+    if setting == 'TOKEN_AUTH_CACHE':
+        _token_cache = _UNSET
+
+
+def _cache_key(key):
+    """Avoid storing raw token keys in a shared cache"""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _to_entry(user, token):
+    """Return the cacheable part of a lookup, leaving out the password"""
+    return {
+        'user': {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname != 'password'
+        },
+        'created': token.created,
+    }
+
+
+def _from_entry(key, entry):
+    """Return (User, token) rebuilt from a cache entry.
+
+    The password is left deferred, so it is read from the database if
+    needed, and saving the User never writes a stale or missing hash.
+    """
+    values = entry['user']
+    user_model = get_user_model()
+    user = user_model.from_db(
+        router.db_for_read(user_model), list(values),
+        list(values.values()))
+    token = Token.from_db(
+        router.db_for_read(Token), ['key', 'user_id', 'created'],
+        [key, user.pk, entry['created']])
+    token.user = user
+    return user, token
+
+
+def invalidate_tokens(keys):
+    """Drop cached lookups for the given token keys"""
+    cache = get_token_cache()
+    if cache is not None:
+        cache.delete_many([_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token -> User lookup.
+
+    Entries hold the User's fields but not its password hash. They expire
+    after TOKEN_AUTH_CACHE['TIMEOUT'] seconds and are dropped as soon as
+    the token is deleted or its User is saved, in every process only if
+    the cache is shared between them.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        if cache is None:
+            return super().authenticate_credentials(key)
+
+        entry = cache.get(_cache_key(key))
+        if entry is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(_cache_key(key), _to_entry(user, token))
+            return user, token
+
+        return _from_entry(key, entry)
+
+    def authenticate_from_cache(self, request):
+        """Return (User, token) if request's lookup is cached, else None.
+
+        Never queries the database, so core.async_views can call it on the
+        event loop; only an in-process cache is consulted.
+        """
+        cache = get_token_cache()
+        if not getattr(cache, 'in_process', False):
+            return None
+
+        auth = get_authorization_header(request).split()
+        if len(auth) != 2 or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            return None
+
+        entry = cache.get(_cache_key(key))
+        if entry is None:
+            return None
+
+        return _from_entry(key, entry)
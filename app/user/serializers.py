@@ -10,8 +10,10 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from core.middleware import TimedSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for the user object."""
 
     class Meta:
@@ -0,0 +1,24 @@
+"""
+Signal handlers keeping the token lookup cache in sync
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_tokens
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Forget a token as soon as it is revoked"""
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, **kwargs):
+    """Forget a User's tokens when the User changes or is deactivated"""
+    if not created:
+        invalidate_tokens(
+            Token.objects.filter(user=instance).values_list('key', flat=True))
@@ -0,0 +1,97 @@
+"""
+Tests for the cached token authentication
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import _cache_key, get_token_cache
+
+
+ME_URL = reverse('user:me')
+
+
+@override_settings(TOKEN_AUTH_CACHE={'BACKEND': 'local', 'TIMEOUT': 60})
+class CachedTokenAuthenticationTests(TestCase):
+    """Test - Token lookups served from the cache"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        get_token_cache().clear()
+
+    def test_repeat_requests_skip_token_query(self):
+        """Test - Only the first request looks the token up"""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        """Test - Deleting a token invalidates the cached lookup"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test - Deactivating a User invalidates the cached lookup"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_refreshes_cached_user(self):
+        """Test - Updates via the API are visible on the next request"""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'name': 'Updated Name'})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'Updated Name')
+
+    def test_password_hash_not_cached(self):
+        """Test - Cached lookups leave out the password hash"""
+        self.client.get(ME_URL)
+
+        entry = get_token_cache().get(_cache_key(self.token.key))
+
+        self.assertNotIn('password', entry['user'])
+        self.assertNotIn(self.user.password, repr(entry))
+
+    def test_saving_cached_user_keeps_password(self):
+        """Test - Saving a User read from the cache keeps its password"""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'name': 'Updated Name'})
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'Updated Name')
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    @override_settings(TOKEN_AUTH_CACHE={'BACKEND': None})
+    def test_cache_disabled(self):
+        """Test - Every request hits the database with caching disabled"""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)